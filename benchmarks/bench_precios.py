@@ -0,0 +1,93 @@
+"""
+Mide el cálculo de precios de un catálogo sintético: el camino anterior con
+floats producto a producto, el exacto (Decimal en centavos) producto a
+producto y MotorPrecios, exacto con enteros int64 sobre todo el catálogo.
+
+    python -m benchmarks.bench_precios [--n 50000] [--categorias 40] [--reglas 0.1] [--modo linea]
+
+Comprueba además que el motor da exactamente los mismos centavos que el
+camino Decimal para cada producto.
+"""
+import argparse
+import random
+import time
+
+from utils.precios import (
+    MotorPrecios, resolver_parametros, calcular_desglose, desglose_centavos, a_centesimas,
+    de_centesimas
+)
+
+
+def catalogo(n, categorias, reglas, modo, terminacion):
+    aleatorio = random.Random(0)
+    productos = [{"sku": f"SKU{i:06d}", "categoria": f"CAT{i % categorias:03d}"} for i in range(n)]
+    precios = {
+        "global": {"iva": 16, "precio_base": 199.9, "envio": 99, "sumar_envio": False},
+        "categorias": {
+            f"CAT{c:03d}": {"precio_base": round(aleatorio.uniform(50, 900), 2), "descuento": aleatorio.choice([0, 5, 12.5])}
+            for c in range(0, categorias, 2)
+        },
+        "productos": {
+            p["sku"]: {"precio_base": round(aleatorio.uniform(10, 3000), 2), "descuento": aleatorio.choice([0, 10, 15]),
+                       "otros": aleatorio.choice([0, 4.5])}
+            for p in productos if aleatorio.random() < reglas
+        },
+        "redondeo": {"modo": modo, "terminacion": terminacion},
+    }
+    return productos, precios
+
+
+def desglose_float(p):
+    """El cálculo de antes con floats (referencia de velocidad, no de exactitud)."""
+    precio_desc = p["precio_base"] * (1 - p["descuento"] / 100)
+    precio_iva = precio_desc * (1 + p["iva"] / 100)
+    return precio_iva + (p["envio"] if p["sumar_envio"] else 0) + (p["otros"] if p["sumar_otros"] else 0)
+
+
+def medir(nombre, funcion, n):
+    inicio = time.perf_counter()
+    resultado = funcion()
+    total = time.perf_counter() - inicio
+    print(f"{nombre:<36} {total * 1000:9.1f} ms  {total / n * 1e6:7.2f} µs/producto")
+    return total, resultado
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--n", type=int, default=50000, help="productos en el catálogo")
+    parser.add_argument("--categorias", type=int, default=40)
+    parser.add_argument("--reglas", type=float, default=0.1, help="fracción de productos con regla propia")
+    parser.add_argument("--modo", choices=("linea", "total"), default="linea")
+    parser.add_argument("--terminacion", type=float, default=None, help="p. ej. 0.90")
+    args = parser.parse_args()
+
+    productos, precios = catalogo(args.n, args.categorias, args.reglas, args.modo, args.terminacion)
+    politica = (args.modo, None if args.terminacion is None else a_centesimas(args.terminacion) % 100)
+
+    def resueltos():
+        return (resolver_parametros(precios, p["sku"], p["categoria"])[0] for p in productos)
+
+    # Los tres caminos incluyen resolver la cascada de cada producto
+    t_float, _ = medir("float por producto (anterior)", lambda: [desglose_float(p) for p in resueltos()], args.n)
+    a_centesimas.cache_clear()
+    desglose_centavos.cache_clear()
+    t_decimal, exactos = medir("Decimal por producto (caché fría)",
+                               lambda: [calcular_desglose(p, politica)["precio_final"] for p in resueltos()], args.n)
+    medir("Decimal por producto (caché tibia)",
+          lambda: [calcular_desglose(p, politica)["precio_final"] for p in resueltos()], args.n)
+    t_motor, motor = medir("MotorPrecios int64 (todo el catálogo)", lambda: MotorPrecios(productos, precios), args.n)
+
+    finales = [de_centesimas(c) for c in motor.columnas["precio_final"].tolist()]
+    distintos = sum(a != b for a, b in zip(finales, exactos))
+    print(f"Diferencias motor vs Decimal: {distintos}")
+
+    precios["categorias"]["CAT000"]["descuento"] = 20
+    medir("MotorPrecios tras cambiar 1 categoría", lambda: motor.aplicar_cambio(["categorias", "CAT000"]), args.n)
+    precios["global"]["iva"] = 8
+    medir("MotorPrecios tras cambiar el global", lambda: motor.aplicar_cambio(["global"]), args.n)
+    print(f"Motor exacto vs float por producto: x{t_float / t_motor:.1f}; "
+          f"vs Decimal por producto: x{t_decimal / t_motor:.1f}")
+
+
+if __name__ == "__main__":
+    main()
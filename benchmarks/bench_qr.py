@@ -0,0 +1,46 @@
+"""
+Compara el dibujo de QR cuadrados con qrcode/PIL (módulo a módulo) contra
+el rasterizador NumPy de utils.qr, y mide la salida vectorial SVG/PDF.
+
+    python -m benchmarks.bench_qr [--n 500] [--box 10]
+
+La matriz de módulos se codifica una vez por texto antes de medir, así solo
+se compara el dibujo (la codificación es la misma en ambos caminos).
+"""
+import argparse
+import time
+
+from utils.qr import qr_codificado, modulos_qr, rasterizar_qr, qr_svg, qr_pdf
+
+
+def medir(nombre, funcion, textos):
+    inicio = time.perf_counter()
+    for texto in textos:
+        funcion(texto)
+    total = time.perf_counter() - inicio
+    print(f"{nombre:<28} {total:8.3f} s  {total / len(textos) * 1000:8.3f} ms/código")
+    return total
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--n", type=int, default=500, help="cantidad de códigos distintos")
+    parser.add_argument("--box", type=int, default=10, help="píxeles por módulo")
+    args = parser.parse_args()
+
+    textos = [f"https://skillhub-mex.com/producto/{i:06d}" for i in range(args.n)]
+    for texto in textos:
+        modulos_qr(texto)
+
+    pil = medir("qrcode make_image (PIL)",
+                lambda t: qr_codificado(t, box_size=args.box).make_image(
+                    fill_color="#000000", back_color="#FFFFFF").get_image(), textos)
+    numpy = medir("rasterizar_qr (NumPy)",
+                  lambda t: rasterizar_qr(modulos_qr(t), box_size=args.box), textos)
+    medir("qr_svg", lambda t: qr_svg(modulos_qr(t), box_size=args.box), textos)
+    medir("qr_pdf", lambda t: qr_pdf(modulos_qr(t), box_size=args.box), textos)
+    print(f"Aceleración del rasterizado: x{pil / numpy:.1f}")
+
+
+if __name__ == "__main__":
+    main()
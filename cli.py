@@ -0,0 +1,444 @@
+"""
+Tareas por lotes sin interfaz gráfica (para cron o un servidor).
+
+    python -m cli skus [--simular]
+    python -m cli optimizar [--sku SKU ...] [--ancho 900 --alto 900 --formato webp --calidad 85]
+    python -m cli mockups --base BASE.png --disenos DIR_O_ARCHIVOS... (--area X,Y,ANCHO,ALTO | --plantilla NOMBRE)
+    python -m cli mockups-productos --base BASE.png --disenos DIR... (--area ... | --plantilla ...)
+    python -m cli qr (--texto TEXTO | --sku SKU) --salida qr.png|qr.svg|qr.pdf [--estilo Cuadrado]
+    python -m cli qr-lote [--sku SKU ...] [--filtro TEXTO] [--carpeta qr_productos] [--formato png]
+    python -m cli etiquetas --salida hojas.pdf|hojas.png [--filtro TEXTO] [--columnas 3 --filas 8]
+    python -m cli simular [--escenario escenario.json] [--iva 8] [--descuento CATEGORIA=20 ...] [--sumar-envio] [--csv salida.csv]
+    python -m cli ofertas [--desde 2026-11-13T00:00] [--csv ofertas.csv] [--todos]
+    python -m cli urls [--sku SKU ...] [--url-base URL]
+    python -m cli html --sku SKU [--salida archivo.html]
+
+Cada línea de la salida estándar es un objeto JSON con un campo "evento":
+"progreso" (hechos, total), "resultado", "error" y un "fin" con el resumen.
+"""
+import os
+import sys
+import json
+import argparse
+import multiprocessing
+from concurrent.futures import as_completed
+
+from utils.persistencia import obtener_documento
+from utils.catalogo import PRODUCTOS_FILE
+
+
+def emitir(evento, **datos):
+    print(json.dumps({"evento": evento, **datos}, ensure_ascii=False), flush=True)
+
+
+def progreso(hechos, total):
+    emitir("progreso", hechos=hechos, total=total)
+
+
+def documento_productos():
+    return obtener_documento(PRODUCTOS_FILE, [])
+
+
+def filtrar_skus(productos, skus):
+    if not skus:
+        return productos
+    return [p for p in productos if p.get("sku") in skus]
+
+
+def leer_area(texto):
+    try:
+        x, y, ancho, alto = (int(v) for v in texto.split(","))
+    except ValueError:
+        raise argparse.ArgumentTypeError("el área se indica como X,Y,ANCHO,ALTO")
+    return x, y, ancho, alto
+
+
+def opciones_imagen(args):
+    return {
+        "ancho": args.ancho,
+        "alto": args.alto,
+        "formato": args.formato,
+        "calidad": args.calidad,
+        "mantener_original": args.mantener_original,
+    }
+
+
+def colocaciones_args(args):
+    """Colocaciones de la plantilla indicada o una sola con --area."""
+    from utils import plantillas_mockup
+    if args.plantilla:
+        plantilla = plantillas_mockup.cargar_plantillas().get(args.plantilla)
+        if not plantilla:
+            raise SystemExit(f"No existe la plantilla '{args.plantilla}'")
+        return plantillas_mockup.colocaciones(plantilla["areas"]), plantilla.get("base")
+    if not args.area:
+        raise SystemExit("Indica --area o --plantilla")
+    return [{"nombre": "", "area": args.area, "efectos": args.efectos}], None
+
+
+def rutas_diseno(entradas):
+    from utils.render_mockup import listar_disenos
+    rutas = []
+    for entrada in entradas:
+        rutas.extend(listar_disenos(entrada) if os.path.isdir(entrada) else [entrada])
+    return rutas
+
+
+def cargar_base(args, base_plantilla):
+    from PIL import Image
+    ruta = args.base or base_plantilla
+    if not ruta:
+        raise SystemExit("Indica --base")
+    return Image.open(ruta).convert("RGBA")
+
+
+def cmd_skus(args):
+    from utils.skus import cargar_catalogos_sku, calcular_sku
+    documento = documento_productos()
+    productos = documento.cargar()
+    catalogos = cargar_catalogos_sku()
+    cambiados = 0
+    for prod in productos:
+        sku = calcular_sku(prod, catalogos)
+        if prod.get("sku") != sku:
+            emitir("resultado", id=prod.get("id"), anterior=prod.get("sku", ""), sku=sku)
+            prod["sku"] = sku
+            cambiados += 1
+    if cambiados and not args.simular:
+        documento.guardar(productos)
+    emitir("fin", productos=len(productos), cambiados=cambiados, guardado=bool(cambiados and not args.simular))
+    return 0
+
+
+def cmd_optimizar(args):
+    from utils.optimizador import ruta_imagenes_raiz, lotes_catalogo, optimizar_lotes
+    productos = filtrar_skus(documento_productos().cargar(), args.sku)
+    lotes = lotes_catalogo(productos, args.raiz or ruta_imagenes_raiz())
+    resultado = optimizar_lotes(
+        lotes, opciones_imagen(args),
+        progreso=progreso,
+        imagen_lista=lambda destino: emitir("resultado", imagen=destino),
+        error_imagen=lambda origen, mensaje: emitir("error", origen=origen, mensaje=mensaje),
+        max_workers=args.workers
+    )
+    emitir("fin", carpetas=len(resultado["carpetas"]), omitidas=resultado["omitidas"],
+           errores=len(resultado["errores"]))
+    return 1 if resultado["errores"] else 0
+
+
+def cmd_mockups(args):
+    from utils import render_mockup
+    colocaciones, base_plantilla = colocaciones_args(args)
+    base = cargar_base(args, base_plantilla)
+    disenos = rutas_diseno(args.disenos)
+    salida = {"formato": args.formato, "calidad": args.calidad, "compresion": args.compresion}
+    os.makedirs(args.salida, exist_ok=True)
+    errores = 0
+    with render_mockup.crear_pool_render(base, args.workers) as pool:
+        futuros = {render_mockup.enviar_diseno(pool, ruta, colocaciones, args.salida, salida): ruta
+                   for ruta in disenos}
+        for hechos, fut in enumerate(as_completed(futuros), 1):
+            try:
+                for ruta, _ in fut.result():
+                    emitir("resultado", diseno=futuros[fut], mockup=ruta)
+            except Exception as e:
+                errores += 1
+                emitir("error", diseno=futuros[fut], mensaje=str(e))
+            progreso(hechos, len(disenos))
+    emitir("fin", disenos=len(disenos), errores=errores, carpeta=args.salida)
+    return 1 if errores else 0
+
+
+def cmd_mockups_productos(args):
+    from utils.optimizador import ruta_imagenes_raiz
+    from utils.pipeline_mockups import ejecutar_pipeline
+    colocaciones, base_plantilla = colocaciones_args(args)
+    base = cargar_base(args, base_plantilla)
+    productos = filtrar_skus(documento_productos().cargar(), args.sku)
+    resumen = ejecutar_pipeline(
+        base, rutas_diseno(args.disenos), productos, colocaciones,
+        args.raiz or ruta_imagenes_raiz(), opciones_imagen(args),
+        progreso=progreso, max_workers=args.workers
+    )
+    for sku, rutas in resumen["skus"].items():
+        emitir("resultado", sku=sku, imagenes=rutas)
+    for origen, mensaje in resumen["errores"]:
+        emitir("error", origen=origen, mensaje=mensaje)
+    emitir("fin", skus=len(resumen["skus"]), errores=len(resumen["errores"]),
+           sin_producto=resumen["sin_producto"])
+    return 1 if resumen["errores"] else 0
+
+
+def cmd_qr(args):
+    from utils.qr import texto_producto, guardar_qr
+    texto = args.texto
+    if args.sku_producto:
+        producto = next((p for p in documento_productos().cargar() if p.get("sku") == args.sku_producto), None)
+        if producto is None:
+            emitir("error", sku=args.sku_producto, mensaje="SKU no encontrado")
+            return 1
+        texto = texto_producto(producto)
+    if not texto:
+        raise SystemExit("Indica --texto o --sku")
+    guardar_qr(texto, args.salida, args.estilo, args.color, args.fondo)
+    emitir("fin", texto=texto, archivo=args.salida)
+    return 0
+
+
+def cmd_qr_lote(args):
+    from utils.qr import filtrar_productos, generar_qr_lote
+    productos = filtrar_productos(filtrar_skus(documento_productos().cargar(), args.sku), args.filtro)
+    resultado = generar_qr_lote(productos, args.carpeta, args.estilo, args.color, args.fondo,
+                                progreso=progreso, max_workers=args.workers, formato=args.formato)
+    for ruta in resultado["generados"]:
+        emitir("resultado", qr=ruta)
+    for sku, mensaje in resultado["errores"]:
+        emitir("error", sku=sku, mensaje=mensaje)
+    emitir("fin", generados=len(resultado["generados"]), omitidos=resultado["omitidos"],
+           errores=len(resultado["errores"]), carpeta=args.carpeta)
+    return 1 if resultado["errores"] else 0
+
+
+def cmd_etiquetas(args):
+    from utils.qr import filtrar_productos
+    from utils.precios import cargar_precios
+    from utils.etiquetas import generar_hojas
+    productos = filtrar_productos(filtrar_skus(documento_productos().cargar(), args.sku), args.filtro)
+    diseno = {
+        "columnas": args.columnas, "filas": args.filas, "margen_mm": args.margen,
+        "separacion_mm": args.separacion, "dpi": args.dpi, "guias": not args.sin_guias,
+    }
+    resultado = generar_hojas(productos, cargar_precios(), args.salida, diseno,
+                              progreso=progreso, max_workers=args.workers)
+    for ruta in resultado["archivos"]:
+        emitir("resultado", archivo=ruta)
+    for hoja, mensaje in resultado["errores"]:
+        emitir("error", hoja=hoja, mensaje=mensaje)
+    emitir("fin", etiquetas=resultado["etiquetas"], paginas=resultado["paginas"],
+           errores=len(resultado["errores"]))
+    return 1 if resultado["errores"] else 0
+
+
+def leer_descuento(texto):
+    categoria, _, valor = texto.rpartition("=")
+    if not categoria:
+        raise argparse.ArgumentTypeError("se espera CATEGORIA=PORCENTAJE")
+    try:
+        return categoria, float(valor)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"porcentaje inválido: {valor}")
+
+
+def escenario_args(args):
+    escenario = {}
+    if args.escenario:
+        with open(args.escenario, encoding="utf-8") as f:
+            escenario = json.load(f)
+    if args.iva is not None:
+        escenario.setdefault("global", {})["iva"] = args.iva
+    for categoria, descuento in args.descuento or []:
+        escenario.setdefault("categorias", {}).setdefault(categoria, {})["descuento"] = descuento
+    if args.sumar_envio is not None:
+        escenario.setdefault("forzar", {})["sumar_envio"] = args.sumar_envio
+    return escenario
+
+
+def texto_importes(datos):
+    # Decimal no es serializable en JSON; como texto conserva los centavos exactos
+    return {k: str(v) if v is not None and not isinstance(v, (int, str)) else v for k, v in datos.items()}
+
+
+def cmd_simular(args):
+    from utils.precios import cargar_precios
+    from utils.simulacion import simular, exportar_csv
+    escenario = escenario_args(args)
+    if not escenario:
+        emitir("error", mensaje="el escenario no cambia nada")
+        return 2
+    try:
+        resultado = simular(documento_productos().cargar(), cargar_precios(), escenario)
+    except ValueError as e:
+        emitir("error", mensaje=str(e))
+        return 2
+    for categoria, resumen in resultado["por_categoria"].items():
+        if resumen["cambian"]:
+            emitir("resultado", categoria=categoria, **texto_importes(resumen))
+    extra = {}
+    if args.csv:
+        extra = {"archivo": args.csv, "filas": exportar_csv(resultado, args.csv, solo_cambios=not args.todos)}
+    emitir("fin", **texto_importes(resultado["resumen"]), **extra)
+    return 0
+
+
+def cmd_ofertas(args):
+    from utils.precios import cargar_precios
+    from utils.promociones import IndicePromociones
+    from utils.exportacion import ofertas_woocommerce, exportar_ofertas_csv
+    precios = cargar_precios()
+    for promo_id, motivo in IndicePromociones(precios.get("promociones")).invalidas:
+        emitir("error", promocion=promo_id, mensaje=motivo)
+    try:
+        ofertas = list(ofertas_woocommerce(documento_productos().cargar(), precios, args.desde, args.todos))
+    except ValueError as e:
+        emitir("error", mensaje=str(e))
+        return 2
+    if args.csv:
+        emitir("fin", ofertas=exportar_ofertas_csv(ofertas, args.csv), archivo=args.csv)
+        return 0
+    for oferta in ofertas:
+        emitir("resultado", **oferta)
+    emitir("fin", ofertas=len(ofertas))
+    return 0
+
+
+def cmd_urls(args):
+    from utils.optimizador import ruta_imagenes_raiz
+    from utils.exportacion import urls_imagenes
+    raiz = args.raiz or ruta_imagenes_raiz()
+    productos = filtrar_skus(documento_productos().cargar(), args.sku)
+    total = 0
+    for prod in productos:
+        sku = prod.get("sku", "")
+        urls = urls_imagenes(os.path.join(raiz, sku), args.url_base) if sku else []
+        if urls:
+            total += len(urls)
+            emitir("resultado", sku=sku, urls=urls)
+    emitir("fin", productos=len(productos), urls=total)
+    return 0
+
+
+def cmd_html(args):
+    from utils.exportacion import cargar_descripciones, html_producto
+    html = html_producto(cargar_descripciones(), args.sku_producto)
+    if args.salida:
+        with open(args.salida, "w", encoding="utf-8") as f:
+            f.write(html)
+        emitir("fin", sku=args.sku_producto, archivo=args.salida)
+    else:
+        emitir("fin", sku=args.sku_producto, html=html)
+    return 0
+
+
+def agregar_opciones_imagen(parser):
+    parser.add_argument("--ancho", type=int, default=900)
+    parser.add_argument("--alto", type=int, default=900)
+    parser.add_argument("--formato", choices=["jpg", "png", "webp"], default="webp")
+    parser.add_argument("--calidad", type=int, default=85)
+    parser.add_argument("--mantener-original", action="store_true",
+                        help="no redimensionar, solo convertir")
+    parser.add_argument("--raiz", help="carpeta raíz de imágenes (por defecto la configurada)")
+
+
+def agregar_opciones_mockup(parser):
+    parser.add_argument("--base", help="imagen base (por defecto la de la plantilla)")
+    parser.add_argument("--disenos", nargs="+", required=True, help="archivos o carpetas de diseños")
+    parser.add_argument("--area", type=leer_area, help="X,Y,ANCHO,ALTO")
+    parser.add_argument("--plantilla", help="nombre de una plantilla guardada")
+    parser.add_argument("--efectos", action="store_true", help="aplicar efectos realistas (con --area)")
+
+
+def crear_parser():
+    from utils.qr import ESTILOS_QR, FORMATOS_QR, QR_DIR
+    from utils.exportacion import DEFAULT_URL_BASE
+    from utils.etiquetas import DISENO_HOJA
+    parser = argparse.ArgumentParser(prog="python -m cli", description="Tareas por lotes de Hub-Skill")
+    parser.add_argument("--workers", type=int, default=None, help="procesos en paralelo")
+    sub = parser.add_subparsers(dest="comando", required=True)
+
+    p = sub.add_parser("skus", help="recalcular los SKUs de productos.json")
+    p.add_argument("--simular", action="store_true", help="mostrar los cambios sin guardar")
+    p.set_defaults(funcion=cmd_skus)
+
+    p = sub.add_parser("optimizar", help="optimizar las imágenes de las carpetas de SKU")
+    p.add_argument("--sku", nargs="*", help="solo estos SKUs")
+    agregar_opciones_imagen(p)
+    p.set_defaults(funcion=cmd_optimizar)
+
+    p = sub.add_parser("mockups", help="generar mockups en una carpeta")
+    agregar_opciones_mockup(p)
+    p.add_argument("--salida", default="mockups")
+    p.add_argument("--formato", choices=["png", "jpg", "webp"], default="png")
+    p.add_argument("--calidad", type=int, default=90)
+    p.add_argument("--compresion", type=int, default=6)
+    p.set_defaults(funcion=cmd_mockups)
+
+    p = sub.add_parser("mockups-productos", help="mockups optimizados directo a la carpeta de cada SKU")
+    agregar_opciones_mockup(p)
+    p.add_argument("--sku", nargs="*", help="solo estos SKUs")
+    agregar_opciones_imagen(p)
+    p.set_defaults(funcion=cmd_mockups_productos)
+
+    p = sub.add_parser("qr", help="generar un código QR")
+    p.add_argument("--texto")
+    p.add_argument("--sku", dest="sku_producto", help="QR con la URL del producto")
+    p.add_argument("--salida", required=True)
+    p.add_argument("--estilo", choices=ESTILOS_QR, default="Cuadrado")
+    p.add_argument("--color", default="#000000")
+    p.add_argument("--fondo", default="#FFFFFF")
+    p.set_defaults(funcion=cmd_qr)
+
+    p = sub.add_parser("qr-lote", help="QR de todos los productos en <carpeta>/<SKU>/")
+    p.add_argument("--sku", nargs="*", help="solo estos SKUs")
+    p.add_argument("--filtro", help="texto contenido en el SKU, nombre o categoría")
+    p.add_argument("--carpeta", default=QR_DIR)
+    p.add_argument("--formato", choices=FORMATOS_QR, default="png")
+    p.add_argument("--estilo", choices=ESTILOS_QR, default="Cuadrado")
+    p.add_argument("--color", default="#000000")
+    p.add_argument("--fondo", default="#FFFFFF")
+    p.set_defaults(funcion=cmd_qr_lote)
+
+    p = sub.add_parser("etiquetas", help="hojas imprimibles de etiquetas con QR y precio")
+    p.add_argument("--salida", required=True, help=".pdf (un documento) o .png (una imagen por hoja)")
+    p.add_argument("--sku", nargs="*", help="solo estos SKUs")
+    p.add_argument("--filtro", help="texto contenido en el SKU, nombre o categoría")
+    p.add_argument("--columnas", type=int, default=DISENO_HOJA["columnas"])
+    p.add_argument("--filas", type=int, default=DISENO_HOJA["filas"])
+    p.add_argument("--margen", type=float, default=DISENO_HOJA["margen_mm"], help="mm")
+    p.add_argument("--separacion", type=float, default=DISENO_HOJA["separacion_mm"], help="mm")
+    p.add_argument("--dpi", type=int, default=DISENO_HOJA["dpi"], help="solo para PNG")
+    p.add_argument("--sin-guias", action="store_true", help="sin el contorno de corte")
+    p.set_defaults(funcion=cmd_etiquetas)
+
+    p = sub.add_parser("simular", help="comparar los precios finales actuales con un escenario sin guardarlo")
+    p.add_argument("--escenario", help="JSON con global, categorias, productos, forzar y redondeo")
+    p.add_argument("--iva", type=float, help="IVA global hipotético")
+    p.add_argument("--descuento", type=leer_descuento, nargs="*", metavar="CATEGORIA=PCT")
+    p.add_argument("--sumar-envio", dest="sumar_envio", action="store_true", default=None,
+                   help="todas las reglas suman el envío al precio")
+    p.add_argument("--sin-sumar-envio", dest="sumar_envio", action="store_false")
+    p.add_argument("--csv", help="detalle por producto")
+    p.add_argument("--todos", action="store_true", help="en el CSV incluir también los que no cambian")
+    p.set_defaults(funcion=cmd_simular)
+
+    p = sub.add_parser("ofertas", help="precio de oferta y fechas de las promociones para WooCommerce")
+    p.add_argument("--desde", help="fecha ISO desde la que se busca la oferta de cada SKU (por defecto ahora)")
+    p.add_argument("--csv", help="CSV para el importador de productos de WooCommerce")
+    p.add_argument("--todos", action="store_true", help="incluir los SKUs sin oferta, con los campos vacíos")
+    p.set_defaults(funcion=cmd_ofertas)
+
+    p = sub.add_parser("urls", help="listar las URLs de las imágenes de cada SKU")
+    p.add_argument("--sku", nargs="*", help="solo estos SKUs")
+    p.add_argument("--url-base", default=DEFAULT_URL_BASE)
+    p.add_argument("--raiz", help="carpeta raíz de imágenes (por defecto la configurada)")
+    p.set_defaults(funcion=cmd_urls)
+
+    p = sub.add_parser("html", help="exportar el HTML de WooCommerce de un SKU")
+    p.add_argument("--sku", dest="sku_producto", required=True)
+    p.add_argument("--salida")
+    p.set_defaults(funcion=cmd_html)
+    return parser
+
+
+def main(argv=None):
+    args = crear_parser().parse_args(argv)
+    try:
+        return args.funcion(args)
+    except KeyboardInterrupt:
+        emitir("error", mensaje="interrumpido")
+        return 130
+
+
+if __name__ == "__main__":
+    # Los pools de procesos usan "spawn"
+    multiprocessing.freeze_support()
+    sys.exit(main())
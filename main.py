@@ -6,6 +6,7 @@ from utils.dependency_checker import check_dependencies
 
 import sys
 import os
+import multiprocessing
 
 def setup_application():
     """Configura la aplicación principal"""
@@ -36,4 +37,6 @@ def main():
         return 1
 
 if __name__ == "__main__":
+    # Los pools de procesos usan "spawn"; necesario si se empaqueta la app
+    multiprocessing.freeze_support()
     sys.exit(main())
\ No newline at end of file
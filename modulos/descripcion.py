@@ -1,37 +1,34 @@
 import os
-import json
 from PyQt6.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QLabel, QLineEdit, QTextEdit, QPushButton,
     QMessageBox, QFrame, QFileDialog, QComboBox, QTabWidget, QTableWidget, QTableWidgetItem, QCheckBox, QDialog
 )
 from PyQt6.QtGui import QPixmap
 from PyQt6.QtCore import Qt
+from utils.catalogo import obtener_catalogo
+from utils.miniaturas import obtener_miniaturas
+from utils.exportacion import (
+    NOTACOMPRA_FILE, documento_descripciones, cargar_descripciones,
+    cargar_nota_compra_global, html_woocommerce
+)
 
 DATA_DIR = "datos"
-DESCRIPCIONES_FILE = os.path.join(DATA_DIR, "descripciones.json")
-PRODUCTOS_FILE = os.path.join(DATA_DIR, "productos.json")
 IMAGES_ROOT = os.path.abspath("imagenes_productos")
-NOTACOMPRA_FILE = os.path.join(DATA_DIR, "nota_compra_global.txt")
+TAM_MINIATURA = 120
 
 def ensure_data_dir():
     if not os.path.exists(DATA_DIR):
         os.makedirs(DATA_DIR)
 
-def cargar_descripciones():
-    if os.path.exists(DESCRIPCIONES_FILE):
-        with open(DESCRIPCIONES_FILE, "r", encoding="utf-8") as f:
-            return json.load(f)
-    return {}
-
 def guardar_descripciones(data):
-    with open(DESCRIPCIONES_FILE, "w", encoding="utf-8") as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
+    documento_descripciones().guardar(data)
+
+def guardar_descripcion(data, sku, descripcion):
+    """Guarda la descripción de un solo SKU vía journal."""
+    documento_descripciones().set(data, [sku], descripcion)
 
 def cargar_productos():
-    if os.path.exists(PRODUCTOS_FILE):
-        with open(PRODUCTOS_FILE, "r", encoding="utf-8") as f:
-            return json.load(f)
-    return []
+    return obtener_catalogo().productos()
 
 def obtener_categorias_de_productos(productos):
     categorias = set()
@@ -41,12 +38,6 @@ def obtener_categorias_de_productos(productos):
             categorias.add(cat)
     return sorted(list(categorias))
 
-def cargar_nota_compra_global():
-    if os.path.exists(NOTACOMPRA_FILE):
-        with open(NOTACOMPRA_FILE, "r", encoding="utf-8") as f:
-            return f.read()
-    return ""
-
 def guardar_nota_compra_global(text):
     ensure_data_dir()
     with open(NOTACOMPRA_FILE, "w", encoding="utf-8") as f:
@@ -90,8 +81,20 @@ class DescripcionWindow(QWidget):
         self.descripciones = cargar_descripciones()
         self.productos = cargar_productos()
         self.current_sku = None
+        self.imagenes_preview = []
         self.categorias = obtener_categorias_de_productos(self.productos)
         self.init_ui()
+        obtener_catalogo().productos_cambiados.connect(self.al_cambiar_catalogo)
+        obtener_miniaturas().miniatura_lista.connect(self.al_recibir_miniatura)
+
+    def al_recibir_miniatura(self, ruta, tam, img):
+        if tam == TAM_MINIATURA and ruta in self.imagenes_preview:
+            self.actualizar_preview()
+
+    def al_cambiar_catalogo(self):
+        self.productos = cargar_productos()
+        self.categorias = obtener_categorias_de_productos(self.productos)
+        self.llenar_sku_combo()
 
     def init_ui(self):
         main = QHBoxLayout(self)
@@ -238,7 +241,7 @@ class DescripcionWindow(QWidget):
             QMessageBox.warning(self, "SKU faltante", "Selecciona un producto para identificar la categoría.")
             return
         # Encuentra la categoría del producto actual
-        prod = next((p for p in self.productos if p.get("sku") == self.current_sku), None)
+        prod = obtener_catalogo().por_sku(self.current_sku)
         if not prod or not prod.get("categoria"):
             QMessageBox.warning(self, "Categoría faltante", "El producto seleccionado no tiene categoría.")
             return
@@ -272,6 +275,7 @@ class DescripcionWindow(QWidget):
                     n_mod += 1
                 else:
                     n_skip += 1
+        # Cambio masivo: una sola reescritura atómica en lugar de n entradas de journal
         guardar_descripciones(self.descripciones)
         QMessageBox.information(self, "Aplicado",
             f"{n_mod} productos de la categoría '{categoria}' modificados.\n{n_skip} productos no se modificaron por tener datos únicos.")
@@ -341,8 +345,7 @@ class DescripcionWindow(QWidget):
                 if self.meta_table.item(r, 0) and self.meta_table.item(r, 0).text().strip()
             ]
         }
-        self.descripciones[sku] = data
-        guardar_descripciones(self.descripciones)
+        guardar_descripcion(self.descripciones, sku, data)
         QMessageBox.information(self, "Guardado", "Descripción guardada correctamente.")
 
     def exportar_html(self):
@@ -354,15 +357,8 @@ class DescripcionWindow(QWidget):
             QMessageBox.information(self, "Exportado", f"HTML exportado a {fname}")
 
     def generar_html_export(self):
-        html = ""
-        if self.desc_corta_edit.toPlainText().strip():
-            html += f"<!-- DESCRIPCION_CORTA -->\n{self.desc_corta_edit.toPlainText().strip()}\n"
-        if self.desc_larga_edit.toPlainText().strip():
-            html += f"<!-- DESCRIPCION_LARGA -->\n{self.desc_larga_edit.toPlainText().strip()}\n"
-        nota_compra = cargar_nota_compra_global()
-        if nota_compra:
-            html += f"<!-- NOTA_COMPRA -->\n{nota_compra}\n"
-        return html
+        return html_woocommerce(self.desc_corta_edit.toPlainText(), self.desc_larga_edit.toPlainText(),
+                                cargar_nota_compra_global())
 
     def actualizar_preview(self):
         html = ""
@@ -373,10 +369,15 @@ class DescripcionWindow(QWidget):
         # Imágenes (del SKU)
         sku = self.current_sku or ""
         imagenes = obtener_imagenes_producto(sku)
+        self.imagenes_preview = imagenes[:5]  # máximo 5 imágenes
         if imagenes:
             html += "<div style='margin:10px 0;'><b>Imágenes del producto:</b><br>"
-            for imgfile in imagenes[:5]:  # máximo 5 imágenes
-                html += f"<img src='file:///{imgfile}' style='max-width:120px;max-height:120px;margin:6px;border-radius:8px;border:1px solid #ccc;'/>\n"
+            miniaturas = obtener_miniaturas()
+            for imgfile in self.imagenes_preview:
+                # Miniatura en caché; si aún no existe se genera y se repinta al llegar
+                miniatura = miniaturas.ruta_en_disco(imgfile, TAM_MINIATURA)
+                if miniatura:
+                    html += f"<img src='file:///{os.path.abspath(miniatura)}' style='max-width:120px;max-height:120px;margin:6px;border-radius:8px;border:1px solid #ccc;'/>\n"
             html += "</div>"
         # Nota de compra global
         nota_compra = cargar_nota_compra_global()
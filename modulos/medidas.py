@@ -1,36 +1,41 @@
 import os
-import json
 from PyQt6.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QLabel, QPushButton, QComboBox,
     QFormLayout, QDoubleSpinBox, QMessageBox, QGroupBox
 )
 from PyQt6.QtGui import QPixmap
 from PyQt6.QtCore import Qt
+from utils.catalogo import obtener_catalogo
+from utils.miniaturas import obtener_miniaturas
+from utils.persistencia import obtener_documento
 
 DATA_DIR = "datos"
-PRODUCTOS_FILE = os.path.join(DATA_DIR, "productos.json")
 MEDIDAS_FILE = os.path.join(DATA_DIR, "medidas.json")
 IMAGES_ROOT = os.path.abspath("imagenes_productos")
+# Lado de la miniatura del producto seleccionado
+TAM_MINIATURA = 120
 
 def ensure_data_dir():
     if not os.path.exists(DATA_DIR):
         os.makedirs(DATA_DIR)
 
 def cargar_productos():
-    if os.path.exists(PRODUCTOS_FILE):
-        with open(PRODUCTOS_FILE, "r", encoding="utf-8") as f:
-            return json.load(f)
-    return []
+    return obtener_catalogo().productos()
+
+MEDIDAS_DEFECTO = {"categorias": {}, "tipos": {}, "productos": {}}
+
+def documento_medidas():
+    return obtener_documento(MEDIDAS_FILE, MEDIDAS_DEFECTO)
 
 def cargar_medidas():
-    if os.path.exists(MEDIDAS_FILE):
-        with open(MEDIDAS_FILE, "r", encoding="utf-8") as f:
-            return json.load(f)
-    return {"categorias": {}, "tipos": {}, "productos": {}}
+    return documento_medidas().cargar()
 
 def guardar_medidas(medidas):
-    with open(MEDIDAS_FILE, "w", encoding="utf-8") as f:
-        json.dump(medidas, f, ensure_ascii=False, indent=2)
+    documento_medidas().guardar(medidas)
+
+def guardar_medidas_en(medidas, ruta, valores):
+    """Guarda las medidas de un solo producto/tipo/categoría vía journal."""
+    documento_medidas().set(medidas, ruta, valores)
 
 def obtener_imagen_principal(sku):
     carpeta = os.path.join(IMAGES_ROOT, sku)
@@ -52,8 +57,19 @@ class MedidasWindow(QWidget):
         ensure_data_dir()
         self.productos = cargar_productos()
         self.medidas = cargar_medidas()
+        self.imagen_ruta = ""
         self.init_ui()
         self.cargar_productos()
+        obtener_catalogo().productos_cambiados.connect(self.al_cambiar_catalogo)
+        obtener_miniaturas().miniatura_lista.connect(self.al_recibir_miniatura)
+
+    def al_recibir_miniatura(self, ruta, tam, img):
+        if tam == TAM_MINIATURA and ruta == self.imagen_ruta:
+            self.imagen_label.setPixmap(QPixmap.fromImage(img))
+
+    def al_cambiar_catalogo(self):
+        self.productos = cargar_productos()
+        self.cargar_productos()
 
     def init_ui(self):
         layout = QVBoxLayout(self)
@@ -68,7 +84,7 @@ class MedidasWindow(QWidget):
 
         # Imagen principal
         self.imagen_label = QLabel()
-        self.imagen_label.setFixedHeight(120)
+        self.imagen_label.setFixedHeight(TAM_MINIATURA)
         self.imagen_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
         layout.addWidget(self.imagen_label)
 
@@ -124,6 +140,7 @@ class MedidasWindow(QWidget):
         layout.addLayout(btns_refresh)
 
     def refrescar_todo(self):
+        obtener_catalogo().refrescar()
         self.productos = cargar_productos()
         self.medidas = cargar_medidas()
         self.cargar_productos()
@@ -151,6 +168,7 @@ class MedidasWindow(QWidget):
 
     def mostrar_producto(self, idx):
         if idx < 0 or idx >= len(self.productos):
+            self.imagen_ruta = ""
             self.imagen_label.clear()
             self.info_label.setText("")
             self.fuente_label.setText("")
@@ -167,10 +185,12 @@ class MedidasWindow(QWidget):
 
         # Imagen principal
         img_path = obtener_imagen_principal(sku)
-        if img_path and os.path.exists(img_path):
-            pixmap = QPixmap(img_path).scaled(120, 120, Qt.AspectRatioMode.KeepAspectRatio, Qt.TransformationMode.SmoothTransformation)
-            self.imagen_label.setPixmap(pixmap)
+        self.imagen_ruta = img_path
+        img = obtener_miniaturas().solicitar(img_path, TAM_MINIATURA) if img_path else None
+        if img is not None:
+            self.imagen_label.setPixmap(QPixmap.fromImage(img))
         else:
+            # Sin imagen o aún generándose (llega por al_recibir_miniatura)
             self.imagen_label.clear()
 
         # Buscar medidas según prioridad: producto > tipo > categoría
@@ -202,19 +222,21 @@ class MedidasWindow(QWidget):
             self.peso_spin.setValue(0)
             self.fuente_label.setText("Sin medidas asignadas todavía.")
 
+    def valores_formulario(self):
+        return {
+            "ancho": self.ancho_spin.value(),
+            "alto": self.alto_spin.value(),
+            "largo": self.largo_spin.value(),
+            "peso": self.peso_spin.value()
+        }
+
     def guardar_medidas_producto(self):
         idx = self.producto_combo.currentIndex()
         if idx < 0 or idx >= len(self.productos):
             return
         prod = self.productos[idx]
         sku = prod.get("sku", "")
-        self.medidas.setdefault("productos", {})[sku] = {
-            "ancho": self.ancho_spin.value(),
-            "alto": self.alto_spin.value(),
-            "largo": self.largo_spin.value(),
-            "peso": self.peso_spin.value()
-        }
-        guardar_medidas(self.medidas)
+        guardar_medidas_en(self.medidas, ["productos", sku], self.valores_formulario())
         QMessageBox.information(self, "Guardado", "Medidas guardadas SOLO para este producto.")
         self.mostrar_producto(idx)
 
@@ -224,13 +246,7 @@ class MedidasWindow(QWidget):
             return
         prod = self.productos[idx]
         tipo = prod.get("nombre", "")  # O el campo que uses como tipo
-        self.medidas.setdefault("tipos", {})[tipo] = {
-            "ancho": self.ancho_spin.value(),
-            "alto": self.alto_spin.value(),
-            "largo": self.largo_spin.value(),
-            "peso": self.peso_spin.value()
-        }
-        guardar_medidas(self.medidas)
+        guardar_medidas_en(self.medidas, ["tipos", tipo], self.valores_formulario())
         QMessageBox.information(self, "Guardado", f"Medidas guardadas para el tipo '{tipo}'.")
         self.mostrar_producto(idx)
 
@@ -240,12 +256,6 @@ class MedidasWindow(QWidget):
             return
         prod = self.productos[idx]
         cat = prod.get("categoria", "")
-        self.medidas.setdefault("categorias", {})[cat] = {
-            "ancho": self.ancho_spin.value(),
-            "alto": self.alto_spin.value(),
-            "largo": self.largo_spin.value(),
-            "peso": self.peso_spin.value()
-        }
-        guardar_medidas(self.medidas)
+        guardar_medidas_en(self.medidas, ["categorias", cat], self.valores_formulario())
         QMessageBox.information(self, "Guardado", f"Medidas guardadas para la categoría '{cat}'.")
         self.mostrar_producto(idx)
\ No newline at end of file
@@ -3,150 +3,179 @@ import os
 from PyQt6.QtWidgets import (QApplication, QMainWindow, QVBoxLayout, QHBoxLayout, 
                             QPushButton, QLabel, QFileDialog, QWidget, QMessageBox,
                             QScrollArea, QSpinBox, QGroupBox, QSlider, QCheckBox,
-                            QProgressBar, QListWidget, QSplitter, QTabWidget)
-from PyQt6.QtGui import QPixmap, QImage, QPainter, QPen, QColor, QBrush
+                            QProgressBar, QListWidget, QListWidgetItem, QSplitter, QTabWidget,
+                            QComboBox, QFormLayout, QInputDialog)
+from PyQt6.QtGui import QPixmap, QImage, QPainter, QPen, QColor, QBrush, QIcon
 from PyQt6.QtCore import Qt, QSize, QRect, QPoint, pyqtSignal, QThread
-from PIL import Image, ImageQt, ImageEnhance, ImageFilter, ImageOps
-import cairosvg
-import io
-import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from utils import render_mockup, plantillas_mockup
+from utils.catalogo import obtener_catalogo
+from utils.optimizador import ruta_imagenes_raiz
+from utils.pipeline_mockups import ejecutar_pipeline
+
+# Mockups compuestos esperando a ser codificados (limita la memoria en uso)
+MAX_PENDIENTES_CODIFICAR = 3
+# Imágenes de producto: mismo tamaño por defecto que el optimizador de imágenes
+IMAGEN_PRODUCTO = {"ancho": 900, "alto": 900, "formato": "webp", "mantener_original": False}
 
 class ImageProcessor(QThread):
     """Clase para procesar imágenes en segundo plano"""
     progress_updated = pyqtSignal(int)
-    processing_complete = pyqtSignal(list)
+    design_completed = pyqtSignal(int, str)  # índice del diseño, ruta del mockup
+    result_ready = pyqtSignal(int, str, QImage)  # índice, ruta, miniatura
+    processing_complete = pyqtSignal(list)  # rutas de los mockups, en el orden de los diseños
     
-    def __init__(self, base_image, design_files, target_area, apply_effects, output_folder):
+    def __init__(self, base_image, design_files, target_area, apply_effects, output_folder,
+                 parallel=False, output_options=None, placements=None):
         super().__init__()
         self.base_image = base_image
         self.design_files = design_files
         self.target_area = target_area  # (x, y, width, height)
         self.apply_effects = apply_effects
         self.output_folder = output_folder
+        self.parallel = parallel
+        # {"formato": "png"|"jpg"|"webp", "calidad": 1-100, "compresion": 0-9}
+        self.output_options = {**render_mockup.SALIDA_DEFECTO, **(output_options or {})}
+        # Colocaciones de una plantilla ({"nombre", "area", "efectos"}); sin
+        # plantilla, una sola con el área seleccionada y sin sufijo en el nombre
+        self.placements = placements or [
+            {"nombre": "", "area": tuple(target_area), "efectos": apply_effects}
+        ]
+        self.total_outputs = len(design_files) * len(self.placements)
         
     def run(self):
+        os.makedirs(self.output_folder, exist_ok=True)
+        if self.parallel and len(self.design_files) > 1:
+            results = self.run_parallel()
+        else:
+            results = self.run_serial()
+        self.processing_complete.emit(results)
+    
+    def emit_progress(self, done, index, output_filename, thumbnail=None):
+        if output_filename:
+            if thumbnail is not None:
+                mode, (width, height), data = thumbnail
+                image = QImage(data, width, height, width * 4, QImage.Format.Format_RGBA8888).copy()
+                self.result_ready.emit(index, output_filename, image)
+            self.design_completed.emit(index, output_filename)
+        self.progress_updated.emit(int(done / max(self.total_outputs, 1) * 100))
+    
+    def run_serial(self):
+        """
+        Compone en este hilo y codifica en otro: PIL libera el GIL al
+        codificar, así que el mockup N+1 se compone mientras se guarda el N.
+        Solo se conservan rutas y miniaturas, no los mockups completos.
+        """
         results = []
-        
-        for i, design_path in enumerate(self.design_files):
+        pending = deque()
+        done = 0
+        # Base en RGBA y recorte del área, una sola vez para todo el lote
+        base = render_mockup.preparar_base(self.base_image)
+        formato = self.output_options["formato"]
+        
+        def finish_oldest():
+            nonlocal done
+            i, output_filename, thumbnail, future = pending.popleft()
             try:
-                # Cargar el diseño
-                design_image = self.load_image_file(design_path)
-                if design_image is None:
-                    continue
-                
-                # Asegurarse que tiene transparencia
-                if design_image.mode != 'RGBA':
-                    design_image = design_image.convert('RGBA')
-                
-                # Redimensionar el diseño para ajustarse al área objetivo
-                design_image = self.resize_to_fit(design_image, 
-                                                self.target_area[2], 
-                                                self.target_area[3])
-                
-                # Crear una copia de la imagen base
-                result = self.base_image.copy()
-                if result.mode != 'RGBA':
-                    result = result.convert('RGBA')
-                
-                # Posicionar el diseño en el área objetivo
-                if self.apply_effects:
-                    result = self.apply_realistic_effects(result, design_image, 
-                                                        self.target_area[0], 
-                                                        self.target_area[1])
-                else:
-                    # Pegar el diseño normalmente
-                    result.paste(design_image, 
-                              (self.target_area[0], self.target_area[1]), 
-                              design_image)
-                
-                # Guardar resultado
-                output_filename = os.path.join(
-                    self.output_folder, 
-                    f"mockup_{os.path.splitext(os.path.basename(design_path))[0]}.png"
-                )
-                result.save(output_filename, format='PNG')
-                
-                results.append((output_filename, result))
+                future.result()
+                results.append(output_filename)
             except Exception as e:
-                print(f"Error procesando {design_path}: {e}")
-            
-            # Actualizar progreso
-            progress = int((i + 1) / len(self.design_files) * 100)
-            self.progress_updated.emit(progress)
-        
-        self.processing_complete.emit(results)
+                print(f"Error guardando {output_filename}: {e}")
+                output_filename = None
+            done += 1
+            self.emit_progress(done, i, output_filename, thumbnail)
+        
+        with ThreadPoolExecutor(max_workers=1) as encoder:
+            for i, design_path in enumerate(self.design_files):
+                started = done + len(pending)
+                try:
+                    # El diseño se decodifica una vez para todas las colocaciones
+                    for placement, result in render_mockup.componer_colocaciones(
+                            base, design_path, self.placements):
+                        output_filename = render_mockup.nombre_salida(
+                            design_path, self.output_folder, formato, placement["nombre"])
+                        future = encoder.submit(render_mockup.guardar_mockup, result, output_filename,
+                                                self.output_options)
+                        pending.append((i, output_filename, render_mockup.miniatura_mockup(result), future))
+                        del result
+                        while len(pending) > MAX_PENDIENTES_CODIFICAR:
+                            finish_oldest()
+                except Exception as e:
+                    print(f"Error procesando {design_path}: {e}")
+                    # Las colocaciones que no llegaron a componerse cuentan como hechas
+                    missing = started + len(self.placements) - (done + len(pending))
+                    done += missing
+                    self.emit_progress(done, i, None)
+            while pending:
+                finish_oldest()
+        return results
+    
+    def run_parallel(self):
+        """Reparte los diseños en un pool de procesos y conserva el orden de la lista."""
+        outputs = [[] for _ in self.design_files]
+        done = 0
+        with render_mockup.crear_pool_render(self.base_image) as pool:
+            futures = {
+                render_mockup.enviar_diseno(pool, path, self.placements,
+                                            self.output_folder, self.output_options): i
+                for i, path in enumerate(self.design_files)
+            }
+            for future in as_completed(futures):
+                i = futures[future]
+                try:
+                    rendered = future.result()
+                except Exception as e:
+                    print(f"Error procesando {self.design_files[i]}: {e}")
+                    done += len(self.placements)
+                    self.emit_progress(done, i, None)
+                    continue
+                for output_filename, thumbnail in rendered:
+                    outputs[i].append(output_filename)
+                    done += 1
+                    self.emit_progress(done, i, output_filename, thumbnail)
+        # Las imágenes se quedan en disco; de los procesos solo vuelven rutas y miniaturas
+        return [output for design_outputs in outputs for output in design_outputs]
     
     def load_image_file(self, file_path):
         """Cargar una imagen desde varias extensiones posibles"""
         try:
-            ext = os.path.splitext(file_path)[1].lower()
-            
-            # Manejar SVG
-            if ext == '.svg':
-                png_data = cairosvg.svg2png(url=file_path)
-                return Image.open(io.BytesIO(png_data))
-            # Manejar formatos comunes
-            else:
-                return Image.open(file_path)
+            return render_mockup.cargar_diseno(file_path)
         except Exception as e:
             print(f"Error cargando imagen {file_path}: {e}")
             return None
     
     def resize_to_fit(self, image, target_width, target_height):
         """Redimensionar una imagen manteniendo proporción para ajustarse al área objetivo"""
-        # Obtener dimensiones originales
-        width, height = image.size
-        
-        # Calcular ratios de escalado
-        width_ratio = target_width / width
-        height_ratio = target_height / height
-        
-        # Usar el ratio más pequeño para asegurar que cabe en el área
-        ratio = min(width_ratio, height_ratio)
-        
-        # Calcular nuevas dimensiones
-        new_width = int(width * ratio)
-        new_height = int(height * ratio)
-        
-        # Redimensionar
-        return image.resize((new_width, new_height), Image.Resampling.LANCZOS)
+        return render_mockup.ajustar_a_area(image, target_width, target_height)
     
     def apply_realistic_effects(self, base, design, x, y):
         """Aplicar efectos realistas para integrar el diseño con la base"""
-        # Paso 1: Ajustar el contraste y brillo del diseño
-        enhancer = ImageEnhance.Contrast(design)
-        design = enhancer.enhance(0.95)  # Ligera reducción de contraste
-        
-        enhancer = ImageEnhance.Brightness(design)
-        design = enhancer.enhance(0.9)  # Ligera reducción de brillo
-        
-        # Paso 2: Extraer textura de la base para aplicarla al diseño
-        design_width, design_height = design.size
-        texture_area = base.crop((x, y, x + design_width, y + design_height))
-        
-        # Paso 3: Crear una máscara del diseño (para mantener su forma)
-        r, g, b, a = design.split()
-        
-        # Paso 4: Aplicar un ligero desenfoque para suavizar bordes
-        design = design.filter(ImageFilter.GaussianBlur(radius=0.5))
-        
-        # Paso 5: Mezclar la textura con el diseño
-        result = base.copy()
-        
-        # Crear una capa para la textura
-        texture_layer = Image.new('RGBA', base.size, (0, 0, 0, 0))
-        texture_layer.paste(design, (x, y), design)
-        
-        # Mezclar capas con blend mode
-        # Simular overlay blend mode
-        result = Image.alpha_composite(result, texture_layer)
-        
-        # Paso 6: Aplicar un ligero desenfoque para simular integración
-        blurred_area = result.crop((x, y, x + design_width, y + design_height))
-        blurred_area = blurred_area.filter(ImageFilter.GaussianBlur(radius=0.3))
-        result.paste(blurred_area, (x, y))
-        
-        return result
+        return render_mockup.aplicar_efectos_realistas(base, design, x, y)
+
+class ProductPipelineProcessor(QThread):
+    """Genera los mockups de los productos del catálogo y los deja optimizados en sus carpetas"""
+    progress_updated = pyqtSignal(int, int)  # hechos, total
+    pipeline_complete = pyqtSignal(dict)
+    
+    def __init__(self, base_image, design_files, placements, image_options, images_root, products):
+        super().__init__()
+        self.base_image = base_image
+        self.design_files = design_files
+        self.placements = placements
+        self.image_options = image_options
+        self.images_root = images_root
+        self.products = products
+    
+    def run(self):
+        summary = ejecutar_pipeline(
+            self.base_image, self.design_files, self.products, self.placements,
+            self.images_root, self.image_options,
+            progreso=self.progress_updated.emit,
+            cancelado=self.isInterruptionRequested
+        )
+        self.pipeline_complete.emit(summary)
+
 
 class MockupGenerator:
     def __init__(self):
@@ -157,6 +186,7 @@ class MockupGenerator:
         
     def load_base_image(self, path):
         """Cargar la imagen base desde una ruta"""
+        from PIL import Image
         try:
             self.base_image = Image.open(path)
             return True
@@ -171,20 +201,8 @@ class MockupGenerator:
         
         for path in paths:
             try:
-                # Según la extensión, cargar de forma diferente
-                ext = os.path.splitext(path)[1].lower()
-                
-                if ext == '.svg':
-                    # Convertir SVG a PNG usando cairosvg
-                    png_data = cairosvg.svg2png(url=path)
-                    img = Image.open(io.BytesIO(png_data))
-                else:
-                    # Cargar formatos normales con PIL
-                    img = Image.open(path)
-                
-                # Asegurar que la imagen tenga canal alpha (transparencia)
-                if img.mode != 'RGBA':
-                    img = img.convert('RGBA')
+                # SVG a tamaño intrínseco aquí; al generar se rasteriza al tamaño del área
+                img = render_mockup.cargar_diseno(path)
                 
                 self.design_images.append((path, img))
                 successful_loads += 1
@@ -197,46 +215,35 @@ class MockupGenerator:
         """Establecer el área donde se colocarán los diseños"""
         self.target_area = (x, y, width, height)
     
-    def generate_mockups(self, apply_effects=False, output_folder="./mockups"):
+    def generate_mockups(self, apply_effects=False, output_folder="./mockups", output_options=None):
         """Generar múltiples mockups con los diseños cargados"""
         if self.base_image is None or not self.design_images:
             return False, "No hay imagen base o diseños cargados"
         
+        from PIL import Image
         self.result_images = []
+        output_options = {**render_mockup.SALIDA_DEFECTO, **(output_options or {})}
         
         try:
             # Crear carpeta de salida si no existe
             os.makedirs(output_folder, exist_ok=True)
             
+            base = render_mockup.preparar_base(self.base_image)
             for path, design in self.design_images:
-                # Redimensionar el diseño para ajustarse al área objetivo
-                design_resized = self.resize_to_fit(design, 
-                                                   self.target_area[2], 
-                                                   self.target_area[3])
-                
-                # Crear copia de la imagen base
-                result = self.base_image.copy()
-                if result.mode != 'RGBA':
-                    result = result.convert('RGBA')
+                if path.lower().endswith('.svg'):
+                    # Rasterizar directamente al tamaño del área (con caché)
+                    design = render_mockup.cargar_diseno(path, self.target_area[2:])
                 
-                # Aplicar efectos si se solicita
-                if apply_effects:
-                    result = self.apply_realistic_effects(result, design_resized, 
-                                                        self.target_area[0], 
-                                                        self.target_area[1])
-                else:
-                    # Pegar el diseño en la posición correspondiente
-                    result.paste(design_resized, 
-                              (self.target_area[0], self.target_area[1]), 
-                              design_resized)
+                # Ajustar al área y pegar (con o sin efectos)
+                result = render_mockup.componer(base, design, self.target_area, apply_effects)
                 
-                # Guardar el resultado
-                output_path = os.path.join(output_folder, 
-                                         f"mockup_{os.path.splitext(os.path.basename(path))[0]}.png")
-                result.save(output_path)
+                # Guardar el resultado en el formato elegido
+                output_path = render_mockup.nombre_salida(path, output_folder, output_options["formato"])
+                render_mockup.guardar_mockup(result, output_path, output_options)
                 
-                # Almacenar el resultado
-                self.result_images.append((output_path, result))
+                # Almacenar solo la ruta y una miniatura, no el mockup completo
+                self.result_images.append((output_path, Image.frombytes(*render_mockup.miniatura_mockup(result))))
+                del result
             
             return True, self.result_images
         except Exception as e:
@@ -245,59 +252,11 @@ class MockupGenerator:
     
     def resize_to_fit(self, image, target_width, target_height):
         """Redimensionar una imagen manteniendo proporción para ajustarse al área objetivo"""
-        # Obtener dimensiones originales
-        width, height = image.size
-        
-        # Calcular ratios de escalado
-        width_ratio = target_width / width
-        height_ratio = target_height / height
-        
-        # Usar el ratio más pequeño para asegurar que cabe en el área
-        ratio = min(width_ratio, height_ratio)
-        
-        # Calcular nuevas dimensiones
-        new_width = int(width * ratio)
-        new_height = int(height * ratio)
-        
-        # Redimensionar
-        return image.resize((new_width, new_height), Image.Resampling.LANCZOS)
+        return render_mockup.ajustar_a_area(image, target_width, target_height)
     
     def apply_realistic_effects(self, base, design, x, y):
         """Aplicar efectos realistas para integrar el diseño con la base"""
-        # Paso 1: Ajustar el contraste y brillo del diseño
-        enhancer = ImageEnhance.Contrast(design)
-        design = enhancer.enhance(0.95)  # Ligera reducción de contraste
-        
-        enhancer = ImageEnhance.Brightness(design)
-        design = enhancer.enhance(0.9)  # Ligera reducción de brillo
-        
-        # Paso 2: Extraer textura de la base para aplicarla al diseño
-        design_width, design_height = design.size
-        texture_area = base.crop((x, y, x + design_width, y + design_height))
-        
-        # Paso 3: Crear una máscara del diseño (para mantener su forma)
-        r, g, b, a = design.split()
-        
-        # Paso 4: Aplicar un ligero desenfoque para suavizar bordes
-        design = design.filter(ImageFilter.GaussianBlur(radius=0.5))
-        
-        # Paso 5: Mezclar la textura con el diseño
-        result = base.copy()
-        
-        # Crear una capa para la textura
-        texture_layer = Image.new('RGBA', base.size, (0, 0, 0, 0))
-        texture_layer.paste(design, (x, y), design)
-        
-        # Mezclar capas con blend mode
-        # Simular overlay blend mode
-        result = Image.alpha_composite(result, texture_layer)
-        
-        # Paso 6: Aplicar un ligero desenfoque para simular integración
-        blurred_area = result.crop((x, y, x + design_width, y + design_height))
-        blurred_area = blurred_area.filter(ImageFilter.GaussianBlur(radius=0.3))
-        result.paste(blurred_area, (x, y))
-        
-        return result
+        return render_mockup.aplicar_efectos_realistas(base, design, x, y)
 
 class AreaSelector(QWidget):
     """Widget para seleccionar un área en una imagen"""
@@ -310,6 +269,12 @@ class AreaSelector(QWidget):
         self.selecting = False
         self.selected_area = QRect()
         self.image = None
+        self.saved_areas = []  # [(nombre, QRect)] de la plantilla activa
+        
+    def set_saved_areas(self, areas):
+        """Mostrar las áreas guardadas de la plantilla"""
+        self.saved_areas = areas
+        self.update()
         
     def set_image(self, pixmap):
         """Establecer la imagen sobre la que seleccionar"""
@@ -326,6 +291,13 @@ class AreaSelector(QWidget):
         # Dibujar la imagen
         painter.drawPixmap(0, 0, self.image)
         
+        # Dibujar las áreas de la plantilla con su nombre
+        for name, rect in self.saved_areas:
+            painter.setPen(QPen(QColor(33, 150, 243), 2))
+            painter.setBrush(QBrush(QColor(33, 150, 243, 40)))
+            painter.drawRect(rect)
+            painter.drawText(rect.topLeft() + QPoint(4, 14), name)
+        
         # Dibujar el área seleccionada si existe
         if not self.selected_area.isNull():
             # Dibuja un rectángulo semitransparente
@@ -372,6 +344,8 @@ class MockupGeneratorWindow(QMainWindow):
         self.design_paths = []
         self.selected_area = QRect()
         self.output_folder = os.path.join(os.path.expanduser("~"), "Mockups")
+        self.plantillas = plantillas_mockup.cargar_plantillas()
+        self.placement_areas = []  # áreas de la plantilla en edición
         
         self.init_ui()
         
@@ -436,6 +410,31 @@ class MockupGeneratorWindow(QMainWindow):
         self.chk_realistic.setChecked(True)
         options_layout.addWidget(self.chk_realistic)
         
+        # Checkbox para repartir los diseños entre todos los núcleos
+        self.chk_parallel = QCheckBox("Usar todos los núcleos")
+        self.chk_parallel.setChecked(True)
+        options_layout.addWidget(self.chk_parallel)
+        
+        # Formato de salida de los mockups
+        output_form = QFormLayout()
+        self.output_format_combo = QComboBox()
+        self.output_format_combo.addItem("PNG", "png")
+        self.output_format_combo.addItem("JPG", "jpg")
+        self.output_format_combo.addItem("WEBP", "webp")
+        self.output_format_combo.currentIndexChanged.connect(self.update_output_options)
+        output_form.addRow("Formato salida:", self.output_format_combo)
+        self.quality_spin = QSpinBox()
+        self.quality_spin.setRange(10, 100)
+        self.quality_spin.setValue(render_mockup.SALIDA_DEFECTO["calidad"])
+        output_form.addRow("Calidad JPG/WEBP:", self.quality_spin)
+        self.compression_spin = QSpinBox()
+        self.compression_spin.setRange(0, 9)
+        self.compression_spin.setValue(render_mockup.SALIDA_DEFECTO["compresion"])
+        self.compression_spin.setToolTip("0-1: rápido y pesado; 9: lento y ligero")
+        output_form.addRow("Compresión PNG:", self.compression_spin)
+        options_layout.addLayout(output_form)
+        self.update_output_options()
+        
         # Botón para seleccionar carpeta de salida
         self.btn_output_folder = QPushButton("Seleccionar Carpeta de Salida")
         self.btn_output_folder.clicked.connect(self.select_output_folder)
@@ -447,6 +446,41 @@ class MockupGeneratorWindow(QMainWindow):
         options_group.setLayout(options_layout)
         left_layout.addWidget(options_group)
         
+        # Grupo de plantillas: base + varias áreas con nombre (frente, espalda...)
+        template_group = QGroupBox("Plantilla")
+        template_layout = QVBoxLayout()
+        
+        self.template_combo = QComboBox()
+        self.template_combo.activated.connect(self.load_template)
+        template_layout.addWidget(self.template_combo)
+        
+        self.placement_list = QListWidget()
+        self.placement_list.setMaximumHeight(90)
+        template_layout.addWidget(self.placement_list)
+        
+        placement_buttons = QHBoxLayout()
+        self.btn_add_placement = QPushButton("Añadir área")
+        self.btn_add_placement.setToolTip("Guarda el área seleccionada con un nombre y los efectos actuales")
+        self.btn_add_placement.clicked.connect(self.add_placement)
+        placement_buttons.addWidget(self.btn_add_placement)
+        self.btn_remove_placement = QPushButton("Quitar área")
+        self.btn_remove_placement.clicked.connect(self.remove_placement)
+        placement_buttons.addWidget(self.btn_remove_placement)
+        template_layout.addLayout(placement_buttons)
+        
+        template_buttons = QHBoxLayout()
+        self.btn_save_template = QPushButton("Guardar plantilla")
+        self.btn_save_template.clicked.connect(self.save_template)
+        template_buttons.addWidget(self.btn_save_template)
+        self.btn_delete_template = QPushButton("Eliminar plantilla")
+        self.btn_delete_template.clicked.connect(self.delete_template)
+        template_buttons.addWidget(self.btn_delete_template)
+        template_layout.addLayout(template_buttons)
+        
+        template_group.setLayout(template_layout)
+        left_layout.addWidget(template_group)
+        self.refresh_template_combo()
+        
         # Botones de acción
         actions_group = QGroupBox("Acciones")
         actions_layout = QVBoxLayout()
@@ -456,6 +490,15 @@ class MockupGeneratorWindow(QMainWindow):
         self.btn_process.setEnabled(False)
         actions_layout.addWidget(self.btn_process)
         
+        self.btn_products = QPushButton("Generar imágenes de productos")
+        self.btn_products.setToolTip(
+            "Asocia cada diseño a los productos con el mismo 'diseno' y guarda los "
+            "mockups optimizados en la carpeta de cada SKU"
+        )
+        self.btn_products.clicked.connect(self.generate_product_images)
+        self.btn_products.setEnabled(False)
+        actions_layout.addWidget(self.btn_products)
+        
         self.progress_bar = QProgressBar()
         self.progress_bar.setVisible(False)
         actions_layout.addWidget(self.progress_bar)
@@ -501,6 +544,7 @@ class MockupGeneratorWindow(QMainWindow):
         results_layout.addWidget(self.results_label)
         
         self.results_list = QListWidget()
+        self.results_list.setIconSize(QSize(96, 96))
         self.results_list.itemDoubleClicked.connect(self.open_result)
         results_layout.addWidget(self.results_list)
         
@@ -531,27 +575,32 @@ class MockupGeneratorWindow(QMainWindow):
             "Imágenes (*.png *.jpg *.jpeg *.bmp)"
         )
         
-        if file_path:
-            if self.mockup_generator.load_base_image(file_path):
-                self.base_image_path = file_path
-                self.base_label.setText(f"Base: {os.path.basename(file_path)}")
-                
-                # Mostrar la imagen en el selector de área
-                pixmap = QPixmap(file_path)
-                if not pixmap.isNull():
-                    # Mostrar miniatura en el label
-                    scaled_pixmap = pixmap.scaled(200, 200, Qt.AspectRatioMode.KeepAspectRatio)
-                    self.base_label.setPixmap(scaled_pixmap)
-                    
-                    # Mostrar imagen completa en el selector de área
-                    self.area_selector.set_image(pixmap)
-                    self.area_selector.setMinimumSize(pixmap.size())
-                
-                # Resetear área seleccionada
-                self.selected_area = QRect()
-                self.area_info.setText("Área seleccionada: Ninguna")
-            else:
-                QMessageBox.critical(self, "Error", "No se pudo cargar la imagen base.")
+        if file_path and not self.set_base_image(file_path):
+            QMessageBox.critical(self, "Error", "No se pudo cargar la imagen base.")
+    
+    def set_base_image(self, file_path):
+        """Cargar la imagen base en el generador y en el selector de área"""
+        if not self.mockup_generator.load_base_image(file_path):
+            return False
+        self.base_image_path = file_path
+        self.base_label.setText(f"Base: {os.path.basename(file_path)}")
+        
+        # Mostrar la imagen en el selector de área
+        pixmap = QPixmap(file_path)
+        if not pixmap.isNull():
+            # Mostrar miniatura en el label
+            scaled_pixmap = pixmap.scaled(200, 200, Qt.AspectRatioMode.KeepAspectRatio)
+            self.base_label.setPixmap(scaled_pixmap)
+            
+            # Mostrar imagen completa en el selector de área
+            self.area_selector.set_image(pixmap)
+            self.area_selector.setMinimumSize(pixmap.size())
+        
+        # Resetear área seleccionada
+        self.selected_area = QRect()
+        self.area_info.setText("Área seleccionada: Ninguna")
+        self.update_process_button()
+        return True
     
     def load_design_image(self):
         """Abrir diálogo para seleccionar imagen de diseño individual"""
@@ -571,12 +620,7 @@ class MockupGeneratorWindow(QMainWindow):
         
         if folder_path:
             # Obtener todos los archivos de imagen en la carpeta
-            design_files = []
-            for root, _, files in os.walk(folder_path):
-                for file in files:
-                    ext = os.path.splitext(file)[1].lower()
-                    if ext in ['.png', '.jpg', '.jpeg', '.svg']:
-                        design_files.append(os.path.join(root, file))
+            design_files = render_mockup.listar_disenos(folder_path)
             
             if design_files:
                 self.add_designs_to_list(design_files)
@@ -599,9 +643,16 @@ class MockupGeneratorWindow(QMainWindow):
         self.design_list_label.setText(f"Diseños Cargados: {len(self.design_paths)}")
         
         # Activar botón de proceso si hay diseños y área seleccionada
-        self.btn_process.setEnabled(
-            len(self.design_paths) > 0 and not self.selected_area.isNull()
+        self.update_process_button()
+    
+    def update_process_button(self):
+        """Procesar requiere diseños y un área seleccionada o áreas de plantilla"""
+        ready = (
+            len(self.design_paths) > 0
+            and (not self.selected_area.isNull() or bool(self.placement_areas))
         )
+        self.btn_process.setEnabled(ready)
+        self.btn_products.setEnabled(ready)
     
     def update_selected_area(self, rect):
         """Actualizar información del área seleccionada"""
@@ -612,7 +663,100 @@ class MockupGeneratorWindow(QMainWindow):
         )
         
         # Activar botón de proceso si hay diseños
-        self.btn_process.setEnabled(len(self.design_paths) > 0)
+        self.update_process_button()
+    
+    # --- Plantillas ---
+    
+    def refresh_template_combo(self, current=""):
+        self.template_combo.clear()
+        self.template_combo.addItem("— Sin plantilla —", "")
+        for name in sorted(self.plantillas):
+            self.template_combo.addItem(name, name)
+        index = self.template_combo.findData(current)
+        self.template_combo.setCurrentIndex(max(index, 0))
+    
+    def refresh_placements(self):
+        """Sincronizar la lista de áreas y su dibujo sobre la base"""
+        self.placement_list.clear()
+        saved = []
+        for area in self.placement_areas:
+            effects = "con efectos" if area.get("efectos", True) else "sin efectos"
+            self.placement_list.addItem(
+                f"{area['nombre']}: {area['x']},{area['y']} {area['ancho']}x{area['alto']} ({effects})")
+            saved.append((area["nombre"], QRect(area["x"], area["y"], area["ancho"], area["alto"])))
+        self.area_selector.set_saved_areas(saved)
+        self.update_process_button()
+    
+    def load_template(self, index):
+        """Cargar la base y las áreas de la plantilla elegida"""
+        name = self.template_combo.itemData(index)
+        if not name:
+            self.placement_areas = []
+            self.refresh_placements()
+            return
+        template = self.plantillas.get(name, {})
+        base = template.get("base", "")
+        if base and base != self.base_image_path:
+            if not os.path.exists(base) or not self.set_base_image(base):
+                QMessageBox.warning(self, "Aviso", f"No se pudo cargar la imagen base de la plantilla:\n{base}")
+        self.placement_areas = [dict(area) for area in template.get("areas", [])]
+        self.refresh_placements()
+    
+    def add_placement(self):
+        """Guardar el área seleccionada como colocación con nombre"""
+        if self.selected_area.isNull():
+            QMessageBox.warning(self, "Advertencia", "Primero selecciona un área sobre la imagen base.")
+            return
+        name, ok = QInputDialog.getText(self, "Nueva área", "Nombre del área (p. ej. frente, espalda, manga):")
+        name = name.strip()
+        if not ok or not name:
+            return
+        rect = self.selected_area
+        self.placement_areas = [a for a in self.placement_areas if a["nombre"] != name]
+        self.placement_areas.append(plantillas_mockup.area_plantilla(
+            name, rect.x(), rect.y(), rect.width(), rect.height(), self.chk_realistic.isChecked()))
+        self.refresh_placements()
+    
+    def remove_placement(self):
+        row = self.placement_list.currentRow()
+        if 0 <= row < len(self.placement_areas):
+            del self.placement_areas[row]
+            self.refresh_placements()
+    
+    def save_template(self):
+        """Guardar la base actual y sus áreas en datos/plantillas_mockup.json"""
+        if not self.base_image_path or not self.placement_areas:
+            QMessageBox.warning(self, "Advertencia", "Carga una imagen base y añade al menos un área.")
+            return
+        name, ok = QInputDialog.getText(self, "Guardar plantilla", "Nombre de la plantilla:",
+                                        text=self.template_combo.currentData() or "")
+        name = name.strip()
+        if not ok or not name:
+            return
+        plantillas_mockup.guardar_plantilla(self.plantillas, name, self.base_image_path, self.placement_areas)
+        self.refresh_template_combo(name)
+    
+    def delete_template(self):
+        name = self.template_combo.currentData()
+        if not name:
+            return
+        resp = QMessageBox.question(self, "Eliminar plantilla", f"¿Eliminar la plantilla '{name}'?")
+        if resp == QMessageBox.StandardButton.Yes:
+            plantillas_mockup.eliminar_plantilla(self.plantillas, name)
+            self.refresh_template_combo()
+    
+    def update_output_options(self):
+        """Habilitar solo las opciones que aplican al formato elegido"""
+        is_png = self.output_format_combo.currentData() == "png"
+        self.quality_spin.setEnabled(not is_png)
+        self.compression_spin.setEnabled(is_png)
+    
+    def output_options(self):
+        return {
+            "formato": self.output_format_combo.currentData(),
+            "calidad": self.quality_spin.value(),
+            "compresion": self.compression_spin.value(),
+        }
     
     def select_output_folder(self):
         """Seleccionar carpeta donde guardar los mockups generados"""
@@ -634,7 +778,7 @@ class MockupGeneratorWindow(QMainWindow):
             QMessageBox.warning(self, "Advertencia", "Debe cargar al menos un diseño.")
             return
             
-        if self.selected_area.isNull():
+        if self.selected_area.isNull() and not self.placement_areas:
             QMessageBox.warning(self, "Advertencia", "Debe seleccionar un área para los diseños.")
             return
         
@@ -650,9 +794,15 @@ class MockupGeneratorWindow(QMainWindow):
         self.results_list.clear()
         self.preview_label.clear()
         
+        # Con plantilla se renderizan todas sus áreas para cada diseño
+        placements = plantillas_mockup.colocaciones(self.placement_areas) or None
+        self.expected_outputs = len(self.design_paths) * (len(placements) if placements else 1)
+        
         # Mostrar barra de progreso
         self.progress_bar.setValue(0)
+        self.progress_bar.setFormat(f"0/{self.expected_outputs}")
         self.progress_bar.setVisible(True)
+        self.designs_done = 0
         
         # Iniciar el proceso en segundo plano
         self.processor = ImageProcessor(
@@ -660,11 +810,16 @@ class MockupGeneratorWindow(QMainWindow):
             self.design_paths,
             target_area,
             self.chk_realistic.isChecked(),
-            self.output_folder
+            self.output_folder,
+            parallel=self.chk_parallel.isChecked(),
+            output_options=self.output_options(),
+            placements=placements
         )
         
         # Conectar señales
         self.processor.progress_updated.connect(self.update_progress)
+        self.processor.design_completed.connect(self.design_completed)
+        self.processor.result_ready.connect(self.add_result_item)
         self.processor.processing_complete.connect(self.processing_finished)
         
         # Deshabilitar botones durante el procesamiento
@@ -676,10 +831,87 @@ class MockupGeneratorWindow(QMainWindow):
         # Iniciar el proceso
         self.processor.start()
     
+    def current_placements(self):
+        """Colocaciones de la plantilla o, sin plantilla, el área seleccionada"""
+        placements = plantillas_mockup.colocaciones(self.placement_areas)
+        if placements:
+            return placements
+        rect = self.selected_area
+        return [{"nombre": "", "area": (rect.x(), rect.y(), rect.width(), rect.height()),
+                 "efectos": self.chk_realistic.isChecked()}]
+    
+    def generate_product_images(self):
+        """Lote completo: diseños -> mockups -> imágenes optimizadas de cada SKU"""
+        if not self.base_image_path:
+            QMessageBox.warning(self, "Advertencia", "Debe cargar una imagen base.")
+            return
+        if self.selected_area.isNull() and not self.placement_areas:
+            QMessageBox.warning(self, "Advertencia", "Debe seleccionar un área para los diseños.")
+            return
+        
+        image_options = {**IMAGEN_PRODUCTO, "calidad": self.quality_spin.value()}
+        self.product_processor = ProductPipelineProcessor(
+            self.mockup_generator.base_image,
+            list(self.design_paths),
+            self.current_placements(),
+            image_options,
+            ruta_imagenes_raiz(),
+            obtener_catalogo().productos()
+        )
+        self.product_processor.progress_updated.connect(self.update_pipeline_progress)
+        self.product_processor.pipeline_complete.connect(self.product_images_finished)
+        
+        self.progress_bar.setValue(0)
+        self.progress_bar.setFormat("%p%")
+        self.progress_bar.setVisible(True)
+        self.set_processing(True)
+        self.product_processor.start()
+    
+    def update_pipeline_progress(self, done, total):
+        self.progress_bar.setValue(int(done / max(total, 1) * 100))
+    
+    def product_images_finished(self, summary):
+        self.set_processing(False)
+        self.progress_bar.setVisible(False)
+        lines = [f"Productos actualizados: {len(summary['skus'])}"]
+        if summary["sin_producto"]:
+            names = ", ".join(os.path.basename(p) for p in summary["sin_producto"][:10])
+            lines.append(f"Diseños sin producto ({len(summary['sin_producto'])}): {names}")
+        if summary["errores"]:
+            lines.append(f"Errores: {len(summary['errores'])}")
+            lines.extend(f"  {os.path.basename(r)}: {e}" for r, e in summary["errores"][:10])
+        QMessageBox.information(self, "Imágenes de productos", "\n".join(lines))
+    
+    def set_processing(self, busy):
+        """Deshabilitar las acciones mientras hay un proceso en segundo plano"""
+        self.btn_load_base.setEnabled(not busy)
+        self.btn_load_design.setEnabled(not busy)
+        self.btn_load_designs_folder.setEnabled(not busy)
+        if busy:
+            self.btn_process.setEnabled(False)
+            self.btn_products.setEnabled(False)
+        else:
+            self.update_process_button()
+    
     def update_progress(self, value):
         """Actualizar la barra de progreso"""
         self.progress_bar.setValue(value)
     
+    def design_completed(self, index, filepath):
+        """Contar cada mockup terminado (en modo paralelo llegan en cualquier orden)"""
+        self.designs_done += 1
+        self.progress_bar.setFormat(f"{self.designs_done}/{self.expected_outputs}")
+    
+    def add_result_item(self, index, filepath, thumbnail):
+        """Añadir un resultado en cuanto está listo, en la posición de su diseño"""
+        item = QListWidgetItem(QIcon(QPixmap.fromImage(thumbnail)), os.path.basename(filepath))
+        item.setData(Qt.ItemDataRole.UserRole, filepath)
+        item.setData(Qt.ItemDataRole.UserRole + 1, index)
+        row = self.results_list.count()
+        while row > 0 and self.results_list.item(row - 1).data(Qt.ItemDataRole.UserRole + 1) > index:
+            row -= 1
+        self.results_list.insertItem(row, item)
+    
     def processing_finished(self, results):
         """Gestionar la finalización del procesamiento"""
         # Habilitar botones
@@ -691,10 +923,6 @@ class MockupGeneratorWindow(QMainWindow):
         # Ocultar barra de progreso
         self.progress_bar.setVisible(False)
         
-        # Añadir resultados a la lista
-        for filepath, _ in results:
-            self.results_list.addItem(os.path.basename(filepath))
-        
          # Mostrar mensaje de éxito
         QMessageBox.information(
             self, "Proceso Completado", 
@@ -7,12 +7,21 @@ from PyQt6.QtWidgets import (
 )
 from PyQt6.QtGui import QPixmap
 from PyQt6.QtCore import Qt, QSize
+from utils.catalogo import obtener_catalogo
+from utils.miniaturas import obtener_miniaturas
+from utils.precios import (
+    FUENTES, cargar_precios, guardar_parametros_precio, resolver_parametros, calcular_desglose,
+    politica_redondeo
+)
 
 DATA_DIR = "datos"
-PRODUCTOS_FILE = os.path.join(DATA_DIR, "productos.json")
-PRECIOS_FILE = os.path.join(DATA_DIR, "precios.json")
 COLORES_FILE = os.path.join(DATA_DIR, "precios_colores.json")
 IMAGES_ROOT = os.path.abspath("imagenes_productos")
+# Lado de la miniatura del producto junto al selector
+TAM_MINIATURA = 54
+# (texto, valor guardado en precios.json["redondeo"])
+OPCIONES_MODO_REDONDEO = [("Redondeo por línea", "linea"), ("Redondeo al total", "total")]
+OPCIONES_TERMINACION = [("Sin terminación", None), ("Terminar en .90", 0.90), ("Terminar en .99", 0.99)]
 
 # --- COLORES POR DEFECTO ---
 DEFAULT_DESGLOSE_COLORS = {
@@ -31,21 +40,7 @@ def ensure_data_dir():
         os.makedirs(DATA_DIR)
 
 def cargar_productos():
-    if os.path.exists(PRODUCTOS_FILE):
-        with open(PRODUCTOS_FILE, "r", encoding="utf-8") as f:
-            return json.load(f)
-    return []
-
-def cargar_precios():
-    if os.path.exists(PRECIOS_FILE):
-        with open(PRECIOS_FILE, "r", encoding="utf-8") as f:
-            return json.load(f)
-    return {"global": {"iva": 16, "envio": 0, "descuento": 0, "precio_base": 0, "sumar_envio": False, "otros": 0, "sumar_otros": True},
-            "categorias": {}, "productos": {}}
-
-def guardar_precios(precios):
-    with open(PRECIOS_FILE, "w", encoding="utf-8") as f:
-        json.dump(precios, f, ensure_ascii=False, indent=2)
+    return obtener_catalogo().productos()
 
 def obtener_imagen_principal(sku):
     carpeta = os.path.join(IMAGES_ROOT, sku)
@@ -126,8 +121,21 @@ class PreciosWindow(QWidget):
         ensure_data_dir()
         self.productos = cargar_productos()
         self.precios = cargar_precios()
+        self.imagen_ruta = ""
         self.colores_desglose = cargar_colores_desglose()
+        self.tabla_window = None
         self.init_ui()
+        self.cargar_redondeo()
+        self.cargar_productos()
+        obtener_catalogo().productos_cambiados.connect(self.al_cambiar_catalogo)
+        obtener_miniaturas().miniatura_lista.connect(self.al_recibir_miniatura)
+
+    def al_recibir_miniatura(self, ruta, tam, img):
+        if tam == TAM_MINIATURA and ruta == self.imagen_ruta:
+            self.imagen_label.setPixmap(QPixmap.fromImage(img))
+
+    def al_cambiar_catalogo(self):
+        self.productos = cargar_productos()
         self.cargar_productos()
 
     def init_ui(self):
@@ -151,6 +159,11 @@ class PreciosWindow(QWidget):
         self.btn_refresh.setToolTip("Refrescar productos y precios")
         self.btn_refresh.clicked.connect(self.refrescar_todo)
         barra.addWidget(self.btn_refresh)
+        self.btn_tabla = QPushButton("Tabla de precios")
+        self.btn_tabla.setFixedHeight(28)
+        self.btn_tabla.setToolTip("Ver, filtrar y editar los precios de todo el catálogo")
+        self.btn_tabla.clicked.connect(self.abrir_tabla_precios)
+        barra.addWidget(self.btn_tabla)
         # Botón configurador de colores
         self.btn_config_colores = QPushButton("Cambiar colores")
         self.btn_config_colores.setFixedHeight(28)
@@ -182,7 +195,7 @@ class PreciosWindow(QWidget):
         # Zona media: imagen + datos
         datos = QHBoxLayout()
         self.imagen_label = QLabel()
-        self.imagen_label.setFixedSize(54, 54)
+        self.imagen_label.setFixedSize(TAM_MINIATURA, TAM_MINIATURA)
         self.imagen_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
         self.imagen_label.setStyleSheet("border-radius:4px; background:#f2f2f2;")
         datos.addWidget(self.imagen_label)
@@ -287,6 +300,19 @@ class PreciosWindow(QWidget):
         self.btn_guardar_global.clicked.connect(self.guardar_precio_global)
         btns.addWidget(self.btn_guardar_global)
         btns.addStretch()
+        # Política de redondeo: aplica a todo el catálogo
+        self.modo_redondeo_combo = QComboBox()
+        for texto, modo in OPCIONES_MODO_REDONDEO:
+            self.modo_redondeo_combo.addItem(texto, userData=modo)
+        self.modo_redondeo_combo.setToolTip("Por línea: cada importe se redondea a centavos.\n"
+                                            "Al total: solo se redondea el precio final.")
+        self.modo_redondeo_combo.currentIndexChanged.connect(self.guardar_redondeo)
+        btns.addWidget(self.modo_redondeo_combo)
+        self.terminacion_combo = QComboBox()
+        for texto, terminacion in OPCIONES_TERMINACION:
+            self.terminacion_combo.addItem(texto, userData=terminacion)
+        self.terminacion_combo.currentIndexChanged.connect(self.guardar_redondeo)
+        btns.addWidget(self.terminacion_combo)
         main.addLayout(btns)
 
         # Conecta los campos para actualizar desglose en tiempo real
@@ -305,10 +331,53 @@ class PreciosWindow(QWidget):
             guardar_colores_desglose(self.colores_desglose)
             self.actualizar_desglose()
 
+    def abrir_tabla_precios(self):
+        # Importación diferida: la tabla solo se construye si se abre
+        from modulos.tabla_precios import TablaPreciosWindow
+        if self.tabla_window is None:
+            # Comparte el dict de precios: lo que se edita en un lado se ve en el otro
+            self.tabla_window = TablaPreciosWindow(self.productos, self.precios)
+            self.tabla_window.modelo.precios_cambiados.connect(self.al_editar_en_tabla)
+        self.tabla_window.show()
+        self.tabla_window.raise_()
+        self.tabla_window.activateWindow()
+
+    def al_editar_en_tabla(self, ruta):
+        self.mostrar_producto(self.producto_combo.currentIndex())
+
+    def avisar_tabla(self, ruta):
+        if self.tabla_window is not None:
+            self.tabla_window.modelo.aplicar_cambio(ruta)
+
+    def cargar_redondeo(self):
+        modo, terminacion = politica_redondeo(self.precios)
+        for combo, valor in ((self.modo_redondeo_combo, modo),
+                             (self.terminacion_combo, None if terminacion is None else terminacion / 100)):
+            combo.blockSignals(True)
+            idx = combo.findData(valor)
+            if idx < 0 and combo is self.terminacion_combo:
+                # Terminación escrita a mano en precios.json que no está en la lista
+                combo.addItem(f"Terminar en .{terminacion:02d}", userData=valor)
+                idx = combo.count() - 1
+            combo.setCurrentIndex(max(idx, 0))
+            combo.blockSignals(False)
+
+    def guardar_redondeo(self):
+        politica = {"modo": self.modo_redondeo_combo.currentData(),
+                    "terminacion": self.terminacion_combo.currentData()}
+        guardar_parametros_precio(self.precios, ["redondeo"], politica)
+        self.avisar_tabla(["redondeo"])
+        self.actualizar_desglose()
+
     def refrescar_todo(self):
+        obtener_catalogo().refrescar()
         self.productos = cargar_productos()
         self.precios = cargar_precios()
+        self.cargar_redondeo()
         self.cargar_productos()
+        if self.tabla_window is not None:
+            self.tabla_window.modelo.cargar(self.productos, self.precios)
+            self.tabla_window.aplicar_filtro()
 
     def cargar_productos(self):
         self.producto_combo.clear()
@@ -325,6 +394,7 @@ class PreciosWindow(QWidget):
             self.limpiar_campos()
 
     def limpiar_campos(self):
+        self.imagen_ruta = ""
         self.imagen_label.clear()
         self.info_label.setText("")
         self.fuente_label.setText("")
@@ -350,80 +420,36 @@ class PreciosWindow(QWidget):
 
         # Imagen principal
         img_path = obtener_imagen_principal(sku)
-        if img_path and os.path.exists(img_path):
-            pixmap = QPixmap(img_path).scaled(54, 54, Qt.AspectRatioMode.KeepAspectRatio, Qt.TransformationMode.SmoothTransformation)
-            self.imagen_label.setPixmap(pixmap)
+        self.imagen_ruta = img_path
+        img = obtener_miniaturas().solicitar(img_path, TAM_MINIATURA) if img_path else None
+        if img is not None:
+            self.imagen_label.setPixmap(QPixmap.fromImage(img))
         else:
+            # Sin imagen o aún generándose (llega por al_recibir_miniatura)
             self.imagen_label.clear()
 
         # Buscar precios según prioridad: producto > categoría > global
-        pprod = self.precios.get("productos", {}).get(sku)
-        pcat = self.precios.get("categorias", {}).get(cat)
-        pglob = self.precios.get("global", {})
-
-        otros = 0
-        fuente = ""
-        if pprod:
-            self.precio_base_spin.setValue(pprod.get("precio_base", 0))
-            self.descuento_spin.setValue(pprod.get("descuento", 0))
-            self.iva_spin.setValue(pprod.get("iva", pcat.get("iva", pglob.get("iva", 0)) if pcat else pglob.get("iva", 0)))
-            self.envio_spin.setValue(pprod.get("envio", pcat.get("envio", pglob.get("envio", 0)) if pcat else pglob.get("envio", 0)))
-            self.envio_checkbox.setChecked(pprod.get("sumar_envio", False))
-            otros = pprod.get("otros", 0)
-            self.otros_spin.setValue(otros)
-            self.otros_checkbox.setChecked(pprod.get("sumar_otros", True))
-            fuente = "Parámetros propios del producto."
-        elif pcat:
-            self.precio_base_spin.setValue(pcat.get("precio_base", 0))
-            self.descuento_spin.setValue(pcat.get("descuento", 0))
-            self.iva_spin.setValue(pcat.get("iva", pglob.get("iva", 0)))
-            self.envio_spin.setValue(pcat.get("envio", pglob.get("envio", 0)))
-            self.envio_checkbox.setChecked(pcat.get("sumar_envio", False))
-            otros = pcat.get("otros", 0)
-            self.otros_spin.setValue(otros)
-            self.otros_checkbox.setChecked(pcat.get("sumar_otros", True))
-            fuente = "Parámetros heredados de la CATEGORÍA."
-        elif pglob:
-            self.precio_base_spin.setValue(pglob.get("precio_base", 0))
-            self.descuento_spin.setValue(pglob.get("descuento", 0))
-            self.iva_spin.setValue(pglob.get("iva", 0))
-            self.envio_spin.setValue(pglob.get("envio", 0))
-            self.envio_checkbox.setChecked(pglob.get("sumar_envio", False))
-            otros = pglob.get("otros", 0)
-            self.otros_spin.setValue(otros)
-            self.otros_checkbox.setChecked(pglob.get("sumar_otros", True))
-            fuente = "Parámetros globales."
-        else:
-            self.precio_base_spin.setValue(0)
-            self.descuento_spin.setValue(0)
-            self.iva_spin.setValue(0)
-            self.envio_spin.setValue(0)
-            self.envio_checkbox.setChecked(False)
-            self.otros_spin.setValue(0)
-            self.otros_checkbox.setChecked(True)
-            fuente = "Sin parámetros asignados todavía."
-
-        self.fuente_label.setText(fuente)
+        parametros, fuente = resolver_parametros(self.precios, sku, cat)
+        self.precio_base_spin.setValue(parametros["precio_base"])
+        self.descuento_spin.setValue(parametros["descuento"])
+        self.iva_spin.setValue(parametros["iva"])
+        self.envio_spin.setValue(parametros["envio"])
+        self.envio_checkbox.setChecked(parametros["sumar_envio"])
+        self.otros_spin.setValue(parametros["otros"])
+        self.otros_checkbox.setChecked(parametros["sumar_otros"])
+
+        self.fuente_label.setText(FUENTES[fuente])
         self.actualizar_desglose()
 
     def actualizar_desglose(self):
         c = self.colores_desglose
-        precio_base = self.precio_base_spin.value()
-        descuento = self.descuento_spin.value()
-        iva = self.iva_spin.value()
-        envio = self.envio_spin.value()
-        otros = self.otros_spin.value()
-        sumar_envio = self.envio_checkbox.isChecked()
-        sumar_otros = self.otros_checkbox.isChecked()
-
-        precio_desc = precio_base * (1 - descuento / 100)
-        monto_desc = precio_base - precio_desc
-        precio_iva = precio_desc * (1 + iva / 100)
-        monto_iva = precio_iva - precio_desc
-        suma = precio_desc + monto_iva
-        monto_envio = envio if sumar_envio else 0
-        monto_otros = otros if sumar_otros else 0
-        precio_final = precio_iva + monto_envio + monto_otros
+        d = calcular_desglose(self.parametros_formulario(), politica_redondeo(self.precios))
+        precio_base, descuento, iva = d["precio_base"], d["descuento"], d["iva"]
+        envio, otros = d["envio"], d["otros"]
+        sumar_envio, sumar_otros = d["sumar_envio"], d["sumar_otros"]
+        precio_desc, monto_desc = d["precio_desc"], d["monto_desc"]
+        precio_iva, monto_iva = d["precio_iva"], d["monto_iva"]
+        ajuste, precio_final = d["ajuste_redondeo"], d["precio_final"]
 
         # Desglose tipo factura con colores personalizados
         desglose = f"""<span style='color:{c["subtotal"]};'>
@@ -440,6 +466,8 @@ class PreciosWindow(QWidget):
             desglose += f"<span style='color:{c['otros']};'>+ Otros:</span> ${otros:,.2f}<br>"
         else:
             desglose += f"<span style='color:{c['otros']};'>Otros (no sumado):</span> ${otros:,.2f}<br>"
+        if ajuste:
+            desglose += f"<span style='color:{c['final']};'>+ Ajuste de redondeo:</span> ${ajuste:,.2f}<br>"
         desglose += "</span>"
         self.desglose_label.setText(desglose)
 
@@ -447,13 +475,8 @@ class PreciosWindow(QWidget):
             f"Precio final:  <span style='color:{c['final']}'><b>${precio_final:,.2f}</b></span>"
         )
 
-    def guardar_precio_producto(self):
-        idx = self.producto_combo.currentIndex()
-        if idx < 0 or idx >= len(self.productos):
-            return
-        prod = self.productos[idx]
-        sku = prod.get("sku", "")
-        self.precios.setdefault("productos", {})[sku] = {
+    def parametros_formulario(self):
+        return {
             "precio_base": self.precio_base_spin.value(),
             "descuento": self.descuento_spin.value(),
             "iva": self.iva_spin.value(),
@@ -462,7 +485,15 @@ class PreciosWindow(QWidget):
             "otros": self.otros_spin.value(),
             "sumar_otros": self.otros_checkbox.isChecked()
         }
-        guardar_precios(self.precios)
+
+    def guardar_precio_producto(self):
+        idx = self.producto_combo.currentIndex()
+        if idx < 0 or idx >= len(self.productos):
+            return
+        prod = self.productos[idx]
+        sku = prod.get("sku", "")
+        guardar_parametros_precio(self.precios, ["productos", sku], self.parametros_formulario())
+        self.avisar_tabla(["productos", sku])
         QMessageBox.information(self, "Guardado", "Parámetros guardados para este producto.")
         self.mostrar_producto(idx)
 
@@ -472,30 +503,14 @@ class PreciosWindow(QWidget):
             return
         prod = self.productos[idx]
         cat = prod.get("categoria", "")
-        self.precios.setdefault("categorias", {})[cat] = {
-            "precio_base": self.precio_base_spin.value(),
-            "descuento": self.descuento_spin.value(),
-            "iva": self.iva_spin.value(),
-            "envio": self.envio_spin.value(),
-            "sumar_envio": self.envio_checkbox.isChecked(),
-            "otros": self.otros_spin.value(),
-            "sumar_otros": self.otros_checkbox.isChecked()
-        }
-        guardar_precios(self.precios)
+        guardar_parametros_precio(self.precios, ["categorias", cat], self.parametros_formulario())
+        self.avisar_tabla(["categorias", cat])
         QMessageBox.information(self, "Guardado", f"Parámetros guardados para la categoría '{cat}'.")
         self.mostrar_producto(idx)
 
     def guardar_precio_global(self):
-        self.precios["global"] = {
-            "precio_base": self.precio_base_spin.value(),
-            "descuento": self.descuento_spin.value(),
-            "iva": self.iva_spin.value(),
-            "envio": self.envio_spin.value(),
-            "sumar_envio": self.envio_checkbox.isChecked(),
-            "otros": self.otros_spin.value(),
-            "sumar_otros": self.otros_checkbox.isChecked()
-        }
-        guardar_precios(self.precios)
+        guardar_parametros_precio(self.precios, ["global"], self.parametros_formulario())
+        self.avisar_tabla(["global"])
         QMessageBox.information(self, "Guardado", "Parámetros globales guardados.")
         idx = self.producto_combo.currentIndex()
         self.mostrar_producto(idx)
\ No newline at end of file
@@ -5,18 +5,13 @@ from PyQt6.QtWidgets import (
     QWidget, QVBoxLayout, QLabel, QLineEdit, QPushButton, QHBoxLayout, QComboBox, QListWidget, QFormLayout, QMessageBox, QInputDialog
 )
 from PyQt6.QtCore import Qt
-
-PRODUCTOS_FILE = "datos/productos.json"
+from utils.catalogo import obtener_catalogo
 
 def cargar_productos():
-    if os.path.exists(PRODUCTOS_FILE):
-        with open(PRODUCTOS_FILE, "r", encoding="utf-8") as f:
-            return json.load(f)
-    return []
+    return obtener_catalogo().productos()
 
 def guardar_productos(productos):
-    with open(PRODUCTOS_FILE, "w", encoding="utf-8") as f:
-        json.dump(productos, f, ensure_ascii=False, indent=2)
+    obtener_catalogo().guardar(productos)
 
 class ProductosWindow(QWidget):
     def __init__(self):
@@ -25,6 +20,11 @@ class ProductosWindow(QWidget):
         self.productos = cargar_productos()
         self.categorias = self.cargar_categorias()
         self.setup_ui()
+        obtener_catalogo().productos_cambiados.connect(self.al_cambiar_catalogo)
+
+    def al_cambiar_catalogo(self):
+        self.productos = cargar_productos()
+        self.refresh_product_list()
 
     def setup_ui(self):
         main_layout = QVBoxLayout(self)
@@ -149,8 +149,11 @@ class ProductosWindow(QWidget):
         if not data["nombre"]:
             QMessageBox.warning(self, "Campos requeridos", "El nombre del producto es obligatorio.")
             return
+        # get_form_data toma el id de la fila seleccionada; uno nuevo evita
+        # que el guardado por id sobrescriba ese producto
+        data["id"] = str(uuid.uuid4())
         self.productos.append(data)
-        guardar_productos(self.productos)
+        obtener_catalogo().guardar_producto(data)
         self.refresh_product_list()
         self.clear_form()
 
@@ -163,8 +166,14 @@ class ProductosWindow(QWidget):
         if not data["nombre"]:
             QMessageBox.warning(self, "Campos requeridos", "El nombre del producto es obligatorio.")
             return
+        # Un producto antiguo sin id recibe uno nuevo en get_form_data: el
+        # guardado por id lo agregaría al final en vez de reemplazarlo
+        sin_id = not self.productos[idx].get("id")
         self.productos[idx] = data
-        guardar_productos(self.productos)
+        if sin_id or self.id_repetido(data["id"]):
+            guardar_productos(self.productos)
+        else:
+            obtener_catalogo().guardar_producto(data)
         self.refresh_product_list()
         self.clear_form()
 
@@ -173,11 +182,20 @@ class ProductosWindow(QWidget):
         if idx < 0:
             QMessageBox.information(self, "Selecciona", "Elige un producto para eliminar.")
             return
+        prod_id = self.productos[idx].get("id")
+        repetido = self.id_repetido(prod_id)
         self.productos.pop(idx)
-        guardar_productos(self.productos)
+        if prod_id and not repetido:
+            obtener_catalogo().eliminar_producto(prod_id)
+        else:
+            guardar_productos(self.productos)
         self.refresh_product_list()
         self.clear_form()
 
+    def id_repetido(self, prod_id):
+        # Los cambios por id del journal no distinguen productos con id duplicado
+        return sum(1 for p in self.productos if p.get("id") == prod_id) > 1
+
     def refresh_product_list(self):
         self.lista_productos.clear()
         for p in self.productos:
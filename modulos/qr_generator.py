@@ -1,17 +1,77 @@
 from PyQt6.QtWidgets import (
     QWidget, QVBoxLayout, QLabel, QPushButton, QLineEdit,
-    QHBoxLayout, QFileDialog, QFrame, QComboBox, QColorDialog
+    QHBoxLayout, QFileDialog, QFrame, QComboBox, QColorDialog,
+    QProgressBar, QMessageBox
 )
-from PyQt6.QtCore import Qt
-from PyQt6.QtGui import QPixmap
-import qrcode
-from qrcode.image.styledpil import StyledPilImage
-from qrcode.image.styles.moduledrawers import RoundedModuleDrawer, CircleModuleDrawer
-import os
+from PyQt6.QtCore import Qt, QThread, pyqtSignal
+from PyQt6.QtGui import QPixmap, QImage
 import random
 
 # Importar la función para obtener productos
 from modulos.productos import obtener_productos
+from utils.catalogo import obtener_catalogo
+from utils.qr import (
+    ESTILOS_QR, QR_DIR, texto_producto, FORMATOS_QR, FORMATOS_VECTORIALES, generar_qr, guardar_qr,
+    filtrar_productos, generar_qr_lote
+)
+from utils.precios import cargar_precios
+from utils.etiquetas import generar_hojas
+
+
+def pil_a_qimage(img):
+    """Convierte una imagen PIL a QImage en memoria (sin pasar por disco)."""
+    img = img.convert("RGBA")
+    ancho, alto = img.size
+    return QImage(img.tobytes(), ancho, alto, ancho * 4, QImage.Format.Format_RGBA8888).copy()
+
+
+class QrLoteWorker(QThread):
+    """Genera en segundo plano los QR de varios productos en qr_productos/<SKU>/"""
+    progreso = pyqtSignal(int, int)
+    terminado = pyqtSignal(dict)
+
+    def __init__(self, productos, carpeta, estilo, color, fondo, formato="png"):
+        super().__init__()
+        self.productos = productos
+        self.carpeta = carpeta
+        self.estilo = estilo
+        self.color = color
+        self.fondo = fondo
+        self.formato = formato
+
+    def run(self):
+        try:
+            resultado = generar_qr_lote(
+                self.productos, self.carpeta, self.estilo, self.color, self.fondo,
+                progreso=self.progreso.emit, cancelado=self.isInterruptionRequested,
+                formato=self.formato
+            )
+        except Exception as e:
+            # Fallo antes de repartir el trabajo (carpeta, pool): sin SKU
+            resultado = {"generados": [], "omitidos": 0, "errores": [("", str(e))], "cancelado": False}
+        self.terminado.emit(resultado)
+
+
+class HojaEtiquetasWorker(QThread):
+    """Compone en segundo plano las hojas de etiquetas (QR, SKU, nombre y precio)."""
+    progreso = pyqtSignal(int, int)
+    terminado = pyqtSignal(dict)
+
+    def __init__(self, productos, salida):
+        super().__init__()
+        self.productos = productos
+        self.salida = salida
+
+    def run(self):
+        try:
+            resultado = generar_hojas(
+                self.productos, cargar_precios(), self.salida,
+                progreso=self.progreso.emit, cancelado=self.isInterruptionRequested
+            )
+        except Exception as e:
+            resultado = {"archivos": [], "paginas": 0, "etiquetas": 0,
+                         "errores": [(0, str(e))], "cancelado": False}
+        self.terminado.emit(resultado)
 
 class QrGeneratorWindow(QWidget):
     def __init__(self):
@@ -19,13 +79,26 @@ class QrGeneratorWindow(QWidget):
         self.setWindowTitle("Generador de Códigos QR")
         self.setMinimumSize(700, 600)
         self.qr_code = None
+        self.qr_params = None  # (texto, estilo, color, fondo) del QR en vista previa
         self.qr_color = "#000000"
         self.bg_color = "#FFFFFF"
+        self.lote_worker = None
+        self.hojas_worker = None
 
         # Obtener productos
         self.productos = obtener_productos()
 
         self.init_ui()
+        obtener_catalogo().productos_cambiados.connect(self.al_cambiar_catalogo)
+
+    def al_cambiar_catalogo(self):
+        self.productos = obtener_productos()
+        self.producto_combo.blockSignals(True)
+        self.producto_combo.clear()
+        self.producto_combo.addItem("Sin producto")
+        for prod in self.productos:
+            self.producto_combo.addItem(prod['nombre'])
+        self.producto_combo.blockSignals(False)
 
     def init_ui(self):
         main_layout = QVBoxLayout()
@@ -69,7 +142,7 @@ class QrGeneratorWindow(QWidget):
         style_layout.addWidget(style_label)
 
         self.style_combo = QComboBox()
-        self.style_combo.addItems(["Cuadrado", "Redondeado", "Circular"])
+        self.style_combo.addItems(ESTILOS_QR)
         self.style_combo.setStyleSheet("font-size: 12pt; padding: 8px;")
         style_layout.addWidget(self.style_combo)
         form_layout.addLayout(style_layout)
@@ -138,6 +211,31 @@ class QrGeneratorWindow(QWidget):
         button_layout.addWidget(random_button)
 
         main_layout.addLayout(button_layout)
+
+        # Generación por lotes para el catálogo (o los productos filtrados)
+        lote_layout = QHBoxLayout()
+        self.filtro_lote = QLineEdit()
+        self.filtro_lote.setPlaceholderText("Filtrar por SKU, nombre o categoría (vacío = todo el catálogo)")
+        self.filtro_lote.setStyleSheet("font-size: 12pt; padding: 8px;")
+        lote_layout.addWidget(self.filtro_lote)
+        self.formato_lote = QComboBox()
+        self.formato_lote.addItems(FORMATOS_QR)
+        self.formato_lote.setStyleSheet("font-size: 12pt; padding: 8px;")
+        lote_layout.addWidget(self.formato_lote)
+        self.btn_lote = QPushButton("Generar QR del catálogo")
+        self.btn_lote.setStyleSheet("font-size: 12pt; padding: 8px;")
+        self.btn_lote.clicked.connect(self.generar_lote)
+        lote_layout.addWidget(self.btn_lote)
+        self.btn_hojas = QPushButton("Hojas de etiquetas")
+        self.btn_hojas.setToolTip("Etiquetas imprimibles con QR, SKU, nombre y precio final")
+        self.btn_hojas.setStyleSheet("font-size: 12pt; padding: 8px;")
+        self.btn_hojas.clicked.connect(self.generar_hojas_etiquetas)
+        lote_layout.addWidget(self.btn_hojas)
+        main_layout.addLayout(lote_layout)
+        self.lote_progress = QProgressBar()
+        self.lote_progress.setVisible(False)
+        main_layout.addWidget(self.lote_progress)
+
         self.setLayout(main_layout)
 
     def on_producto_selected(self, idx):
@@ -146,10 +244,7 @@ class QrGeneratorWindow(QWidget):
         else:
             producto = self.productos[idx - 1]
             # Puedes elegir qué información poner en el QR
-            if 'url' in producto:
-                self.text_input.setText(producto['url'])
-            else:
-                self.text_input.setText(f"Producto: {producto['nombre']} (ID: {producto['id']})")
+            self.text_input.setText(texto_producto(producto))
 
     def generate_qr(self):
         text = self.text_input.text()
@@ -157,43 +252,9 @@ class QrGeneratorWindow(QWidget):
             self.qr_preview.setText("Por favor, ingrese texto o URL")
             return
         try:
-            qr = qrcode.QRCode(
-                version=1,
-                error_correction=qrcode.constants.ERROR_CORRECT_H,
-                box_size=10,
-                border=4,
-            )
-            qr.add_data(text)
-            qr.make(fit=True)
-
-            style = self.style_combo.currentText()
-            if style == "Redondeado":
-                module_drawer = RoundedModuleDrawer()
-            elif style == "Circular":
-                module_drawer = CircleModuleDrawer()
-            else:
-                module_drawer = None
-
-            qr_color_rgb = tuple(int(self.qr_color.lstrip('#')[i:i+2], 16) for i in (0, 2, 4))
-            bg_color_rgb = tuple(int(self.bg_color.lstrip('#')[i:i+2], 16) for i in (0, 2, 4))
-
-            if module_drawer:
-                img = qr.make_image(
-                    image_factory=StyledPilImage,
-                    module_drawer=module_drawer,
-                    color=qr_color_rgb,
-                    background=bg_color_rgb
-                )
-            else:
-                img = qr.make_image(
-                    fill_color=self.qr_color,
-                    back_color=self.bg_color
-                )
-
-            temp_path = os.path.join(os.path.dirname(__file__), "temp_qr.png")
-            img.save(temp_path)
+            img = generar_qr(text, self.style_combo.currentText(), self.qr_color, self.bg_color)
 
-            pixmap = QPixmap(temp_path)
+            pixmap = QPixmap.fromImage(pil_a_qimage(img))
             if not pixmap.isNull():
                 scaled_pixmap = pixmap.scaled(
                     self.preview_frame.width() - 40,
@@ -203,8 +264,7 @@ class QrGeneratorWindow(QWidget):
                 )
                 self.qr_preview.setPixmap(scaled_pixmap)
                 self.qr_code = img
-            if os.path.exists(temp_path):
-                os.remove(temp_path)
+                self.qr_params = (text, self.style_combo.currentText(), self.qr_color, self.bg_color)
         except Exception as e:
             self.qr_preview.setText(f"Error al generar QR: {str(e)}")
 
@@ -214,13 +274,81 @@ class QrGeneratorWindow(QWidget):
             return
         try:
             file_path, _ = QFileDialog.getSaveFileName(
-                self, "Guardar Código QR", "", "PNG (*.png);;JPEG (*.jpg *.jpeg);;All Files (*)"
+                self, "Guardar Código QR", "",
+                "PNG (*.png);;JPEG (*.jpg *.jpeg);;SVG (*.svg);;PDF (*.pdf);;All Files (*)"
             )
             if file_path:
-                self.qr_code.save(file_path)
+                # SVG y PDF se generan vectoriales a partir de la matriz del QR
+                texto, estilo, color, fondo = self.qr_params
+                guardar_qr(texto, file_path, estilo, color, fondo)
         except Exception as e:
             self.qr_preview.setText(f"Error al guardar: {str(e)}")
 
+    def generar_lote(self):
+        productos = filtrar_productos(self.productos, self.filtro_lote.text())
+        if not productos:
+            QMessageBox.information(self, "Sin productos", "Ningún producto coincide con el filtro.")
+            return
+        formato = self.formato_lote.currentText()
+        if formato in FORMATOS_VECTORIALES and self.style_combo.currentText() != "Cuadrado":
+            QMessageBox.warning(self, "Formato", "SVG y PDF solo admiten el estilo Cuadrado.")
+            return
+        self.lote_worker = QrLoteWorker(productos, QR_DIR, self.style_combo.currentText(),
+                                        self.qr_color, self.bg_color, formato)
+        self.lote_worker.progreso.connect(self.actualizar_progreso_lote)
+        self.lote_worker.terminado.connect(self.lote_terminado)
+        self.btn_lote.setEnabled(False)
+        self.lote_progress.setValue(0)
+        self.lote_progress.setVisible(True)
+        self.lote_worker.start()
+
+    def actualizar_progreso_lote(self, hechos, total):
+        self.lote_progress.setMaximum(max(total, 1))
+        self.lote_progress.setValue(hechos)
+
+    def lote_terminado(self, resultado):
+        self.btn_lote.setEnabled(True)
+        self.lote_progress.setVisible(False)
+        mensaje = (f"QR generados: {len(resultado['generados'])}\n"
+                   f"Sin cambios: {resultado['omitidos']}\n"
+                   f"Carpeta: {QR_DIR}")
+        if resultado["errores"]:
+            mensaje += f"\nErrores: {len(resultado['errores'])}"
+            mensaje += "".join(f"\n  {sku}: {error}" if sku else f"\n  {error}"
+                               for sku, error in resultado["errores"][:10])
+        QMessageBox.information(self, "QR del catálogo", mensaje)
+
+    def generar_hojas_etiquetas(self):
+        productos = filtrar_productos(self.productos, self.filtro_lote.text())
+        if not productos:
+            QMessageBox.information(self, "Sin productos", "Ningún producto coincide con el filtro.")
+            return
+        salida, _ = QFileDialog.getSaveFileName(
+            self, "Guardar hojas de etiquetas", "etiquetas.pdf",
+            "PDF (*.pdf);;PNG, una imagen por hoja (*.png)"
+        )
+        if not salida:
+            return
+        self.hojas_worker = HojaEtiquetasWorker(productos, salida)
+        self.hojas_worker.progreso.connect(self.actualizar_progreso_lote)
+        self.hojas_worker.terminado.connect(self.hojas_terminadas)
+        self.btn_hojas.setEnabled(False)
+        self.lote_progress.setValue(0)
+        self.lote_progress.setVisible(True)
+        self.hojas_worker.start()
+
+    def hojas_terminadas(self, resultado):
+        self.btn_hojas.setEnabled(True)
+        self.lote_progress.setVisible(False)
+        if resultado["errores"]:
+            mensaje = "No se pudieron generar las hojas:"
+            mensaje += "".join(f"\n  Hoja {hoja}: {error}" for hoja, error in resultado["errores"][:10])
+            QMessageBox.warning(self, "Hojas de etiquetas", mensaje)
+            return
+        mensaje = (f"Etiquetas: {resultado['etiquetas']} en {resultado['paginas']} hoja(s)\n"
+                   + "\n".join(resultado["archivos"][:5]))
+        QMessageBox.information(self, "Hojas de etiquetas", mensaje)
+
     def select_qr_color(self):
         color = QColorDialog.getColor()
         if color.isValid():
@@ -4,21 +4,58 @@ import shutil
 from PyQt6.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QLabel, QPushButton, QFileDialog,
     QListWidget, QListWidgetItem, QComboBox, QMessageBox, QSpinBox, QSlider,
-    QCheckBox, QGroupBox, QAbstractItemView
+    QCheckBox, QGroupBox, QAbstractItemView, QProgressBar
 )
-from PyQt6.QtGui import QPixmap, QIcon, QDragEnterEvent, QDropEvent
-from PyQt6.QtCore import Qt, QSize
-from PIL import Image
+from PyQt6.QtGui import QPixmap, QIcon, QColor, QDragEnterEvent, QDropEvent
+from PyQt6.QtCore import Qt, QSize, QThread, QTimer
 from PyQt6.QtCore import pyqtSignal
+from utils.catalogo import obtener_catalogo
+from utils.miniaturas import obtener_miniaturas
+from utils.optimizador import (
+    EXTENSIONES_IMAGEN, IMAGENES_CONFIG_FILE, ruta_imagenes_raiz, lotes_catalogo, optimizar_lotes
+)
 
 DATA_DIR = "datos"
-PRODUCTOS_FILE = os.path.join(DATA_DIR, "productos.json")
-DEFAULT_IMAGES_ROOT = os.path.abspath("imagenes_productos")
+TAM_ICONO = 80
+TAM_PREVIEW = 400
+# Rol del item que indica si ya muestra su miniatura real
+ROL_MINIATURA = Qt.ItemDataRole.UserRole + 1
 
 def ensure_dir(path):
     if not os.path.exists(path):
         os.makedirs(path)
 
+class OptimizadorWorker(QThread):
+    """
+    Optimiza lotes de imágenes (uno por carpeta de SKU) en un pool de
+    procesos. Lo que el manifiesto de imagenes.json da por vigente no se
+    vuelve a codificar.
+    """
+    progreso = pyqtSignal(int, int)      # imágenes terminadas, total
+    imagen_lista = pyqtSignal(str)       # ruta definitiva de la imagen
+    error_imagen = pyqtSignal(str, str)  # origen, mensaje
+    terminado = pyqtSignal(dict)         # {"cancelado", "carpetas": {carpeta: [rutas]}, "errores", "omitidas"}
+
+    def __init__(self, lotes, opciones):
+        """`lotes`: lista de (sku, carpeta, orígenes en orden visual)"""
+        super().__init__()
+        self.lotes = lotes
+        self.opciones = opciones
+        self._cancelado = False
+
+    def cancelar(self):
+        self._cancelado = True
+
+    def run(self):
+        resultado = optimizar_lotes(
+            self.lotes, self.opciones,
+            progreso=self.progreso.emit,
+            imagen_lista=self.imagen_lista.emit,
+            error_imagen=self.error_imagen.emit,
+            cancelado=lambda: self._cancelado
+        )
+        self.terminado.emit(resultado)
+
 class ReescaladoWindow(QWidget):
     def __init__(self):
         super().__init__()
@@ -32,21 +69,24 @@ class ReescaladoWindow(QWidget):
         self.sku_seleccionado = ""
         self.formato_salida = "JPG"
         self.guardar_original = False
+        self.worker = None
+        self.preview_ruta = ""
+        self.miniaturas_pedidas = set()
         self.init_ui()
         self.cargar_productos()
         self.actualizar_lista_imagenes()
+        obtener_catalogo().productos_cambiados.connect(self.cargar_productos)
+        obtener_miniaturas().miniatura_lista.connect(self.al_recibir_miniatura)
+
+    def refrescar_productos(self):
+        obtener_catalogo().refrescar()
+        self.cargar_productos()
 
     def cargar_ruta_raiz(self):
-        config_file = os.path.join(DATA_DIR, "imagenes_config.json")
-        if os.path.exists(config_file):
-            with open(config_file, "r", encoding="utf-8") as f:
-                data = json.load(f)
-                return data.get("imagenes_raiz", DEFAULT_IMAGES_ROOT)
-        return DEFAULT_IMAGES_ROOT
+        return ruta_imagenes_raiz()
 
     def guardar_ruta_raiz(self):
-        config_file = os.path.join(DATA_DIR, "imagenes_config.json")
-        with open(config_file, "w", encoding="utf-8") as f:
+        with open(IMAGENES_CONFIG_FILE, "w", encoding="utf-8") as f:
             json.dump({"imagenes_raiz": self.imagenes_raiz}, f, ensure_ascii=False, indent=2)
 
     def init_ui(self):
@@ -62,7 +102,7 @@ class ReescaladoWindow(QWidget):
         # --- BOTÓN REFRESCAR PRODUCTOS ---
         self.btn_refresh_productos = QPushButton("Refrescar productos")
         self.btn_refresh_productos.setToolTip("Volver a cargar la lista de productos")
-        self.btn_refresh_productos.clicked.connect(self.cargar_productos)
+        self.btn_refresh_productos.clicked.connect(self.refrescar_productos)
         prod_layout.addWidget(self.btn_refresh_productos)
         # ---------------------------------
         g_prod.setLayout(prod_layout)
@@ -72,11 +112,21 @@ class ReescaladoWindow(QWidget):
         g_imgs = QGroupBox("Imágenes asociadas")
         img_layout = QVBoxLayout()
         self.lista_imagenes = QListWidget()
-        self.lista_imagenes.setIconSize(QSize(80, 80))
+        self.lista_imagenes.setIconSize(QSize(TAM_ICONO, TAM_ICONO))
         self.lista_imagenes.setSelectionMode(QListWidget.SelectionMode.SingleSelection)
         self.lista_imagenes.setDragDropMode(QListWidget.DragDropMode.InternalMove)
         self.lista_imagenes.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
         self.lista_imagenes.itemClicked.connect(self.mostrar_vista_previa)
+        # Las miniaturas se piden solo para los items visibles, al hacer scroll
+        pixmap = QPixmap(TAM_ICONO, TAM_ICONO)
+        pixmap.fill(QColor("#dddddd"))
+        self.icono_cargando = QIcon(pixmap)
+        self.timer_miniaturas = QTimer(self)
+        self.timer_miniaturas.setSingleShot(True)
+        self.timer_miniaturas.setInterval(50)
+        self.timer_miniaturas.timeout.connect(self.solicitar_miniaturas_visibles)
+        self.lista_imagenes.verticalScrollBar().valueChanged.connect(self.timer_miniaturas.start)
+        self.lista_imagenes.verticalScrollBar().rangeChanged.connect(self.timer_miniaturas.start)
         img_layout.addWidget(self.lista_imagenes)
         btns = QHBoxLayout()
         self.btn_borrar = QPushButton("Eliminar")
@@ -148,15 +198,27 @@ class ReescaladoWindow(QWidget):
 
         # Acciones
         act = QHBoxLayout()
-        btn_guardar = QPushButton("Optimizar y Guardar")
-        btn_guardar.clicked.connect(self.optimizar_y_guardar)
-        act.addWidget(btn_guardar)
+        self.btn_guardar = QPushButton("Optimizar y Guardar")
+        self.btn_guardar.clicked.connect(self.optimizar_y_guardar)
+        act.addWidget(self.btn_guardar)
+        self.btn_catalogo = QPushButton("Optimizar todo el catálogo")
+        self.btn_catalogo.setToolTip("Optimiza las carpetas de todos los SKU usando todos los núcleos")
+        self.btn_catalogo.clicked.connect(self.optimizar_catalogo)
+        act.addWidget(self.btn_catalogo)
+        self.btn_cancelar = QPushButton("Cancelar")
+        self.btn_cancelar.setEnabled(False)
+        self.btn_cancelar.clicked.connect(self.cancelar_optimizacion)
+        act.addWidget(self.btn_cancelar)
         act.addStretch()
         btn_root = QPushButton("Cambiar directorio imágenes")
         btn_root.clicked.connect(self.cambiar_directorio_raiz)
         act.addWidget(btn_root)
         right.addLayout(act)
 
+        self.progress_bar = QProgressBar()
+        self.progress_bar.setVisible(False)
+        right.addWidget(self.progress_bar)
+
         main.addLayout(right,3)
 
     # DRAG & DROP
@@ -182,10 +244,7 @@ class ReescaladoWindow(QWidget):
         self.actualizar_lista_imagenes()
 
     def cargar_productos(self):
-        self.productos = []
-        if os.path.exists(PRODUCTOS_FILE):
-            with open(PRODUCTOS_FILE, "r", encoding="utf-8") as f:
-                self.productos = json.load(f)
+        self.productos = obtener_catalogo().productos()
         self.producto_combo.clear()
         for prod in self.productos:
             sku = prod.get("sku", "")
@@ -209,28 +268,58 @@ class ReescaladoWindow(QWidget):
         ensure_dir(self.carpeta_actual)
         self.imagenes = []
         for f in os.listdir(self.carpeta_actual):
-            if f.lower().endswith(('.png', '.jpg', '.jpeg', '.webp', '.bmp', '.gif')):
+            if f.lower().endswith(EXTENSIONES_IMAGEN):
                 self.imagenes.append(os.path.join(self.carpeta_actual, f))
         self.actualizar_lista_imagenes()
 
     def actualizar_lista_imagenes(self):
         self.lista_imagenes.clear()
+        miniaturas = obtener_miniaturas()
         for i, img_path in enumerate(self.imagenes):
             try:
-                pixmap = QPixmap(img_path).scaled(80, 80, Qt.AspectRatioMode.KeepAspectRatio, Qt.TransformationMode.SmoothTransformation)
+                # Si la miniatura no está en memoria se muestra un marcador y se
+                # pide en segundo plano cuando el item es visible
+                img = miniaturas.en_memoria(img_path, TAM_ICONO)
+                icono = QIcon(QPixmap.fromImage(img)) if img is not None else self.icono_cargando
                 name = os.path.basename(img_path)
                 if i == 0:
-                    item = QListWidgetItem(QIcon(pixmap), f"★ {name} (principal)")
+                    item = QListWidgetItem(icono, f"★ {name} (principal)")
                     item.setBackground(Qt.GlobalColor.yellow)
                 else:
-                    item = QListWidgetItem(QIcon(pixmap), name)
+                    item = QListWidgetItem(icono, name)
                 # Guarda la ruta real en el item para obtenerla en el orden visual luego
                 item.setData(Qt.ItemDataRole.UserRole, img_path)
+                item.setData(ROL_MINIATURA, img is not None)
                 self.lista_imagenes.addItem(item)
             except Exception:
                 item = QListWidgetItem(os.path.basename(img_path))
                 item.setData(Qt.ItemDataRole.UserRole, img_path)
                 self.lista_imagenes.addItem(item)
+        self.timer_miniaturas.start()
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        self.timer_miniaturas.start()
+
+    def solicitar_miniaturas_visibles(self):
+        """Pide las miniaturas de los items visibles y cancela las que salieron de la vista."""
+        miniaturas = obtener_miniaturas()
+        vista = self.lista_imagenes.viewport().rect()
+        visibles = set()
+        for i in range(self.lista_imagenes.count()):
+            item = self.lista_imagenes.item(i)
+            ruta = item.data(Qt.ItemDataRole.UserRole)
+            if item.data(ROL_MINIATURA) or not self.lista_imagenes.visualItemRect(item).intersects(vista):
+                continue
+            img = miniaturas.solicitar(ruta, TAM_ICONO, prioridad=1)
+            if img is not None:
+                item.setIcon(QIcon(QPixmap.fromImage(img)))
+                item.setData(ROL_MINIATURA, True)
+            else:
+                visibles.add(ruta)
+        for ruta in self.miniaturas_pedidas - visibles:
+            miniaturas.cancelar(ruta, TAM_ICONO)
+        self.miniaturas_pedidas = visibles
 
     def mostrar_vista_previa(self, item):
         idx = self.lista_imagenes.row(item)
@@ -238,8 +327,23 @@ class ReescaladoWindow(QWidget):
             self.preview_label.setText("Vista previa no disponible")
             return
         img_path = item.data(Qt.ItemDataRole.UserRole)
-        pixmap = QPixmap(img_path).scaled(400, 400, Qt.AspectRatioMode.KeepAspectRatio, Qt.TransformationMode.SmoothTransformation)
-        self.preview_label.setPixmap(pixmap)
+        self.preview_ruta = img_path
+        img = obtener_miniaturas().solicitar(img_path, TAM_PREVIEW)
+        if img is not None:
+            self.preview_label.setPixmap(QPixmap.fromImage(img))
+        else:
+            self.preview_label.setText("Cargando vista previa…")
+
+    def al_recibir_miniatura(self, ruta, tam, img):
+        if tam == TAM_ICONO:
+            self.miniaturas_pedidas.discard(ruta)
+            for i in range(self.lista_imagenes.count()):
+                item = self.lista_imagenes.item(i)
+                if item.data(Qt.ItemDataRole.UserRole) == ruta:
+                    item.setIcon(QIcon(QPixmap.fromImage(img)))
+                    item.setData(ROL_MINIATURA, True)
+        elif tam == TAM_PREVIEW and ruta == self.preview_ruta:
+            self.preview_label.setPixmap(QPixmap.fromImage(img))
 
     def eliminar_imagen_seleccionada(self):
         idx = self.lista_imagenes.currentRow()
@@ -286,66 +390,84 @@ class ReescaladoWindow(QWidget):
         self.alto_spin.setEnabled(not checked)
         self.guardar_original = checked
 
+    def opciones_guardado(self):
+        return {
+            "ancho": self.ancho_spin.value(),
+            "alto": self.alto_spin.value(),
+            "calidad": self.calidad_slider.value(),
+            "formato": self.formato_salida.lower(),
+            "mantener_original": self.guardar_original,
+        }
+
     def optimizar_y_guardar(self):
         if not self.sku_seleccionado or not self.carpeta_actual:
             QMessageBox.warning(self, "Error", "Debes seleccionar un producto.")
             return
-        ancho = self.ancho_spin.value()
-        alto = self.alto_spin.value()
-        calidad = self.calidad_slider.value()
-        formato = self.formato_salida.lower()
-        nuevas_imagenes = []
-        # Limpia carpeta destino antes de guardar (excepto metadatos)
-        for f in os.listdir(self.carpeta_actual):
-            if f.lower().endswith(('.png', '.jpg', '.jpeg', '.webp', '.bmp', '.gif')):
-                try:
-                    os.remove(os.path.join(self.carpeta_actual, f))
-                except Exception:
-                    pass
+        opciones = self.opciones_guardado()
         # Usa el orden visual del QListWidget:
-        for i in range(self.lista_imagenes.count()):
-            item = self.lista_imagenes.item(i)
-            img_src = item.data(Qt.ItemDataRole.UserRole)
-            ext = "." + formato
-            if i == 0:
-                nombre_destino = f"{self.sku_seleccionado}_main{ext}"
-            else:
-                nombre_destino = f"{self.sku_seleccionado}_{i:02d}{ext}"
-            dest_path = os.path.join(self.carpeta_actual, nombre_destino)
-            try:
-                img = Image.open(img_src)
-                img = img.convert("RGB")
-                if not self.guardar_original:
-                    img = img.resize((ancho, alto), Image.Resampling.LANCZOS)
-                # Guardar en formato elegido
-                if formato in ["jpg", "jpeg"]:
-                    img.save(dest_path, quality=calidad)
-                elif formato == "webp":
-                    img.save(dest_path, quality=calidad, format="WEBP")
-                else:
-                    img.save(dest_path)
-                nuevas_imagenes.append(dest_path)
-            except Exception as e:
-                QMessageBox.warning(self, "Error", f"No se pudo procesar {img_src}: {e}")
-        # Sincroniza self.imagenes al nuevo orden y rutas
-        self.imagenes = nuevas_imagenes
-        self.guardar_metadatos(formato)
-        self.actualizar_lista_imagenes()
-        QMessageBox.information(self, "Listo", "Imágenes optimizadas y guardadas.")
+        origenes = [self.lista_imagenes.item(i).data(Qt.ItemDataRole.UserRole)
+                    for i in range(self.lista_imagenes.count())]
+        if not origenes:
+            QMessageBox.information(self, "Sin imágenes", "No hay imágenes para optimizar.")
+            return
+        self.iniciar_optimizacion([(self.sku_seleccionado, self.carpeta_actual, origenes)], opciones)
 
-    def guardar_metadatos(self, formato):
-        if not self.carpeta_actual:
+    def optimizar_catalogo(self):
+        opciones = self.opciones_guardado()
+        lotes = lotes_catalogo(self.productos, self.imagenes_raiz)
+        if not lotes:
+            QMessageBox.information(self, "Sin imágenes", "Ningún SKU tiene imágenes para optimizar.")
             return
-        if not os.path.exists(self.carpeta_actual):
+        total = sum(len(origenes) for _, _, origenes in lotes)
+        resp = QMessageBox.question(
+            self, "Optimizar catálogo",
+            f"Se procesarán hasta {total} imágenes en {len(lotes)} carpetas de SKU. ¿Continuar?",
+            QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No
+        )
+        if resp == QMessageBox.StandardButton.Yes:
+            self.iniciar_optimizacion(lotes, opciones)
+
+    def iniciar_optimizacion(self, lotes, opciones):
+        self.worker = OptimizadorWorker(lotes, opciones)
+        self.worker.progreso.connect(self.actualizar_progreso)
+        self.worker.terminado.connect(self.optimizacion_terminada)
+        self.btn_guardar.setEnabled(False)
+        self.btn_catalogo.setEnabled(False)
+        self.btn_cancelar.setEnabled(True)
+        self.progress_bar.setRange(0, sum(len(origenes) for _, _, origenes in lotes))
+        self.progress_bar.setValue(0)
+        self.progress_bar.setVisible(True)
+        self.worker.start()
+
+    def actualizar_progreso(self, hechas, total):
+        self.progress_bar.setMaximum(total)
+        self.progress_bar.setValue(hechas)
+
+    def cancelar_optimizacion(self):
+        if self.worker:
+            self.worker.cancelar()
+            self.btn_cancelar.setEnabled(False)
+
+    def optimizacion_terminada(self, resumen):
+        self.btn_guardar.setEnabled(True)
+        self.btn_catalogo.setEnabled(True)
+        self.btn_cancelar.setEnabled(False)
+        self.progress_bar.setVisible(False)
+        self.worker = None
+        if resumen["cancelado"]:
+            QMessageBox.information(self, "Cancelado", "Optimización cancelada. No se modificó ninguna carpeta.")
             return
-        imgs = sorted([f for f in os.listdir(self.carpeta_actual) if f.lower().endswith(f'.{formato}')])
-        main_img = next((f for f in imgs if "_main" in f), imgs[0] if imgs else "")
-        meta = {
-            "imagenes": imgs,
-            "principal": main_img
-        }
-        with open(os.path.join(self.carpeta_actual, "imagenes.json"), "w", encoding="utf-8") as f:
-            json.dump(meta, f, ensure_ascii=False, indent=2)
+        # Sincroniza self.imagenes al nuevo orden y rutas
+        if self.carpeta_actual in resumen["carpetas"]:
+            self.imagenes = resumen["carpetas"][self.carpeta_actual]
+            self.actualizar_lista_imagenes()
+        if resumen["errores"]:
+            detalle = "\n".join(f"{os.path.basename(o)}: {e}" for o, e in resumen["errores"][:10])
+            QMessageBox.warning(self, "Error", f"No se pudieron procesar {len(resumen['errores'])} imágenes:\n{detalle}")
+        mensaje = "Imágenes optimizadas y guardadas."
+        if resumen["omitidas"]:
+            mensaje += f"\n{resumen['omitidas']} imágenes sin cambios no se volvieron a procesar."
+        QMessageBox.information(self, "Listo", mensaje)
 
     def cambiar_directorio_raiz(self):
         directory = QFileDialog.getExistingDirectory(self, "Seleccionar directorio raíz de imágenes")
@@ -1,20 +1,10 @@
-import os
-import json
-import re
 from PyQt6.QtWidgets import (
     QWidget, QVBoxLayout, QLabel, QListWidget, QHBoxLayout, QPushButton,
     QMessageBox, QLineEdit, QApplication
 )
 from PyQt6.QtCore import Qt
-
-DATA_DIR = "datos"
-PRODUCTOS_FILE = os.path.join(DATA_DIR, "productos.json")
-MARCAS_FILE = os.path.join(DATA_DIR, "marcas.json")
-NOMBRES_PRODUCTO_FILE = os.path.join(DATA_DIR, "nombres_producto.json")
-TECNICAS_FILE = os.path.join(DATA_DIR, "tecnicas.json")
-TAMANOS_FILE = os.path.join(DATA_DIR, "tamanos.json")
-COLORES_FILE = os.path.join(DATA_DIR, "colores.json")
-FORMAS_FILE = os.path.join(DATA_DIR, "formas.json")
+from utils.catalogo import obtener_catalogo
+from utils.skus import cargar_catalogos_sku, calcular_sku, actualizar_skus
 
 class SkuWindow(QWidget):
     def __init__(self):
@@ -24,32 +14,17 @@ class SkuWindow(QWidget):
 
         # Cargar catálogos y productos
         self.productos = []
-        self.marcas = []
-        self.nombres_producto = []
-        self.tecnicas = []
-        self.tamanos = []
-        self.colores = []
-        self.formas = []
+        self.catalogos = {}
 
         self.filtered_indices = []  # Para mapear lista filtrada al índice real
 
         self.load_catalogs_and_products()
         self.init_ui()
-
-    def load_json(self, file, default):
-        if os.path.exists(file):
-            with open(file, "r", encoding="utf-8") as f:
-                return json.load(f)
-        return default
+        obtener_catalogo().productos_cambiados.connect(self.al_cambiar_catalogo)
 
     def load_catalogs_and_products(self):
-        self.productos = self.load_json(PRODUCTOS_FILE, [])
-        self.marcas = self.load_json(MARCAS_FILE, ["Sin marca"])
-        self.nombres_producto = self.load_json(NOMBRES_PRODUCTO_FILE, ["Playera", "Taza", "Poster", "Sudadera"])
-        self.tecnicas = self.load_json(TECNICAS_FILE, ["Sublimación", "DTF", "Vinil"])
-        self.tamanos = self.load_json(TAMANOS_FILE, ["Chico", "Mediano", "Grande"])
-        self.colores = self.load_json(COLORES_FILE, ["Blanco", "Negro", "Rojo"])
-        self.formas = self.load_json(FORMAS_FILE, ["Redondo", "Rectangular", "Cuadrado"])
+        self.productos = obtener_catalogo().productos()
+        self.catalogos = cargar_catalogos_sku()
 
     def init_ui(self):
         main_layout = QVBoxLayout(self)
@@ -98,70 +73,8 @@ class SkuWindow(QWidget):
         btn_actualizar.clicked.connect(self.actualizar_todos_los_skus)
         main_layout.addWidget(btn_actualizar)
 
-    def catalog_index_code(self, value, catalog, letter):
-        try:
-            idx = catalog.index(value)
-        except ValueError:
-            idx = 0
-        return f"{idx+1:02d}{letter}"
-
-    def producto_index_code(self, value):
-        try:
-            idx = self.nombres_producto.index(value)
-        except ValueError:
-            idx = 0
-        return f"{idx+1:02d}P"
-
-    def tecnica_index_code(self, value):
-        try:
-            idx = self.tecnicas.index(value)
-        except ValueError:
-            idx = 0
-        return f"{idx+1:02d}T"
-
-    def color_index_code(self, value):
-        try:
-            idx = self.colores.index(value)
-        except ValueError:
-            idx = 0
-        return f"{idx+1:02d}C"
-
-    def tamano_index_code(self, value):
-        try:
-            idx = self.tamanos.index(value)
-        except ValueError:
-            idx = 0
-        return f"{idx+1:02d}S"
-
-    def forma_index_code(self, value):
-        try:
-            idx = self.formas.index(value)
-        except ValueError:
-            idx = 0
-        return f"{idx+1:02d}F"
-
-    def diseño_code(self, value):
-        if not value:
-            return "DSN"
-        d = value.replace(" ", "").upper()
-        # Quita acentos básicos
-        d = re.sub(r'[ÁÀÂÄ]', 'A', d)
-        d = re.sub(r'[ÉÈÊË]', 'E', d)
-        d = re.sub(r'[ÍÌÎÏ]', 'I', d)
-        d = re.sub(r'[ÓÒÔÖ]', 'O', d)
-        d = re.sub(r'[ÚÙÛÜ]', 'U', d)
-        d = re.sub(r'[^A-Z0-9]', '', d)  # Solo letras y números
-        return d[:3]
-
     def calcular_sku(self, producto):
-        cod_marca = self.catalog_index_code(producto.get("marca", ""), self.marcas, "M")
-        cod_producto = self.producto_index_code(producto.get("nombre", ""))
-        cod_tecnica = self.tecnica_index_code(producto.get("tecnica", ""))
-        cod_color = self.color_index_code(producto.get("color", ""))
-        cod_tamano = self.tamano_index_code(producto.get("tamano", ""))
-        cod_forma = self.forma_index_code(producto.get("forma", ""))
-        cod_diseno = self.diseño_code(producto.get("diseno", ""))
-        return f"{cod_marca}-{cod_producto}-{cod_tecnica}-{cod_color}-{cod_tamano}-{cod_forma}-{cod_diseno}"
+        return calcular_sku(producto, self.catalogos)
 
     def refresh_product_list(self):
         filtro = self.search_input.text().strip().upper()
@@ -203,7 +116,12 @@ class SkuWindow(QWidget):
         QApplication.clipboard().setText(sku)
         QMessageBox.information(self, "Copiado", f"SKU '{sku}' copiado al portapapeles.")
 
+    def al_cambiar_catalogo(self):
+        self.productos = obtener_catalogo().productos()
+        self.refresh_product_list()
+
     def reload_and_refresh(self):
+        obtener_catalogo().refrescar()
         self.load_catalogs_and_products()
         self.refresh_product_list()
         self.sku_input.clear()
@@ -214,10 +132,8 @@ class SkuWindow(QWidget):
             return
 
         # Actualiza todos los SKUs en el JSON
-        for prod in self.productos:
-            prod["sku"] = self.calcular_sku(prod)
+        actualizar_skus(self.productos, self.catalogos)
 
-        with open(PRODUCTOS_FILE, "w", encoding="utf-8") as f:
-            json.dump(self.productos, f, ensure_ascii=False, indent=2)
+        obtener_catalogo().guardar(self.productos)
         QMessageBox.information(self, "Listo", "Todos los SKUs fueron actualizados en productos.json.\nAhora puedes usar el módulo de reescalado sin problemas.")
         self.reload_and_refresh()
\ No newline at end of file
@@ -0,0 +1,627 @@
+import uuid
+import numpy as np
+from PyQt6.QtWidgets import (
+    QWidget, QVBoxLayout, QHBoxLayout, QLabel, QLineEdit, QComboBox, QTableView,
+    QHeaderView, QAbstractItemView, QDialog, QFormLayout, QDoubleSpinBox, QCheckBox,
+    QPushButton, QTableWidget, QTableWidgetItem, QFileDialog, QMessageBox, QDateTimeEdit,
+    QDialogButtonBox
+)
+from PyQt6.QtCore import Qt, QAbstractTableModel, QModelIndex, QTimer, QDateTime, pyqtSignal
+from PyQt6.QtGui import QFont
+from utils.catalogo import obtener_catalogo
+from utils.precios import (
+    MotorPrecios, NIVELES, FUENTES, guardar_parametros_precio, eliminar_parametros_precio, resolver_parametros
+)
+from utils.promociones import ALCANCES, NOMBRES_ALCANCE, validar_promocion
+
+# (campo, encabezado); el orden es el de las columnas de la tabla
+COLUMNAS = [
+    ("sku", "SKU"),
+    ("nombre", "Nombre"),
+    ("categoria", "Categoría"),
+    ("fuente", "Fuente"),
+    ("precio_base", "Precio base"),
+    ("descuento", "Desc. %"),
+    ("iva", "IVA %"),
+    ("envio", "Envío"),
+    ("otros", "Otros"),
+    ("precio_final", "Precio final"),
+    ("promocion", "Promoción"),
+]
+CAMPOS_TEXTO = ("sku", "nombre", "categoria")
+# Columnas que no son importes ni porcentajes del motor
+CAMPOS_ETIQUETA = CAMPOS_TEXTO + ("fuente", "promocion")
+CAMPOS_EDITABLES = ("precio_base", "descuento", "iva", "envio", "otros")
+CAMPOS_PORCENTAJE = ("descuento", "iva")
+# Mismos límites que los spin boxes del panel de precios
+LIMITES_CAMPO = {"precio_base": (0, 100000), "descuento": (0, 100), "iva": (0, 100),
+                 "envio": (0, 100000), "otros": (0, 100000)}
+NOMBRES_FUENTE = {"producto": "Producto", "categoria": "Categoría", "global": "Global", "": "—"}
+# Nivel de la cascada en el que se guardan las ediciones de la tabla
+NIVELES_EDICION = [("producto", "Producto"), ("categoria", "Categoría"), ("global", "Global")]
+# Espera tras la última tecla antes de filtrar
+FILTRO_MS = 150
+# (clave del resumen, encabezado) de la tabla por categoría de la simulación
+COLUMNAS_SIMULACION = [
+    ("productos", "Productos"),
+    ("cambian", "Cambian"),
+    ("total_antes", "Total actual"),
+    ("total_despues", "Total simulado"),
+    ("diferencia_total", "Diferencia"),
+    ("diferencia_pct", "Dif. %"),
+    ("diferencia_margen", "Dif. margen"),
+]
+# (clave, encabezado) de la tabla de promociones
+COLUMNAS_PROMOCION = [
+    ("nombre", "Nombre"),
+    ("alcance", "Alcance"),
+    ("objetivo", "Categoría / SKU"),
+    ("descuento", "Desc. %"),
+    ("inicio", "Inicio"),
+    ("fin", "Fin"),
+    ("prioridad", "Prioridad"),
+]
+OPCIONES_SUMAR_ENVIO = [(None, "Sin cambio"), (True, "Sumar en todas las reglas"), (False, "No sumar en ninguna")]
+
+
+class ModeloPrecios(QAbstractTableModel):
+    """
+    Tabla de precios del catálogo sobre las columnas de MotorPrecios. Solo
+    se piden a Python las celdas visibles; filtrar y ordenar se hacen con
+    NumPy sobre `visibles` (filas del motor en el orden mostrado), sin un
+    proxy que recorra fila por fila.
+    """
+    precios_cambiados = pyqtSignal(list)  # ruta de la regla guardada
+
+    def __init__(self, productos, precios, parent=None):
+        super().__init__(parent)
+        self.nivel_edicion = "producto"
+        self._orden = None  # (columna, Qt.SortOrder) del último sort
+        self.momento = None  # fecha de las promociones aplicadas; None: precios regulares
+        self.cargar(productos, precios)
+
+    def cargar(self, productos, precios):
+        self.beginResetModel()
+        self.precios = precios
+        self.motor = MotorPrecios(productos, precios, self.momento)
+        self.textos = {
+            campo: np.array([str(p.get(campo, "")) for p in productos], dtype=str)
+            for campo in CAMPOS_TEXTO
+        }
+        self.busqueda = np.char.lower(
+            np.char.add(np.char.add(self.textos["sku"], "\t"),
+                        np.char.add(np.char.add(self.textos["nombre"], "\t"), self.textos["categoria"]))
+        ) if productos else np.array([], dtype=str)
+        self.visibles = np.arange(len(productos))
+        self.endResetModel()
+
+    def total(self):
+        return len(self.motor)
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.visibles)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(COLUMNAS)
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if role == Qt.ItemDataRole.DisplayRole and orientation == Qt.Orientation.Horizontal:
+            return COLUMNAS[section][1]
+        return None
+
+    def fila_motor(self, index):
+        return int(self.visibles[index.row()])
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        campo = COLUMNAS[index.column()][0]
+        fila = self.fila_motor(index)
+        if role in (Qt.ItemDataRole.DisplayRole, Qt.ItemDataRole.EditRole):
+            if campo in CAMPOS_TEXTO:
+                return str(self.textos[campo][fila])
+            if campo == "fuente":
+                return NOMBRES_FUENTE[NIVELES[self.motor.fuente[fila]]]
+            if campo == "promocion":
+                return self.nombre_promocion(fila)
+            valor = self.motor.valor(campo, fila)
+            if role == Qt.ItemDataRole.EditRole:
+                return float(valor)
+            return f"{valor:.2f}" if campo in CAMPOS_PORCENTAJE else f"${valor:,.2f}"
+        if role == Qt.ItemDataRole.TextAlignmentRole and campo not in CAMPOS_ETIQUETA:
+            return int(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
+        if role == Qt.ItemDataRole.ToolTipRole and campo == "fuente":
+            return FUENTES[NIVELES[self.motor.fuente[fila]]]
+        if role == Qt.ItemDataRole.ToolTipRole and campo == "descuento" and self.motor.promocion[fila] >= 0:
+            return "Descuento de la promoción vigente; el regular se edita con las promociones desactivadas."
+        if role == Qt.ItemDataRole.FontRole and campo == "precio_final":
+            fuente = QFont()
+            fuente.setBold(True)
+            return fuente
+        return None
+
+    def flags(self, index):
+        flags = super().flags(index)
+        if index.isValid() and COLUMNAS[index.column()][0] in CAMPOS_EDITABLES:
+            # Con una promoción vigente la celda muestra su descuento, no el de la regla
+            if COLUMNAS[index.column()][0] != "descuento" or self.motor.promocion[self.fila_motor(index)] < 0:
+                flags |= Qt.ItemFlag.ItemIsEditable
+        return flags
+
+    def nombre_promocion(self, fila):
+        i = self.motor.promocion[fila]
+        if i < 0:
+            return ""
+        indice = self.motor.indice_promociones()
+        return indice.promociones[i]["nombre"] or indice.ids[i]
+
+    def en_momento(self, momento):
+        """Aplica las promociones vigentes en `momento` (None: precios regulares) y repinta."""
+        self.momento = momento
+        self.motor.en_momento(momento)
+        if self._orden:
+            self.sort(*self._orden)
+        if self.rowCount():
+            self.dataChanged.emit(self.index(0, 0), self.index(self.rowCount() - 1, len(COLUMNAS) - 1))
+
+    def ruta_edicion(self, fila):
+        if self.nivel_edicion == "producto":
+            return ["productos", str(self.textos["sku"][fila])]
+        if self.nivel_edicion == "categoria":
+            return ["categorias", str(self.textos["categoria"][fila])]
+        return ["global"]
+
+    def setData(self, index, value, role=Qt.ItemDataRole.EditRole):
+        if role != Qt.ItemDataRole.EditRole or not index.isValid():
+            return False
+        campo = COLUMNAS[index.column()][0]
+        if campo not in CAMPOS_EDITABLES:
+            return False
+        try:
+            valor = float(value)
+        except (TypeError, ValueError):
+            return False
+        minimo, maximo = LIMITES_CAMPO[campo]
+        if not minimo <= valor <= maximo:
+            return False
+        fila = self.fila_motor(index)
+        ruta = self.ruta_edicion(fila)
+        if ruta[-1] == "" and ruta[0] != "global":
+            return False  # producto sin SKU o sin categoría: no hay regla donde guardar
+        # Si el nivel aún no tiene regla se parte de lo que esta fila ya resuelve,
+        # para que cambiar un campo no mueva los demás
+        nodo = self.precios
+        for clave in ruta:
+            nodo = nodo.get(clave, {}) if isinstance(nodo, dict) else {}
+        if nodo:
+            parametros = dict(nodo)
+        else:
+            resuelta = self.motor.fila(fila)
+            parametros = {c: float(resuelta[c]) for c in CAMPOS_EDITABLES}
+            parametros.update(sumar_envio=resuelta["sumar_envio"], sumar_otros=resuelta["sumar_otros"])
+            if resuelta["promocion"] is not None:
+                # La regla guarda el descuento regular, no el de la promoción
+                regular, _ = resolver_parametros(self.precios, str(self.textos["sku"][fila]),
+                                                 str(self.textos["categoria"][fila]))
+                parametros["descuento"] = float(regular["descuento"])
+        parametros[campo] = valor
+        guardar_parametros_precio(self.precios, ruta, parametros)
+        self.aplicar_cambio(ruta)
+        self.precios_cambiados.emit(ruta)
+        return True
+
+    def aplicar_cambio(self, ruta):
+        """Recalcula las filas a las que afecta la regla en `ruta` y repinta."""
+        filas = self.motor.aplicar_cambio(ruta)
+        if len(filas) and self.rowCount():
+            # La vista solo vuelve a pedir las celdas que tiene en pantalla
+            self.dataChanged.emit(self.index(0, 0), self.index(self.rowCount() - 1, len(COLUMNAS) - 1))
+
+    def filtrar(self, texto="", fuente=None):
+        """Deja visibles las filas cuyo SKU, nombre o categoría contienen `texto` y de la fuente dada."""
+        self.beginResetModel()
+        mascara = np.ones(len(self.motor), dtype=bool)
+        texto = texto.strip().lower()
+        if texto:
+            mascara &= np.char.find(self.busqueda, texto) >= 0
+        if fuente is not None:
+            mascara &= self.motor.fuente == NIVELES.index(fuente)
+        visibles = np.flatnonzero(mascara)
+        if self._orden:
+            visibles = self._ordenar(visibles, *self._orden)
+        self.visibles = visibles
+        self.endResetModel()
+
+    def _ordenar(self, filas, columna, orden):
+        campo = COLUMNAS[columna][0]
+        if campo in CAMPOS_TEXTO:
+            claves = np.char.lower(self.textos[campo][filas])
+        elif campo == "fuente":
+            claves = self.motor.fuente[filas]
+        elif campo == "promocion":
+            claves = self.motor.promocion[filas]
+        else:
+            claves = self.motor.columnas[campo][filas]
+        filas = filas[np.argsort(claves, kind="stable")]
+        return filas[::-1] if orden == Qt.SortOrder.DescendingOrder else filas
+
+    def sort(self, column, order=Qt.SortOrder.AscendingOrder):
+        self.layoutAboutToBeChanged.emit()
+        self._orden = (column, order)
+        self.visibles = self._ordenar(self.visibles, column, order)
+        self.layoutChanged.emit()
+
+
+class SimulacionDialog(QDialog):
+    """
+    ¿Qué pasa si…? Cambia el IVA global, el descuento de una categoría o si
+    se suma el envío, y compara el precio final de todo el catálogo antes y
+    después. Trabaja sobre una copia de los precios: no guarda nada.
+    """
+
+    def __init__(self, productos, precios, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Simular cambios de precio")
+        self.setMinimumSize(720, 480)
+        self.productos = productos
+        self.precios = precios
+        self.resultado = None
+        layout = QVBoxLayout(self)
+
+        form = QFormLayout()
+        self.iva_check = QCheckBox("Cambiar a")
+        self.iva_spin = QDoubleSpinBox()
+        self.iva_spin.setRange(0, 100)
+        self.iva_spin.setDecimals(2)
+        self.iva_spin.setSuffix(" %")
+        self.iva_spin.setValue(float(precios.get("global", {}).get("iva", 16) or 0))
+        self.iva_spin.setEnabled(False)
+        self.iva_check.toggled.connect(self.iva_spin.setEnabled)
+        fila_iva = QHBoxLayout()
+        fila_iva.addWidget(self.iva_check)
+        fila_iva.addWidget(self.iva_spin, 1)
+        form.addRow("IVA global:", fila_iva)
+
+        self.categoria_combo = QComboBox()
+        self.categoria_combo.addItem("(ninguna)", userData=None)
+        for categoria in sorted({p.get("categoria", "") for p in productos if p.get("categoria")}):
+            self.categoria_combo.addItem(categoria, userData=categoria)
+        self.descuento_spin = QDoubleSpinBox()
+        self.descuento_spin.setRange(0, 100)
+        self.descuento_spin.setDecimals(2)
+        self.descuento_spin.setSuffix(" %")
+        self.descuento_spin.setEnabled(False)
+        self.categoria_combo.currentIndexChanged.connect(self.al_elegir_categoria)
+        fila_descuento = QHBoxLayout()
+        fila_descuento.addWidget(self.categoria_combo, 1)
+        fila_descuento.addWidget(self.descuento_spin)
+        form.addRow("Descuento de categoría:", fila_descuento)
+
+        self.envio_combo = QComboBox()
+        for valor, nombre in OPCIONES_SUMAR_ENVIO:
+            self.envio_combo.addItem(nombre, userData=valor)
+        form.addRow("Envío en el precio:", self.envio_combo)
+        layout.addLayout(form)
+
+        botones = QHBoxLayout()
+        self.btn_calcular = QPushButton("Simular")
+        self.btn_calcular.clicked.connect(self.simular)
+        botones.addWidget(self.btn_calcular)
+        self.btn_csv = QPushButton("Exportar CSV…")
+        self.btn_csv.setEnabled(False)
+        self.btn_csv.clicked.connect(self.exportar_csv)
+        botones.addWidget(self.btn_csv)
+        botones.addStretch()
+        layout.addLayout(botones)
+
+        self.resumen_label = QLabel("Elige un cambio y pulsa Simular.")
+        self.resumen_label.setWordWrap(True)
+        layout.addWidget(self.resumen_label)
+
+        self.tabla_categorias = QTableWidget(0, len(COLUMNAS_SIMULACION) + 1)
+        self.tabla_categorias.setHorizontalHeaderLabels(["Categoría"] + [nombre for _, nombre in COLUMNAS_SIMULACION])
+        self.tabla_categorias.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        self.tabla_categorias.verticalHeader().setVisible(False)
+        self.tabla_categorias.horizontalHeader().setSectionResizeMode(0, QHeaderView.ResizeMode.Stretch)
+        layout.addWidget(self.tabla_categorias, 1)
+
+    def al_elegir_categoria(self):
+        categoria = self.categoria_combo.currentData()
+        self.descuento_spin.setEnabled(categoria is not None)
+        if categoria is not None:
+            parametros, _ = resolver_parametros(self.precios, None, categoria)
+            self.descuento_spin.setValue(float(parametros.get("descuento", 0) or 0))
+
+    def escenario(self):
+        escenario = {}
+        if self.iva_check.isChecked():
+            escenario["global"] = {"iva": self.iva_spin.value()}
+        categoria = self.categoria_combo.currentData()
+        if categoria is not None:
+            escenario["categorias"] = {categoria: {"descuento": self.descuento_spin.value()}}
+        if self.envio_combo.currentData() is not None:
+            escenario["forzar"] = {"sumar_envio": self.envio_combo.currentData()}
+        return escenario
+
+    def simular(self):
+        from utils.simulacion import simular
+        escenario = self.escenario()
+        if not escenario:
+            QMessageBox.information(self, "Sin cambios", "Elige al menos un cambio para simular.")
+            return
+        self.resultado = simular(self.productos, self.precios, escenario)
+        r = self.resultado["resumen"]
+        pct = f", {r['diferencia_pct']:+}%" if r["diferencia_pct"] is not None else ""
+        self.resumen_label.setText(
+            f"Cambian {r['cambian']} de {r['productos']} productos: {r['suben']} suben y {r['bajan']} bajan.\n"
+            f"Suma de precios finales: ${r['total_antes']:,} → ${r['total_despues']:,} "
+            f"({r['diferencia_total']:+,}{pct}); promedio por producto {r['diferencia_promedio']:+,}.\n"
+            f"Mayor subida ${r['mayor_subida']:,}, mayor bajada ${r['mayor_bajada']:,}.\n"
+            f"Margen sin IVA ni envío: ${r['margen_antes']:,} → ${r['margen_despues']:,} ({r['diferencia_margen']:+,})."
+        )
+        categorias = [(c, res) for c, res in self.resultado["por_categoria"].items() if res["cambian"]]
+        self.tabla_categorias.setRowCount(len(categorias))
+        for fila, (categoria, res) in enumerate(categorias):
+            self.tabla_categorias.setItem(fila, 0, QTableWidgetItem(categoria or "(sin categoría)"))
+            for columna, (clave, _) in enumerate(COLUMNAS_SIMULACION, 1):
+                valor = res[clave]
+                if clave in ("productos", "cambian"):
+                    texto = str(valor)
+                elif valor is None:
+                    texto = "—"
+                elif clave == "diferencia_pct":
+                    texto = f"{valor:+}"
+                elif clave.startswith("diferencia"):
+                    texto = f"{valor:+,}"
+                else:
+                    texto = f"${valor:,}"
+                item = QTableWidgetItem(texto)
+                item.setTextAlignment(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
+                self.tabla_categorias.setItem(fila, columna, item)
+        self.btn_csv.setEnabled(True)
+
+    def exportar_csv(self):
+        from utils.simulacion import exportar_csv
+        fname, _ = QFileDialog.getSaveFileName(self, "Exportar simulación", "simulacion_precios.csv", "CSV (*.csv)")
+        if not fname:
+            return
+        try:
+            filas = exportar_csv(self.resultado, fname)
+        except OSError as e:
+            QMessageBox.warning(self, "Error", f"No se pudo escribir el CSV:\n{e}")
+            return
+        QMessageBox.information(self, "Exportado", f"{filas} productos con cambio exportados a {fname}")
+
+
+class PromocionesDialog(QDialog):
+    """
+    Alta, edición y baja de las promociones programadas de precios.json.
+    Las fechas se escriben en ISO (2026-11-13 o 2026-11-13T10:00); vacías
+    dejan la promoción abierta por ese lado.
+    """
+
+    def __init__(self, precios, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Promociones programadas")
+        self.setMinimumSize(820, 400)
+        self.precios = precios
+        self.guardadas = []  # rutas cambiadas al guardar, para avisar a la tabla
+        layout = QVBoxLayout(self)
+
+        self.tabla = QTableWidget(0, len(COLUMNAS_PROMOCION))
+        self.tabla.setHorizontalHeaderLabels([nombre for _, nombre in COLUMNAS_PROMOCION])
+        self.tabla.verticalHeader().setVisible(False)
+        self.tabla.horizontalHeader().setSectionResizeMode(0, QHeaderView.ResizeMode.Stretch)
+        for promo_id, promo in (precios.get("promociones") or {}).items():
+            self.agregar_fila(promo_id, promo)
+        layout.addWidget(self.tabla, 1)
+
+        botones = QHBoxLayout()
+        btn_agregar = QPushButton("Agregar")
+        btn_agregar.clicked.connect(lambda: self.agregar_fila(None, {}))
+        botones.addWidget(btn_agregar)
+        btn_quitar = QPushButton("Quitar")
+        btn_quitar.clicked.connect(self.quitar_fila)
+        botones.addWidget(btn_quitar)
+        botones.addStretch()
+        layout.addLayout(botones)
+
+        self.btn_box = QDialogButtonBox(QDialogButtonBox.StandardButton.Save | QDialogButtonBox.StandardButton.Cancel)
+        self.btn_box.accepted.connect(self.guardar)
+        self.btn_box.rejected.connect(self.reject)
+        layout.addWidget(self.btn_box)
+
+    def agregar_fila(self, promo_id, promo):
+        fila = self.tabla.rowCount()
+        self.tabla.insertRow(fila)
+        for columna, (clave, _) in enumerate(COLUMNAS_PROMOCION):
+            if clave == "alcance":
+                combo = QComboBox()
+                for alcance in ALCANCES:
+                    combo.addItem(NOMBRES_ALCANCE[alcance], userData=alcance)
+                combo.setCurrentIndex(max(0, combo.findData(promo.get("alcance", "global"))))
+                self.tabla.setCellWidget(fila, columna, combo)
+                continue
+            valor = promo.get(clave, "")
+            item = QTableWidgetItem("" if valor is None else str(valor))
+            if clave == "nombre":
+                item.setData(Qt.ItemDataRole.UserRole, promo_id)
+            self.tabla.setItem(fila, columna, item)
+
+    def quitar_fila(self):
+        fila = self.tabla.currentRow()
+        if fila >= 0:
+            self.tabla.removeRow(fila)
+
+    def promocion_fila(self, fila):
+        promo = {}
+        for columna, (clave, _) in enumerate(COLUMNAS_PROMOCION):
+            if clave == "alcance":
+                promo[clave] = self.tabla.cellWidget(fila, columna).currentData()
+            else:
+                item = self.tabla.item(fila, columna)
+                promo[clave] = item.text().strip() if item else ""
+        promo["descuento"] = promo["descuento"].replace(",", ".")
+        return promo
+
+    def guardar(self):
+        nuevas = {}
+        for fila in range(self.tabla.rowCount()):
+            promo = self.promocion_fila(fila)
+            try:
+                normal = validar_promocion(promo)
+            except ValueError as e:
+                QMessageBox.warning(self, "Promoción inválida", f"Fila {fila + 1}: {e}")
+                return
+            promo_id = self.tabla.item(fila, 0).data(Qt.ItemDataRole.UserRole) or uuid.uuid4().hex[:8]
+            # Se guarda lo escrito (fechas en texto), con números ya validados
+            promo.update(descuento=normal["descuento"], prioridad=normal["prioridad"],
+                         objetivo=normal["objetivo"])
+            nuevas[promo_id] = promo
+        actuales = self.precios.get("promociones") or {}
+        for promo_id in list(actuales):
+            if promo_id not in nuevas:
+                eliminar_parametros_precio(self.precios, ["promociones", promo_id])
+                self.guardadas.append(["promociones", promo_id])
+        for promo_id, promo in nuevas.items():
+            if actuales.get(promo_id) != promo:
+                guardar_parametros_precio(self.precios, ["promociones", promo_id], promo)
+                self.guardadas.append(["promociones", promo_id])
+        self.accept()
+
+
+class TablaPreciosWindow(QWidget):
+    """Precios de todo el catálogo en una tabla filtrable, ordenable y editable."""
+
+    def __init__(self, productos=None, precios=None, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Tabla de precios")
+        self.setMinimumSize(900, 600)
+        if productos is None:
+            productos = obtener_catalogo().productos()
+        if precios is None:
+            from utils.precios import cargar_precios
+            precios = cargar_precios()
+        self.modelo = ModeloPrecios(productos, precios, self)
+        self.init_ui()
+        self.actualizar_conteo()
+        obtener_catalogo().productos_cambiados.connect(self.al_cambiar_catalogo)
+
+    def init_ui(self):
+        main = QVBoxLayout(self)
+        main.setContentsMargins(10, 10, 10, 10)
+
+        barra = QHBoxLayout()
+        self.filtro = QLineEdit()
+        self.filtro.setPlaceholderText("Filtrar por SKU, nombre o categoría")
+        self.filtro.setClearButtonEnabled(True)
+        barra.addWidget(self.filtro, 1)
+        self.fuente_combo = QComboBox()
+        self.fuente_combo.addItem("Todas las fuentes", userData=None)
+        for nivel in ("producto", "categoria", "global", ""):
+            self.fuente_combo.addItem(NOMBRES_FUENTE[nivel], userData=nivel)
+        self.fuente_combo.currentIndexChanged.connect(self.aplicar_filtro)
+        barra.addWidget(self.fuente_combo)
+        barra.addWidget(QLabel("Guardar ediciones en:"))
+        self.nivel_combo = QComboBox()
+        for nivel, nombre in NIVELES_EDICION:
+            self.nivel_combo.addItem(nombre, userData=nivel)
+        self.nivel_combo.setToolTip("Nivel de la cascada en el que se guarda un valor editado en la tabla")
+        self.nivel_combo.currentIndexChanged.connect(self.cambiar_nivel)
+        barra.addWidget(self.nivel_combo)
+        self.btn_simular = QPushButton("Simular cambios…")
+        self.btn_simular.setToolTip("Comparar los precios actuales con un cambio hipotético sin guardarlo")
+        self.btn_simular.clicked.connect(self.abrir_simulacion)
+        barra.addWidget(self.btn_simular)
+        main.addLayout(barra)
+
+        barra_promociones = QHBoxLayout()
+        self.promociones_check = QCheckBox("Aplicar promociones vigentes al")
+        self.promociones_check.toggled.connect(self.cambiar_momento)
+        barra_promociones.addWidget(self.promociones_check)
+        self.momento_edit = QDateTimeEdit(QDateTime.currentDateTime())
+        self.momento_edit.setCalendarPopup(True)
+        self.momento_edit.setDisplayFormat("yyyy-MM-dd HH:mm")
+        self.momento_edit.dateTimeChanged.connect(self.cambiar_momento)
+        barra_promociones.addWidget(self.momento_edit)
+        barra_promociones.addStretch()
+        self.btn_promociones = QPushButton("Promociones…")
+        self.btn_promociones.clicked.connect(self.abrir_promociones)
+        barra_promociones.addWidget(self.btn_promociones)
+        self.btn_ofertas = QPushButton("Exportar ofertas WooCommerce…")
+        self.btn_ofertas.setToolTip("CSV con precio regular, precio de oferta y fechas de la oferta de cada SKU")
+        self.btn_ofertas.clicked.connect(self.exportar_ofertas)
+        barra_promociones.addWidget(self.btn_ofertas)
+        main.addLayout(barra_promociones)
+
+        # Filtrar al dejar de escribir, no en cada tecla
+        self.temporizador_filtro = QTimer(self)
+        self.temporizador_filtro.setSingleShot(True)
+        self.temporizador_filtro.setInterval(FILTRO_MS)
+        self.temporizador_filtro.timeout.connect(self.aplicar_filtro)
+        self.filtro.textChanged.connect(self.temporizador_filtro.start)
+
+        self.tabla = QTableView()
+        self.tabla.setModel(self.modelo)
+        self.tabla.setSortingEnabled(True)
+        self.tabla.setAlternatingRowColors(True)
+        self.tabla.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
+        self.tabla.setEditTriggers(QAbstractItemView.EditTrigger.DoubleClicked
+                                   | QAbstractItemView.EditTrigger.EditKeyPressed)
+        # Alto de fila fijo: la vista no mide filas fuera de pantalla
+        self.tabla.verticalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Fixed)
+        self.tabla.verticalHeader().setDefaultSectionSize(24)
+        self.tabla.verticalHeader().setVisible(False)
+        cabecera = self.tabla.horizontalHeader()
+        cabecera.setSectionResizeMode(QHeaderView.ResizeMode.Interactive)
+        cabecera.setSectionResizeMode(1, QHeaderView.ResizeMode.Stretch)
+        for columna, ancho in ((0, 220), (2, 120), (3, 90)):
+            self.tabla.setColumnWidth(columna, ancho)
+        main.addWidget(self.tabla, 1)
+
+        self.conteo_label = QLabel()
+        self.conteo_label.setStyleSheet("color:#888;")
+        main.addWidget(self.conteo_label)
+
+    def aplicar_filtro(self):
+        self.modelo.filtrar(self.filtro.text(), self.fuente_combo.currentData())
+        self.actualizar_conteo()
+
+    def cambiar_nivel(self):
+        self.modelo.nivel_edicion = self.nivel_combo.currentData()
+
+    def actualizar_conteo(self):
+        self.conteo_label.setText(f"{self.modelo.rowCount()} de {self.modelo.total()} productos")
+
+    def cambiar_momento(self):
+        momento = self.momento_edit.dateTime().toPyDateTime() if self.promociones_check.isChecked() else None
+        self.modelo.en_momento(momento)
+
+    def abrir_promociones(self):
+        dialogo = PromocionesDialog(self.modelo.precios, self)
+        if dialogo.exec() and dialogo.guardadas:
+            for ruta in dialogo.guardadas:
+                self.modelo.aplicar_cambio(ruta)
+                self.modelo.precios_cambiados.emit(ruta)
+
+    def exportar_ofertas(self):
+        from utils.exportacion import ofertas_woocommerce, exportar_ofertas_csv
+        fname, _ = QFileDialog.getSaveFileName(self, "Exportar ofertas", "ofertas_woocommerce.csv", "CSV (*.csv)")
+        if not fname:
+            return
+        desde = self.momento_edit.dateTime().toPyDateTime() if self.promociones_check.isChecked() else None
+        try:
+            filas = exportar_ofertas_csv(
+                ofertas_woocommerce(obtener_catalogo().productos(), self.modelo.precios, desde), fname)
+        except OSError as e:
+            QMessageBox.warning(self, "Error", f"No se pudo escribir el CSV:\n{e}")
+            return
+        QMessageBox.information(self, "Exportado", f"{filas} ofertas exportadas a {fname}")
+
+    def abrir_simulacion(self):
+        dialogo = SimulacionDialog(obtener_catalogo().productos(), self.modelo.precios, self)
+        dialogo.exec()
+
+    def al_cambiar_catalogo(self):
+        self.modelo.cargar(obtener_catalogo().productos(), self.modelo.precios)
+        self.aplicar_filtro()
@@ -1,17 +1,15 @@
 import os
-import json
-import datetime
 from PyQt6.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QLabel, QPushButton, QLineEdit,
     QComboBox, QTextEdit, QMessageBox
 )
 from PyQt6.QtCore import Qt, QMimeData
 from PyQt6.QtGui import QGuiApplication
+from utils.catalogo import obtener_catalogo
+from utils.exportacion import DEFAULT_URL_BASE, urls_imagenes
 
 DATA_DIR = "datos"
-PRODUCTOS_FILE = os.path.join(DATA_DIR, "productos.json")
 DEFAULT_IMAGES_ROOT = os.path.abspath("imagenes_productos")
-DEFAULT_URL_BASE = "http://skillhub-mex.com/wp-content/uploads/"
 
 class UrlsWindow(QWidget):
     def __init__(self):
@@ -25,6 +23,11 @@ class UrlsWindow(QWidget):
         self.init_ui()
         self.cargar_productos()
         self.actualizar_urls()
+        obtener_catalogo().productos_cambiados.connect(self.cargar_productos)
+
+    def refrescar_productos(self):
+        obtener_catalogo().refrescar()
+        self.cargar_productos()
 
     def init_ui(self):
         layout = QVBoxLayout(self)
@@ -45,7 +48,7 @@ class UrlsWindow(QWidget):
         # --- BOTÓN REFRESCAR PRODUCTOS ---
         self.btn_refresh_productos = QPushButton("Refrescar productos")
         self.btn_refresh_productos.setToolTip("Volver a cargar la lista de productos")
-        self.btn_refresh_productos.clicked.connect(self.cargar_productos)
+        self.btn_refresh_productos.clicked.connect(self.refrescar_productos)
         prod_layout.addWidget(self.btn_refresh_productos)
         # ----------------------------------
         layout.addLayout(prod_layout)
@@ -63,10 +66,7 @@ class UrlsWindow(QWidget):
         layout.addLayout(btn_layout)
 
     def cargar_productos(self):
-        self.productos = []
-        if os.path.exists(PRODUCTOS_FILE):
-            with open(PRODUCTOS_FILE, "r", encoding="utf-8") as f:
-                self.productos = json.load(f)
+        self.productos = obtener_catalogo().productos()
         self.producto_combo.blockSignals(True)
         self.producto_combo.clear()
         for prod in self.productos:
@@ -100,15 +100,7 @@ class UrlsWindow(QWidget):
             self.urls_edit.setPlainText("")
             return
         # Año/mes actual
-        now = datetime.datetime.now()
-        anio = now.strftime("%Y")
-        mes = now.strftime("%m")
-        base = self.url_base_edit.text().rstrip("/") + f"/{anio}/{mes}/"
-
-        urls = []
-        for f in os.listdir(self.carpeta_actual):
-            if f.lower().endswith(('.png', '.jpg', '.jpeg', '.webp', '.bmp', '.gif')):
-                urls.append(base + f)
+        urls = urls_imagenes(self.carpeta_actual, self.url_base_edit.text())
         self.urls_edit.setPlainText("\n".join(urls))
 
     def copiar_urls(self):
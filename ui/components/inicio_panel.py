@@ -1,9 +1,6 @@
-import os
-import json
 from PyQt6.QtWidgets import QWidget, QVBoxLayout, QLabel, QPushButton, QHBoxLayout
 from PyQt6.QtCore import pyqtSignal
-
-PRODUCTOS_FILE = "datos/productos.json"
+from utils.catalogo import obtener_catalogo
 
 class InicioPanel(QWidget):
     nuevo_producto_clicked = pyqtSignal()
@@ -44,12 +41,8 @@ class InicioPanel(QWidget):
         self.layout.addStretch()
 
         self.actualizar_estadisticas()
+        obtener_catalogo().productos_cambiados.connect(self.actualizar_estadisticas)
 
     def actualizar_estadisticas(self):
-        # Carga el número de productos reales
-        if os.path.exists(PRODUCTOS_FILE):
-            with open(PRODUCTOS_FILE, "r", encoding="utf-8") as f:
-                productos = json.load(f)
-            self.lbl_productos.setText(str(len(productos)))
-        else:
-            self.lbl_productos.setText("0")
\ No newline at end of file
+        # Número de productos reales del catálogo compartido
+        self.lbl_productos.setText(str(len(obtener_catalogo())))
\ No newline at end of file
@@ -0,0 +1,35 @@
+import importlib
+from PyQt6.QtWidgets import QWidget, QVBoxLayout, QLabel
+from PyQt6.QtCore import Qt
+
+
+class PanelDiferido(QWidget):
+    """
+    Página del QStackedWidget que construye el módulo real la primera vez
+    que se necesita. El módulo se importa en ese momento, así que sus
+    dependencias pesadas (PIL, qrcode, cairosvg...) no cuentan en el arranque.
+    """
+
+    def __init__(self, modulo, clase, parent=None):
+        super().__init__(parent)
+        self.modulo = modulo
+        self.clase = clase
+        self.widget = None
+        self._layout = QVBoxLayout(self)
+        self._layout.setContentsMargins(0, 0, 0, 0)
+        self._placeholder = QLabel("Cargando…")
+        self._placeholder.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        self._layout.addWidget(self._placeholder)
+
+    def construido(self):
+        return self.widget is not None
+
+    def construir(self):
+        """Importa e instancia el módulo si aún no existe. Devuelve el widget."""
+        if self.widget is None:
+            clase = getattr(importlib.import_module(self.modulo), self.clase)
+            self.widget = clase()
+            self._layout.removeWidget(self._placeholder)
+            self._placeholder.deleteLater()
+            self._layout.addWidget(self.widget)
+        return self.widget
@@ -1,19 +1,29 @@
 from PyQt6.QtWidgets import QMainWindow, QWidget, QHBoxLayout, QVBoxLayout, QStackedWidget
+from PyQt6.QtCore import QTimer
 from ui.components.navigation_panel import NavigationPanel
 from ui.components.inicio_panel import InicioPanel
 from ui.components.logo_panel import LogoPanel
-from modulos.productos import ProductosWindow
-from modulos.sku import SkuWindow
-from modulos.reescalado import ReescaladoWindow
-from modulos.mockup_generator import MockupGeneratorWindow
-from modulos.qr_generator import QrGeneratorWindow
-from modulos.urls import UrlsWindow
-from modulos.medidas import MedidasWindow
-from modulos.precios import PreciosWindow
-from modulos.descripcion import DescripcionWindow  # <--- NUEVO: importa tu módulo de descripción
+from ui.components.panel_diferido import PanelDiferido
+
+# Módulos en el ORDEN DEL FLUJO (índice 1 en adelante; el 0 es el panel de inicio).
+# Se importan y construyen la primera vez que se navega a ellos.
+PANELES = [
+    ("modulos.productos", "ProductosWindow"),              # index 1 - Datos de producto
+    ("modulos.sku", "SkuWindow"),                          # index 2 - SKU y Códigos
+    ("modulos.reescalado", "ReescaladoWindow"),            # index 3 - Imágenes
+    ("modulos.urls", "UrlsWindow"),                        # index 4 - URLs
+    ("modulos.qr_generator", "QrGeneratorWindow"),         # index 5 - Publicar/Exportar
+    ("modulos.mockup_generator", "MockupGeneratorWindow"), # index 6 - Mockup Generator
+    ("modulos.medidas", "MedidasWindow"),                  # index 7 - Medidas de Producto
+    ("modulos.precios", "PreciosWindow"),                  # index 8 - Precios y Dinero
+    ("modulos.descripcion", "DescripcionWindow"),          # index 9 - Descripción/Contenido
+]
+
+# Retardo antes de precalentar en segundo plano los paneles aún no construidos
+PRECALENTAR_MS = 1500
 
 class MainWindow(QMainWindow):
-    def __init__(self):
+    def __init__(self, precalentar=True):
         super().__init__()
         self.setWindowTitle("Hub-Skill")
         self.setMinimumSize(1200, 800)
@@ -41,29 +51,15 @@ class MainWindow(QMainWindow):
         self.stacked_widget = QStackedWidget()
         main_layout.addWidget(self.stacked_widget, 1)
 
-        # Instanciar los módulos como widgets/paneles
+        # Solo el panel de inicio se construye ahora; el resto son páginas diferidas
         self.inicio_panel = InicioPanel()
-        self.productos_widget = ProductosWindow()
-        self.sku_widget = SkuWindow()
-        self.reescalado_widget = ReescaladoWindow()
-        self.urls_widget = UrlsWindow()
-        self.qr_widget = QrGeneratorWindow()
-        self.mockup_widget = MockupGeneratorWindow()
-        self.medidas_widget = MedidasWindow()
-        self.precios_widget = PreciosWindow()
-        self.descripcion_widget = DescripcionWindow()  # <--- NUEVO: instancia tu módulo
-
-        # Agregar los paneles al stacked_widget en el ORDEN DEL FLUJO
         self.stacked_widget.addWidget(self.inicio_panel)        # index 0 - Panel de inicio
-        self.stacked_widget.addWidget(self.productos_widget)    # index 1 - Datos de producto
-        self.stacked_widget.addWidget(self.sku_widget)          # index 2 - SKU y Códigos
-        self.stacked_widget.addWidget(self.reescalado_widget)   # index 3 - Imágenes
-        self.stacked_widget.addWidget(self.urls_widget)         # index 4 - URLs
-        self.stacked_widget.addWidget(self.qr_widget)           # index 5 - Publicar/Exportar
-        self.stacked_widget.addWidget(self.mockup_widget)       # index 6 - Mockup Generator
-        self.stacked_widget.addWidget(self.medidas_widget)      # index 7 - Medidas de Producto
-        self.stacked_widget.addWidget(self.precios_widget)      # index 8 - Precios y Dinero
-        self.stacked_widget.addWidget(self.descripcion_widget)  # index 9 - Descripción/Contenido
+        self.paneles = []
+        for modulo, clase in PANELES:
+            panel = PanelDiferido(modulo, clase)
+            self.paneles.append(panel)
+            self.stacked_widget.addWidget(panel)
+        self.stacked_widget.currentChanged.connect(self.construir_panel)
 
         # --- CONEXIONES DE NAVEGACIÓN ---
         self.navigation_panel.inicio_clicked.connect(self.ir_a_inicio)
@@ -80,6 +76,24 @@ class MainWindow(QMainWindow):
         # Flujo guiado: botón "nuevo producto" en panel de inicio lleva a Datos de producto
         self.inicio_panel.nuevo_producto_clicked.connect(lambda: self.stacked_widget.setCurrentIndex(1))
 
+        if precalentar:
+            QTimer.singleShot(PRECALENTAR_MS, self.precalentar_siguiente)
+
+    def construir_panel(self, index):
+        """Construye el módulo real de la página `index` si todavía es un marcador."""
+        widget = self.stacked_widget.widget(index)
+        if isinstance(widget, PanelDiferido):
+            return widget.construir()
+        return widget
+
+    def precalentar_siguiente(self):
+        """Construye un panel pendiente por vuelta del bucle de eventos."""
+        pendiente = next((p for p in self.paneles if not p.construido()), None)
+        if pendiente is None:
+            return
+        pendiente.construir()
+        QTimer.singleShot(0, self.precalentar_siguiente)
+
     def ir_a_inicio(self):
         self.inicio_panel.actualizar_estadisticas()
-        self.stacked_widget.setCurrentIndex(0)
\ No newline at end of file
+        self.stacked_widget.setCurrentIndex(0)
@@ -0,0 +1,375 @@
+import os
+import sys
+import json
+import sqlite3
+from utils.persistencia import DocumentoJson, aplicar_entrada, escribir_json_atomico
+
+DATA_DIR = "datos"
+DB_FILE = os.path.join(DATA_DIR, "hub.sqlite3")
+
+# Archivos de datos/ que el motor SQLite sabe guardar
+DOCUMENTOS = {
+    "precios.json": {"global": {}, "categorias": {}, "productos": {}},
+    "medidas.json": {"categorias": {}, "tipos": {}, "productos": {}},
+    "descripciones.json": {},
+    "skus.json": {},
+}
+PRODUCTOS_JSON = "productos.json"
+
+# Secciones cuyo contenido es un diccionario por clave (una fila por clave)
+SECCIONES_POR_CLAVE = ("categorias", "tipos", "productos", "promociones")
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS productos (
+    orden INTEGER PRIMARY KEY,
+    id TEXT,
+    sku TEXT,
+    nombre TEXT,
+    categoria TEXT,
+    datos TEXT NOT NULL
+);
+-- Solo se busca por id (guardar_producto/eliminar_producto); sku, nombre y
+-- categoría quedan como columnas para consultar la base a mano
+CREATE INDEX IF NOT EXISTS idx_productos_id ON productos(id);
+DROP INDEX IF EXISTS idx_productos_sku;
+DROP INDEX IF EXISTS idx_productos_categoria;
+DROP INDEX IF EXISTS idx_productos_nombre;
+
+-- precios/medidas/descripciones/skus: una fila por entrada de la cascada;
+-- `orden` conserva el orden de las claves del archivo JSON
+CREATE TABLE IF NOT EXISTS entradas (
+    documento TEXT NOT NULL,
+    seccion TEXT NOT NULL,
+    clave TEXT NOT NULL,
+    datos TEXT NOT NULL,
+    orden INTEGER,
+    PRIMARY KEY (documento, seccion, clave)
+);
+"""
+# Posición de cada sección en el archivo JSON y si se guarda como una fila
+# por clave (por_clave = 1) o como una sola fila con clave "" (por_clave = 0).
+# Va aparte de `entradas` para que una clave vacía ("productos", "") sea una
+# entrada más y no se confunda con la sección.
+ESQUEMA_SECCIONES = """
+CREATE TABLE IF NOT EXISTS secciones (
+    documento TEXT NOT NULL,
+    seccion TEXT NOT NULL,
+    por_clave INTEGER NOT NULL,
+    orden INTEGER NOT NULL,
+    PRIMARY KEY (documento, seccion)
+);
+"""
+INSERTAR_ENTRADA = """
+INSERT INTO entradas (documento, seccion, clave, datos, orden)
+VALUES (?, ?, ?, ?, (SELECT COALESCE(MAX(orden) + 1, 0) FROM entradas))
+ON CONFLICT (documento, seccion, clave) DO UPDATE SET datos = excluded.datos
+"""
+INSERTAR_SECCION = """
+INSERT INTO secciones (documento, seccion, por_clave, orden)
+VALUES (?, ?, ?, (SELECT COALESCE(MAX(orden) + 1, 0) FROM secciones))
+ON CONFLICT (documento, seccion) DO UPDATE SET por_clave = excluded.por_clave
+"""
+DOCUMENTOS_PLANOS = ("descripciones.json", "skus.json")
+
+
+def _dump(valor):
+    return json.dumps(valor, ensure_ascii=False)
+
+
+class AlmacenSQLite:
+    """
+    Motor de almacenamiento SQLite para los datos de datos/.
+
+    Guarda los productos en una tabla en el orden de productos.json, y
+    precios/medidas/descripciones como filas (documento, sección, clave),
+    así que guardar un solo nivel de la cascada es escribir una fila. Al
+    leer se reconstruye el documento completo con el orden de claves del
+    archivo JSON.
+    """
+
+    def __init__(self, ruta=DB_FILE):
+        self.ruta = ruta
+        directorio = os.path.dirname(ruta)
+        if directorio and not os.path.exists(directorio):
+            os.makedirs(directorio)
+        self.conn = sqlite3.connect(ruta)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(ESQUEMA)
+        columnas = [fila[1] for fila in self.conn.execute("PRAGMA table_info(entradas)")]
+        if "orden" not in columnas:
+            # Base creada antes de guardar el orden: se toma el de inserción
+            with self.conn:
+                self.conn.execute("ALTER TABLE entradas ADD COLUMN orden INTEGER")
+                self.conn.execute("UPDATE entradas SET orden = rowid")
+        # Para el MAX(orden) de cada inserción
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_entradas_orden ON entradas(orden)")
+        existe = self.conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'secciones'").fetchone()
+        self.conn.executescript(ESQUEMA_SECCIONES)
+        if not existe:
+            self._migrar_secciones()
+
+    def _migrar_secciones(self):
+        # Bases anteriores: la sección se deducía de las filas y las
+        # secciones por clave se marcaban con una fila ("sección", "", "{}")
+        with self.conn:
+            filas = self.conn.execute(
+                "SELECT documento, seccion, clave, datos FROM entradas WHERE seccion <> '' ORDER BY orden")
+            secciones = {}
+            for documento, seccion, clave, datos in filas:
+                por_clave = secciones.setdefault((documento, seccion), seccion in SECCIONES_POR_CLAVE)
+                if clave == "" and datos != "{}":
+                    secciones[(documento, seccion)] = por_clave = False
+            for (documento, seccion), por_clave in secciones.items():
+                self.conn.execute(INSERTAR_SECCION, (documento, seccion, int(por_clave)))
+                if por_clave:
+                    self.conn.execute("DELETE FROM entradas WHERE documento = ? AND seccion = ? AND clave = ''",
+                                      (documento, seccion))
+
+    def cerrar(self):
+        self.conn.close()
+
+    def firma(self):
+        firma = []
+        for ruta in (self.ruta, self.ruta + "-wal"):
+            try:
+                st = os.stat(ruta)
+                firma.append((st.st_mtime_ns, st.st_size))
+            except OSError:
+                firma.append(None)
+        return tuple(firma)
+
+    # --- Productos ---
+
+    def productos(self):
+        filas = self.conn.execute("SELECT datos FROM productos ORDER BY orden")
+        return [json.loads(datos) for (datos,) in filas]
+
+    def _fila_producto(self, prod, orden):
+        return (orden, prod.get("id"), prod.get("sku", ""), prod.get("nombre", ""),
+                prod.get("categoria", ""), _dump(prod))
+
+    def guardar_producto(self, prod):
+        """Reemplaza el primer producto con el mismo id o lo agrega al final."""
+        with self.conn:
+            fila = self.conn.execute("SELECT orden FROM productos WHERE id = ? ORDER BY orden LIMIT 1",
+                                     (prod.get("id"),)).fetchone()
+            if fila:
+                orden = fila[0]
+            else:
+                orden = self.conn.execute("SELECT COALESCE(MAX(orden) + 1, 0) FROM productos").fetchone()[0]
+            self.conn.execute("INSERT OR REPLACE INTO productos VALUES (?, ?, ?, ?, ?, ?)",
+                              self._fila_producto(prod, orden))
+
+    def eliminar_producto(self, prod_id):
+        with self.conn:
+            self.conn.execute("DELETE FROM productos WHERE id = ?", (prod_id,))
+
+    def guardar_productos(self, productos):
+        with self.conn:
+            self.conn.execute("DELETE FROM productos")
+            self.conn.executemany("INSERT OR REPLACE INTO productos VALUES (?, ?, ?, ?, ?, ?)",
+                                  [self._fila_producto(p, i) for i, p in enumerate(productos)])
+
+    # --- Documentos por sección/clave ---
+
+    def documento(self, documento, defecto=None):
+        """Reconstruye el diccionario con la misma forma y orden de claves que el archivo JSON."""
+        data, por_clave = {}, set()
+        secciones = self.conn.execute(
+            "SELECT seccion, por_clave FROM secciones WHERE documento = ? ORDER BY orden", (documento,))
+        for seccion, es_por_clave in secciones:
+            # Reserva el lugar de la sección en el orden del archivo
+            data[seccion] = {}
+            if es_por_clave:
+                por_clave.add(seccion)
+        sin_valor = set(data) - por_clave
+        filas = self.conn.execute(
+            "SELECT seccion, clave, datos FROM entradas WHERE documento = ? ORDER BY orden", (documento,))
+        for seccion, clave, datos in filas:
+            valor = json.loads(datos)
+            if seccion == "":
+                data[clave] = valor
+            elif seccion in por_clave:
+                data[seccion][clave] = valor
+            else:
+                data[seccion] = valor
+                sin_valor.discard(seccion)
+        for seccion in sin_valor:
+            del data[seccion]
+        for seccion, valor in (defecto if defecto is not None else DOCUMENTOS.get(documento, {})).items():
+            if seccion not in data:
+                data[seccion] = json.loads(_dump(valor))
+        return data
+
+    def _filas_seccion(self, documento, seccion, valor):
+        """(por_clave, filas de entradas) con que se guarda una sección."""
+        if seccion in SECCIONES_POR_CLAVE and isinstance(valor, dict):
+            return True, [(documento, seccion, clave, _dump(v)) for clave, v in valor.items()]
+        return False, [(documento, seccion, "", _dump(valor))]
+
+    def _guardar_seccion(self, documento, seccion, valor):
+        por_clave, filas = self._filas_seccion(documento, seccion, valor)
+        self.conn.execute("DELETE FROM entradas WHERE documento = ? AND seccion = ?", (documento, seccion))
+        self.conn.execute(INSERTAR_SECCION, (documento, seccion, int(por_clave)))
+        self.conn.executemany(INSERTAR_ENTRADA, filas)
+        return len(filas)
+
+    def _valor_seccion(self, documento, seccion):
+        fila = self.conn.execute("SELECT datos FROM entradas WHERE documento = ? AND seccion = ? AND clave = ''",
+                                 (documento, seccion)).fetchone()
+        valor = json.loads(fila[0]) if fila else {}
+        return valor if isinstance(valor, dict) else {}
+
+    def _es_por_clave(self, documento, seccion):
+        fila = self.conn.execute("SELECT por_clave FROM secciones WHERE documento = ? AND seccion = ?",
+                                 (documento, seccion)).fetchone()
+        return None if fila is None else bool(fila[0])
+
+    def set(self, documento, ruta, valor):
+        with self.conn:
+            if documento in DOCUMENTOS_PLANOS:
+                self.conn.execute(INSERTAR_ENTRADA, (documento, "", ruta[0], _dump(valor)))
+            elif len(ruta) == 1:
+                self._guardar_seccion(documento, ruta[0], valor)
+            elif self._es_por_clave(documento, ruta[0]) is False:
+                # Sección guardada entera: se reescribe con la clave cambiada
+                actual = self._valor_seccion(documento, ruta[0])
+                actual[ruta[1]] = valor
+                self._guardar_seccion(documento, ruta[0], actual)
+            else:
+                self.conn.execute(INSERTAR_SECCION, (documento, ruta[0], 1))
+                self.conn.execute(INSERTAR_ENTRADA, (documento, ruta[0], ruta[1], _dump(valor)))
+
+    def eliminar(self, documento, ruta):
+        with self.conn:
+            if documento in DOCUMENTOS_PLANOS:
+                self.conn.execute("DELETE FROM entradas WHERE documento = ? AND seccion = '' AND clave = ?",
+                                  (documento, ruta[0]))
+            elif len(ruta) == 1:
+                for tabla in ("entradas", "secciones"):
+                    self.conn.execute(f"DELETE FROM {tabla} WHERE documento = ? AND seccion = ?",
+                                      (documento, ruta[0]))
+            elif self._es_por_clave(documento, ruta[0]) is False:
+                actual = self._valor_seccion(documento, ruta[0])
+                actual.pop(ruta[1], None)
+                self._guardar_seccion(documento, ruta[0], actual)
+            else:
+                self.conn.execute("DELETE FROM entradas WHERE documento = ? AND seccion = ? AND clave = ?",
+                                  (documento, ruta[0], ruta[1]))
+
+    def guardar_documento(self, documento, data):
+        """Reemplaza el documento completo. Devuelve el número de filas escritas."""
+        with self.conn:
+            for tabla in ("entradas", "secciones"):
+                self.conn.execute(f"DELETE FROM {tabla} WHERE documento = ?", (documento,))
+            if documento in DOCUMENTOS_PLANOS:
+                filas = [(documento, "", clave, _dump(valor)) for clave, valor in data.items()]
+                self.conn.executemany(INSERTAR_ENTRADA, filas)
+                return len(filas)
+            return sum(self._guardar_seccion(documento, seccion, valor) for seccion, valor in data.items())
+
+
+class DocumentoSQLite:
+    """
+    Adaptador con la misma interfaz que persistencia.DocumentoJson, para que
+    los módulos funcionen igual con cualquiera de los dos motores.
+    """
+
+    def __init__(self, almacen, nombre, defecto):
+        self.almacen = almacen
+        self.nombre = nombre
+        self.defecto = defecto
+
+    def firma(self):
+        return self.almacen.firma()
+
+    def cargar(self):
+        if self.nombre == PRODUCTOS_JSON:
+            return self.almacen.productos()
+        return self.almacen.documento(self.nombre, self.defecto)
+
+    def set(self, data, ruta, valor):
+        aplicar_entrada(data, {"op": "set", "ruta": list(ruta), "valor": valor})
+        self.almacen.set(self.nombre, ruta, valor)
+
+    def eliminar(self, data, ruta):
+        aplicar_entrada(data, {"op": "del", "ruta": list(ruta)})
+        self.almacen.eliminar(self.nombre, ruta)
+
+    def upsert(self, data, item):
+        aplicar_entrada(data, {"op": "upsert", "valor": item})
+        self.almacen.guardar_producto(item)
+
+    def quitar(self, data, item_id):
+        aplicar_entrada(data, {"op": "remove", "id": item_id})
+        self.almacen.eliminar_producto(item_id)
+
+    def compactar(self):
+        pass
+
+    def guardar(self, data):
+        if self.nombre == PRODUCTOS_JSON:
+            self.almacen.guardar_productos(data)
+        else:
+            self.almacen.guardar_documento(self.nombre, data)
+
+
+_almacen = None
+
+
+def obtener_almacen():
+    """Conexión única a la base SQLite para todo el proceso."""
+    global _almacen
+    if _almacen is None:
+        _almacen = AlmacenSQLite()
+    return _almacen
+
+
+def admite_documento(ruta):
+    nombre = os.path.basename(ruta)
+    return nombre == PRODUCTOS_JSON or nombre in DOCUMENTOS
+
+
+def migrar_desde_json(datos_dir=DATA_DIR, ruta_db=DB_FILE):
+    """
+    Importa productos.json, precios.json, medidas.json, descripciones.json y
+    skus.json (incluidos sus journals pendientes) a la base SQLite.
+    Devuelve un resumen {archivo: número de registros}.
+    """
+    almacen = AlmacenSQLite(ruta_db)
+    resumen = {}
+    try:
+        productos = DocumentoJson(os.path.join(datos_dir, PRODUCTOS_JSON), []).cargar()
+        almacen.guardar_productos(productos)
+        resumen[PRODUCTOS_JSON] = len(productos)
+        for nombre, defecto in DOCUMENTOS.items():
+            data = DocumentoJson(os.path.join(datos_dir, nombre), defecto).cargar()
+            resumen[nombre] = almacen.guardar_documento(nombre, data)
+    finally:
+        almacen.cerrar()
+    return resumen
+
+
+def exportar_a_json(ruta_db=DB_FILE, datos_dir=DATA_DIR):
+    """Escribe de vuelta los archivos JSON con la misma estructura de siempre."""
+    almacen = AlmacenSQLite(ruta_db)
+    try:
+        escribir_json_atomico(os.path.join(datos_dir, PRODUCTOS_JSON), almacen.productos())
+        for nombre, defecto in DOCUMENTOS.items():
+            escribir_json_atomico(os.path.join(datos_dir, nombre), almacen.documento(nombre, defecto))
+    finally:
+        almacen.cerrar()
+
+
+if __name__ == "__main__":
+    # python -m utils.almacen_sqlite migrar|exportar
+    accion = sys.argv[1] if len(sys.argv) > 1 else ""
+    if accion == "migrar":
+        print(json.dumps(migrar_desde_json(), ensure_ascii=False))
+    elif accion == "exportar":
+        exportar_a_json()
+    else:
+        print("Uso: python -m utils.almacen_sqlite migrar|exportar")
+        sys.exit(1)
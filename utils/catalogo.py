@@ -0,0 +1,108 @@
+import os
+from PyQt6.QtCore import QObject, QTimer, pyqtSignal
+from utils.persistencia import obtener_documento
+
+DATA_DIR = "datos"
+PRODUCTOS_FILE = os.path.join(DATA_DIR, "productos.json")
+
+
+class CatalogoStore(QObject):
+    """
+    Catálogo de productos compartido por todos los paneles.
+
+    Lee productos.json una sola vez, indexa los productos por id y por sku
+    y solo vuelve a leer el archivo cuando cambia su mtime (o el de su
+    journal). Los paneles se conectan a `productos_cambiados` para
+    refrescarse cuando otro panel guarda cambios.
+    """
+    productos_cambiados = pyqtSignal()
+
+    def __init__(self, ruta=PRODUCTOS_FILE):
+        super().__init__()
+        self.ruta = ruta
+        self.documento = obtener_documento(ruta, [])
+        self._productos = []
+        self._por_id = {}
+        self._por_sku = {}
+        self._firma = None
+        self._cargado = False
+
+    def _indexar(self):
+        self._por_id = {}
+        self._por_sku = {}
+        for prod in self._productos:
+            if prod.get("id"):
+                self._por_id[prod["id"]] = prod
+            if prod.get("sku"):
+                self._por_sku[prod["sku"]] = prod
+
+    def _notificar(self):
+        # Diferido al bucle de eventos para no reentrar en el panel que guardó
+        QTimer.singleShot(0, self.productos_cambiados.emit)
+
+    def recargar_si_cambio(self):
+        """Vuelve a leer el archivo si su mtime cambió. Devuelve True si recargó."""
+        firma = self.documento.firma()
+        if self._cargado and firma == self._firma:
+            return False
+        self._productos = self.documento.cargar()
+        self._firma = firma
+        self._cargado = True
+        self._indexar()
+        return True
+
+    def refrescar(self):
+        """Recarga desde disco si hubo cambios externos y avisa a los paneles."""
+        if self.recargar_si_cambio():
+            self._notificar()
+
+    def productos(self):
+        """Lista (copia superficial) de los productos del catálogo."""
+        self.recargar_si_cambio()
+        return list(self._productos)
+
+    def por_id(self, prod_id):
+        self.recargar_si_cambio()
+        return self._por_id.get(prod_id)
+
+    def por_sku(self, sku):
+        self.recargar_si_cambio()
+        return self._por_sku.get(sku)
+
+    def _tras_guardar(self):
+        self._firma = self.documento.firma()
+        self._cargado = True
+        self._indexar()
+        self._notificar()
+
+    def guardar(self, productos):
+        """Reescribe la lista completa (atómicamente) y notifica a los paneles."""
+        self.documento.guardar(productos)
+        self._productos = list(productos)
+        self._tras_guardar()
+
+    def guardar_producto(self, producto):
+        """Agrega o reemplaza (por id) un producto escribiendo solo una línea de journal."""
+        self.recargar_si_cambio()
+        self.documento.upsert(self._productos, producto)
+        self._tras_guardar()
+
+    def eliminar_producto(self, prod_id):
+        self.recargar_si_cambio()
+        self.documento.quitar(self._productos, prod_id)
+        self._tras_guardar()
+
+    def __len__(self):
+        self.recargar_si_cambio()
+        return len(self._productos)
+
+
+_catalogo = None
+
+
+def obtener_catalogo():
+    """Devuelve la instancia única del catálogo para todo el proceso."""
+    global _catalogo
+    if _catalogo is None:
+        _catalogo = CatalogoStore()
+    return _catalogo
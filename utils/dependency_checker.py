@@ -1,7 +1,13 @@
+import importlib.util
 import subprocess
 import sys
 from typing import List, Dict
 
+# Paquetes cuyo nombre de importación no coincide con el de pip
+NOMBRES_IMPORTACION = {
+    'Pillow': 'PIL',
+}
+
 def check_dependencies(required_packages: List[str]) -> Dict[str, bool]:
     """
     Verifica y instala las dependencias necesarias.
@@ -15,10 +21,11 @@ def check_dependencies(required_packages: List[str]) -> Dict[str, bool]:
     results = {}
     
     for package in required_packages:
-        try:
-            __import__(package.split('[')[0])  # Maneja casos como 'qrcode[pil]'
+        nombre = package.split('[')[0]  # Maneja casos como 'qrcode[pil]'
+        # find_spec localiza el paquete sin importarlo, así no pesa en el arranque
+        if importlib.util.find_spec(NOMBRES_IMPORTACION.get(nombre, nombre)) is not None:
             results[package] = True
-        except ImportError:
+        else:
             print(f"Instalando {package}...")
             try:
                 subprocess.check_call([sys.executable, "-m", "pip", "install", package])
@@ -0,0 +1,268 @@
+import os
+from functools import lru_cache
+from concurrent.futures import wait, FIRST_COMPLETED
+from utils.qr import texto_producto, modulos_qr, rasterizar_qr, tramos_qr
+from utils.precios import MotorPrecios, de_centesimas
+from utils.optimizador import crear_pool
+from utils.pdf import documento_pdf, cadena_pdf, numero_pdf
+
+MM = 72 / 25.4  # puntos por milímetro
+FORMATOS_HOJA = ["pdf", "png"]
+# A4 con 3 x 8 etiquetas; las medidas de la hoja van en milímetros
+DISENO_HOJA = {
+    "ancho_mm": 210,
+    "alto_mm": 297,
+    "columnas": 3,
+    "filas": 8,
+    "margen_mm": 8,
+    "separacion_mm": 2,
+    "dpi": 300,
+    "guias": True,
+}
+FUENTES_PDF = {"F1": "Helvetica", "F2": "Helvetica-Bold"}
+# Anchos de Helvetica (milésimas del tamaño) para los caracteres 32..126
+ANCHOS_HELVETICA = (
+    278, 278, 355, 556, 556, 889, 667, 191, 333, 333, 389, 584, 278, 333, 278, 278,
+    556, 556, 556, 556, 556, 556, 556, 556, 556, 556,
+    278, 278, 584, 584, 584, 556, 1015,
+    667, 667, 722, 722, 667, 611, 778, 722, 278, 500, 667, 556, 833,
+    722, 778, 667, 778, 722, 667, 611, 722, 667, 944, 667, 667, 611,
+    278, 278, 278, 469, 556, 333,
+    556, 556, 500, 556, 556, 278, 556, 556, 222, 222, 500, 222, 833,
+    556, 556, 556, 556, 333, 500, 278, 556, 500, 722, 500, 500, 500,
+    334, 260, 334, 584,
+)
+FUENTES_PNG = {False: ("DejaVuSans.ttf", "arial.ttf"), True: ("DejaVuSans-Bold.ttf", "arialbd.ttf")}
+
+
+def formato_precio(valor):
+    return f"${valor:,.2f}"
+
+
+def datos_etiquetas(productos, precios):
+    """
+    Contenido de cada etiqueta: SKU, nombre, precio final resuelto y texto
+    del QR. Sin precio asignado el renglón del precio queda vacío en vez de
+    imprimir $0.00.
+    """
+    productos = [p for p in productos if p.get("sku")]
+    finales = MotorPrecios(productos, precios).columnas["precio_final"]
+    return [
+        {
+            "sku": prod["sku"],
+            "nombre": prod.get("nombre", ""),
+            "precio": formato_precio(de_centesimas(final)) if final > 0 else "",
+            "qr": texto_producto(prod),
+        }
+        for prod, final in zip(productos, finales.tolist())
+    ]
+
+
+def celdas(diseno):
+    """Rectángulos (x, y, ancho, alto) de las etiquetas en puntos, desde arriba a la izquierda y por filas."""
+    margen = diseno["margen_mm"] * MM
+    separacion = diseno["separacion_mm"] * MM
+    columnas, filas = diseno["columnas"], diseno["filas"]
+    if columnas < 1 or filas < 1:
+        raise ValueError("La hoja necesita al menos una fila y una columna")
+    ancho = (diseno["ancho_mm"] * MM - 2 * margen - (columnas - 1) * separacion) / columnas
+    alto = (diseno["alto_mm"] * MM - 2 * margen - (filas - 1) * separacion) / filas
+    if ancho <= 0 or alto <= 0:
+        raise ValueError("Las etiquetas no caben en la hoja con esos márgenes")
+    return [
+        (margen + c * (ancho + separacion), margen + f * (alto + separacion), ancho, alto)
+        for f in range(filas) for c in range(columnas)
+    ]
+
+
+def distribucion(x, y, ancho, alto):
+    """
+    SKU a todo lo ancho en el primer renglón y, debajo, el QR cuadrado a la
+    izquierda con el nombre y el precio a su derecha. Devuelve el cuadro del
+    QR y por renglón (campo, negrita, tamaño, x, línea base, ancho).
+    """
+    relleno = min(ancho, alto) * 0.08
+    tam_sku = alto * 0.13
+    arriba = y + relleno + tam_sku * 1.3
+    lado = min(y + alto - relleno - arriba, ancho * 0.5)
+    texto_x = x + lado + 2 * relleno
+    texto_ancho = x + ancho - relleno - texto_x
+    renglones = [
+        ("sku", True, tam_sku, x + relleno, y + relleno + tam_sku, ancho - 2 * relleno),
+        ("nombre", False, alto * 0.12, texto_x, arriba + alto * 0.12, texto_ancho),
+        ("precio", True, alto * 0.22, texto_x, y + alto - relleno - alto * 0.04, texto_ancho),
+    ]
+    return (x + relleno, arriba, lado), renglones
+
+
+def ajustar_texto(texto, tam, ancho, medir, recortar=True):
+    """
+    (texto, tamaño) que caben en `ancho`: primero reduce la letra hasta un
+    70 % y luego recorta con '…'. Con recortar=False solo reduce la letra,
+    lo que haga falta; el SKU tiene que poder leerse entero.
+    """
+    minimo = tam * 0.7 if recortar else 1
+    while tam > minimo and medir(texto, tam) > ancho:
+        tam *= 0.95
+    if recortar and medir(texto, tam) > ancho:
+        while texto and medir(texto + "…", tam) > ancho:
+            texto = texto[:-1]
+        texto = texto.rstrip() + "…" if texto else ""
+    return texto, tam
+
+
+def medida_pdf(negrita):
+    # Helvetica-Bold es algo más ancha; un 10 % más basta para no salirse
+    factor = 1.1 if negrita else 1.0
+
+    def medir(texto, tam):
+        unidades = sum(
+            ANCHOS_HELVETICA[ord(c) - 32] if 32 <= ord(c) <= 126 else (1000 if c == "…" else 556)
+            for c in texto
+        )
+        return unidades * tam * factor / 1000
+    return medir
+
+
+def contenido_pagina_pdf(tarea):
+    """Trabajo del pool: flujo de contenido vectorial de una hoja."""
+    diseno = tarea["diseno"]
+    alto_hoja = diseno["alto_mm"] * MM
+    n = numero_pdf
+    ops = []
+    for etiqueta, (x, y, ancho, alto) in zip(tarea["etiquetas"], celdas(diseno)):
+        if diseno["guias"]:
+            ops.append(f"0.8 G 0.3 w {n(x)} {n(alto_hoja - y - alto)} {n(ancho)} {n(alto)} re S")
+        (qx, qy, lado), renglones = distribucion(x, y, ancho, alto)
+        modulos = modulos_qr(etiqueta["qr"])
+        # Un módulo de zona de silencio alrededor; el relleno de la etiqueta añade el resto
+        m = lado / (len(modulos) + 2)
+        ops.append("0 g")
+        for fila, col, largo in tramos_qr(modulos):
+            ops.append(f"{n(qx + (col + 1) * m)} {n(alto_hoja - qy - (fila + 2) * m)} {n(largo * m)} {n(m)} re")
+        ops.append("f")
+        for campo, negrita, tam, texto_x, base, texto_ancho in renglones:
+            texto, tam = ajustar_texto(etiqueta[campo], tam, texto_ancho, medida_pdf(negrita), campo != "sku")
+            fuente = "F2" if negrita else "F1"
+            ops.append(f"BT /{fuente} {n(tam)} Tf {n(texto_x)} {n(alto_hoja - base)} Td {cadena_pdf(texto)} Tj ET")
+    return "\n".join(ops).encode("cp1252", errors="replace")
+
+
+@lru_cache(maxsize=64)
+def fuente_png(negrita, tam):
+    from PIL import ImageFont
+    for nombre in FUENTES_PNG[negrita]:
+        try:
+            return ImageFont.truetype(nombre, tam)
+        except OSError:
+            continue
+    return ImageFont.load_default(tam)
+
+
+def medida_png(negrita):
+    return lambda texto, tam: fuente_png(negrita, max(1, round(tam))).getlength(texto)
+
+
+def renderizar_pagina_png(tarea):
+    """Trabajo del pool: dibuja una hoja en escala de grises y la guarda vía temporal."""
+    from PIL import Image, ImageDraw
+    diseno = tarea["diseno"]
+    escala = diseno["dpi"] / 72
+    hoja = Image.new("L", (round(diseno["ancho_mm"] * MM * escala), round(diseno["alto_mm"] * MM * escala)), 255)
+    dibujo = ImageDraw.Draw(hoja)
+    for etiqueta, celda in zip(tarea["etiquetas"], celdas(diseno)):
+        x, y, ancho, alto = (v * escala for v in celda)
+        if diseno["guias"]:
+            dibujo.rectangle([x, y, x + ancho, y + alto], outline=204, width=max(1, round(escala * 0.3)))
+        (qx, qy, lado), renglones = distribucion(x, y, ancho, alto)
+        modulos = modulos_qr(etiqueta["qr"])
+        # Módulos de píxeles enteros para que el QR no quede borroso; se centra en su cuadro
+        caja = max(1, int(lado // (len(modulos) + 2)))
+        qr = rasterizar_qr(modulos, caja, 1).convert("L")
+        hoja.paste(qr, (round(qx + (lado - qr.width) / 2), round(qy + (lado - qr.height) / 2)))
+        for campo, negrita, tam, texto_x, base, texto_ancho in renglones:
+            texto, tam = ajustar_texto(etiqueta[campo], tam, texto_ancho, medida_png(negrita), campo != "sku")
+            dibujo.text((texto_x, base), texto, fill=0, font=fuente_png(negrita, max(1, round(tam))), anchor="ls")
+    destino = tarea["destino"]
+    temporal = os.path.splitext(destino)[0] + ".tmp.png"
+    hoja.save(temporal, dpi=(diseno["dpi"], diseno["dpi"]))
+    os.replace(temporal, destino)
+    return destino
+
+
+def generar_hojas(productos, precios, salida, diseno=None, progreso=None, cancelado=None, max_workers=None):
+    """
+    Compone hojas de etiquetas (QR, SKU, nombre y precio final) para
+    `productos`. El formato sale de la extensión de `salida`: .pdf escribe un
+    único PDF vectorial de varias páginas y .png una imagen por hoja
+    (<base>_001.png, <base>_002.png...). Las hojas se componen en paralelo.
+    Devuelve {"archivos", "paginas", "etiquetas", "errores": [(hoja, mensaje)],
+    "cancelado"}.
+    """
+    cancelado = cancelado or (lambda: False)
+    diseno = {**DISENO_HOJA, **(diseno or {})}
+    formato = os.path.splitext(salida)[1].lower().lstrip(".")
+    if formato not in FORMATOS_HOJA:
+        raise ValueError(f"Formato de hoja no soportado: {formato or 'sin extensión'}")
+    por_hoja = len(celdas(diseno))
+    etiquetas = datos_etiquetas(productos, precios)
+    base = os.path.splitext(salida)[0]
+    carpeta = os.path.dirname(os.path.abspath(salida))
+    os.makedirs(carpeta, exist_ok=True)
+    tareas = [
+        {
+            "hoja": i + 1,
+            "etiquetas": etiquetas[inicio:inicio + por_hoja],
+            "diseno": diseno,
+            "destino": f"{base}_{i + 1:03d}.png",
+        }
+        for i, inicio in enumerate(range(0, len(etiquetas), por_hoja))
+    ]
+    trabajo = contenido_pagina_pdf if formato == "pdf" else renderizar_pagina_png
+    resultado = {"archivos": [], "paginas": len(tareas), "etiquetas": len(etiquetas),
+                 "errores": [], "cancelado": False}
+    hechas = {}
+    if progreso:
+        progreso(0, len(tareas))
+
+    def registrar(tarea, obtener):
+        try:
+            hechas[tarea["hoja"]] = obtener()
+        except Exception as e:
+            resultado["errores"].append((tarea["hoja"], str(e)))
+        if progreso:
+            progreso(len(hechas) + len(resultado["errores"]), len(tareas))
+
+    if len(tareas) == 1 or max_workers == 1:
+        # Una sola hoja no compensa arrancar procesos
+        for tarea in tareas:
+            if cancelado():
+                resultado["cancelado"] = True
+                break
+            registrar(tarea, lambda: trabajo(tarea))
+    elif tareas:
+        pool = crear_pool(max_workers)
+        try:
+            pendientes = {pool.submit(trabajo, t): t for t in tareas}
+            while pendientes:
+                if cancelado():
+                    resultado["cancelado"] = True
+                    break
+                listos, _ = wait(pendientes, timeout=0.2, return_when=FIRST_COMPLETED)
+                for fut in listos:
+                    registrar(pendientes.pop(fut), fut.result)
+        finally:
+            pool.shutdown(wait=True, cancel_futures=True)
+
+    if formato == "png":
+        resultado["archivos"] = [hechas[h] for h in sorted(hechas)]
+    elif hechas and not resultado["cancelado"] and not resultado["errores"]:
+        # El PDF se escribe entero o no se escribe
+        ancho, alto = diseno["ancho_mm"] * MM, diseno["alto_mm"] * MM
+        datos = documento_pdf([(ancho, alto, hechas[h]) for h in sorted(hechas)], FUENTES_PDF, comprimir=True)
+        temporal = base + ".tmp.pdf"
+        with open(temporal, "wb") as f:
+            f.write(datos)
+        os.replace(temporal, salida)
+        resultado["archivos"] = [salida]
+    return resultado
@@ -0,0 +1,141 @@
+import os
+import csv
+import datetime
+import numpy as np
+from utils.persistencia import obtener_documento
+
+DATA_DIR = "datos"
+DESCRIPCIONES_FILE = os.path.join(DATA_DIR, "descripciones.json")
+NOTACOMPRA_FILE = os.path.join(DATA_DIR, "nota_compra_global.txt")
+DEFAULT_URL_BASE = "http://skillhub-mex.com/wp-content/uploads/"
+EXTENSIONES_URL = ('.png', '.jpg', '.jpeg', '.webp', '.bmp', '.gif')
+# Campo de la API REST de WooCommerce -> columna del importador CSV de productos
+COLUMNAS_OFERTAS_CSV = {
+    "sku": "SKU",
+    "regular_price": "Regular price",
+    "sale_price": "Sale price",
+    "date_on_sale_from": "Date sale price starts",
+    "date_on_sale_to": "Date sale price ends",
+}
+
+
+def documento_descripciones():
+    return obtener_documento(DESCRIPCIONES_FILE, {})
+
+
+def cargar_descripciones():
+    return documento_descripciones().cargar()
+
+
+def cargar_nota_compra_global():
+    if os.path.exists(NOTACOMPRA_FILE):
+        with open(NOTACOMPRA_FILE, "r", encoding="utf-8") as f:
+            return f.read()
+    return ""
+
+
+def html_woocommerce(desc_corta, desc_larga, nota_compra=""):
+    """HTML para pegar en WooCommerce, con un comentario marcando cada bloque."""
+    html = ""
+    if desc_corta.strip():
+        html += f"<!-- DESCRIPCION_CORTA -->\n{desc_corta.strip()}\n"
+    if desc_larga.strip():
+        html += f"<!-- DESCRIPCION_LARGA -->\n{desc_larga.strip()}\n"
+    if nota_compra:
+        html += f"<!-- NOTA_COMPRA -->\n{nota_compra}\n"
+    return html
+
+
+def html_producto(descripciones, sku, nota_compra=None):
+    """HTML de exportación de un SKU a partir de descripciones.json."""
+    data = descripciones.get(sku, {})
+    if nota_compra is None:
+        nota_compra = cargar_nota_compra_global()
+    return html_woocommerce(data.get("desc_corta", ""), data.get("desc_larga", ""), nota_compra)
+
+
+def url_base_mes(url_base, fecha=None):
+    """Carpeta de subidas de WordPress del mes: <base>/AAAA/MM/"""
+    fecha = fecha or datetime.datetime.now()
+    return url_base.rstrip("/") + f"/{fecha.strftime('%Y')}/{fecha.strftime('%m')}/"
+
+
+def urls_imagenes(carpeta, url_base, fecha=None):
+    """URLs públicas de las imágenes de la carpeta de un SKU."""
+    if not carpeta or not os.path.exists(carpeta):
+        return []
+    base = url_base_mes(url_base, fecha)
+    return [base + f for f in os.listdir(carpeta) if f.lower().endswith(EXTENSIONES_URL)]
+
+
+def fecha_woocommerce(momento):
+    return momento.isoformat(timespec="seconds") if momento else ""
+
+
+def ofertas_woocommerce(productos, precios, desde=None, incluir_sin_oferta=False):
+    """
+    Campos de oferta de WooCommerce (regular_price, sale_price,
+    date_on_sale_from/to) de cada SKU según las promociones de precios.json.
+    WooCommerce guarda una sola oferta programada por producto: se toma la
+    vigente en `desde` (ahora, si no se indica) o la siguiente que le toca,
+    así que hay que volver a exportar cuando termine. Con
+    `incluir_sin_oferta` salen también los SKUs sin oferta, con los campos
+    vacíos, para limpiar ofertas viejas en la tienda.
+    """
+    from utils.precios import MotorPrecios, a_centesimas, de_centesimas
+    from utils.promociones import leer_momento
+    productos = list(productos)
+    motor = MotorPrecios(productos, precios)
+    indice = motor.indice_promociones()
+    desde = leer_momento(desde) or datetime.datetime.now()
+
+    # Primer tramo del índice, desde `desde` en adelante, en el que cada
+    # producto tiene una promoción ganadora
+    ganadora = np.full(len(motor), -1, dtype=np.int32)
+    pendientes = np.ones(len(motor), dtype=bool)
+    for s in range(indice.tramo(desde), len(indice.tramos)):
+        if not pendientes.any():
+            break
+        if not indice.tramos[s]:
+            continue
+        filas = np.flatnonzero(pendientes)
+        encontradas = motor.promociones_por_fila(indice.tramos[s], filas)
+        ganadora[filas] = encontradas
+        pendientes[filas[encontradas >= 0]] = False
+
+    aplica = ganadora >= 0
+    descuento = motor.columnas["descuento"].copy()
+    descuentos = np.array([a_centesimas(p["descuento"]) for p in indice.promociones] or [0], dtype=np.int64)
+    descuento[aplica] = descuentos[ganadora[aplica]]
+    oferta = motor.desglose(descuento=descuento)["precio_final"]
+    regular = motor.columnas["precio_final"]
+
+    for i, sku in enumerate(motor.skus):
+        # Sin precio asignado no se exporta: dejaría el producto en $0 en la tienda
+        if not sku or regular[i] <= 0:
+            continue
+        fila = {"sku": sku, "regular_price": str(de_centesimas(regular[i])), "sale_price": "",
+                "date_on_sale_from": "", "date_on_sale_to": "", "promocion": None}
+        # WooCommerce ignora una oferta que no baja el precio
+        if aplica[i] and 0 < oferta[i] < regular[i]:
+            promo = indice.promociones[ganadora[i]]
+            fila.update(sale_price=str(de_centesimas(oferta[i])),
+                        date_on_sale_from=fecha_woocommerce(promo["inicio"]),
+                        date_on_sale_to=fecha_woocommerce(promo["fin"]),
+                        promocion=indice.ids[ganadora[i]])
+        elif not incluir_sin_oferta:
+            continue
+        yield fila
+
+
+def exportar_ofertas_csv(ofertas, ruta):
+    """CSV con las columnas del importador de productos de WooCommerce; devuelve las filas escritas."""
+    escritas = 0
+    with open(ruta, "w", newline="", encoding="utf-8-sig") as f:
+        escritor = csv.writer(f)
+        escritor.writerow(COLUMNAS_OFERTAS_CSV.values())
+        for oferta in ofertas:
+            escritor.writerow([oferta[campo].replace("T", " ") if campo.startswith("date_") else oferta[campo]
+                               for campo in COLUMNAS_OFERTAS_CSV])
+            escritas += 1
+    return escritas
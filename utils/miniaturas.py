@@ -0,0 +1,157 @@
+import os
+import hashlib
+from collections import OrderedDict
+from PyQt6.QtCore import QObject, QRunnable, QThreadPool, QSize, Qt, pyqtSignal
+from PyQt6.QtGui import QImage, QImageReader
+
+DATA_DIR = "datos"
+CACHE_DIR = os.path.join(DATA_DIR, "cache", "miniaturas")
+# Miniaturas que se mantienen decodificadas en memoria
+MAX_MEMORIA = 400
+
+
+def clave_miniatura(ruta, tam):
+    """Clave de caché: cambia si el archivo cambia (mtime o tamaño) o si cambia el tamaño pedido."""
+    try:
+        st = os.stat(ruta)
+    except OSError:
+        return None
+    texto = f"{os.path.abspath(ruta)}|{st.st_mtime_ns}|{st.st_size}|{tam}"
+    return hashlib.sha1(texto.encode("utf-8")).hexdigest()
+
+
+def ruta_cache(clave, cache_dir=CACHE_DIR):
+    return os.path.join(cache_dir, clave[:2], clave + ".png")
+
+
+def generar_miniatura(ruta, tam, clave, cache_dir=CACHE_DIR):
+    """
+    Devuelve la miniatura (QImage) de `ruta` con lado máximo `tam`. Usa la
+    copia en disco si existe; si no, decodifica ya reducida con
+    QImageReader.setScaledSize (no carga la foto completa) y la guarda.
+    Puede ejecutarse fuera del hilo principal.
+    """
+    destino = ruta_cache(clave, cache_dir)
+    if os.path.exists(destino):
+        img = QImage(destino)
+        if not img.isNull():
+            return img
+    reader = QImageReader(ruta)
+    reader.setAutoTransform(True)
+    original = reader.size()
+    if original.isValid() and (original.width() > tam or original.height() > tam):
+        reader.setScaledSize(original.scaled(QSize(tam, tam), Qt.AspectRatioMode.KeepAspectRatio))
+    img = reader.read()
+    if img.isNull():
+        return img
+    if img.width() > tam or img.height() > tam:
+        # Formatos sin escalado en el lector: se reduce después de leer
+        img = img.scaled(tam, tam, Qt.AspectRatioMode.KeepAspectRatio, Qt.TransformationMode.SmoothTransformation)
+    os.makedirs(os.path.dirname(destino), exist_ok=True)
+    temporal = destino + ".tmp"
+    if img.save(temporal, "PNG"):
+        os.replace(temporal, destino)
+    return img
+
+
+class _TareaMiniatura(QRunnable):
+    def __init__(self, servicio, ruta, tam, clave):
+        super().__init__()
+        self.setAutoDelete(False)
+        self.servicio = servicio
+        self.ruta = ruta
+        self.tam = tam
+        self.clave = clave
+
+    def run(self):
+        try:
+            img = generar_miniatura(self.ruta, self.tam, self.clave, self.servicio.cache_dir)
+        except Exception:
+            img = QImage()
+        self.servicio._generada.emit(self.clave, self.ruta, self.tam, img)
+
+
+class ServicioMiniaturas(QObject):
+    """
+    Miniaturas compartidas por todos los paneles.
+
+    Tres niveles: LRU de QImage en memoria, archivos PNG en
+    datos/cache/miniaturas (clave: ruta + mtime + tamaño del archivo + lado)
+    y generación en un QThreadPool. `solicitar` nunca bloquea: devuelve la
+    imagen si ya está en memoria o None, y en ese caso emite
+    `miniatura_lista` cuando termina de generarla.
+    """
+    miniatura_lista = pyqtSignal(str, int, QImage)  # ruta, tam, imagen
+    _generada = pyqtSignal(str, str, int, QImage)
+
+    def __init__(self, cache_dir=CACHE_DIR, max_memoria=MAX_MEMORIA):
+        super().__init__()
+        self.cache_dir = cache_dir
+        self.max_memoria = max_memoria
+        self._memoria = OrderedDict()
+        self._pendientes = {}
+        self.pool = QThreadPool()
+        self.pool.setMaxThreadCount(max(2, QThreadPool.globalInstance().maxThreadCount() - 1))
+        self._generada.connect(self._al_generar)
+
+    def en_memoria(self, ruta, tam):
+        clave = clave_miniatura(ruta, tam)
+        if clave is None or clave not in self._memoria:
+            return None
+        self._memoria.move_to_end(clave)
+        return self._memoria[clave]
+
+    def solicitar(self, ruta, tam, prioridad=0):
+        """QImage si ya está en memoria; si no, encola su generación y devuelve None."""
+        clave = clave_miniatura(ruta, tam)
+        if clave is None:
+            return None
+        if clave in self._memoria:
+            self._memoria.move_to_end(clave)
+            return self._memoria[clave]
+        if clave not in self._pendientes:
+            tarea = _TareaMiniatura(self, ruta, tam, clave)
+            self._pendientes[clave] = tarea
+            self.pool.start(tarea, prioridad)
+        return None
+
+    def cancelar(self, ruta, tam):
+        """Saca de la cola una miniatura que ya no hace falta. False si ya empezó."""
+        clave = clave_miniatura(ruta, tam)
+        tarea = self._pendientes.get(clave)
+        if tarea is not None and self.pool.tryTake(tarea):
+            del self._pendientes[clave]
+            return True
+        return False
+
+    def ruta_en_disco(self, ruta, tam):
+        """Ruta del PNG en caché si ya se generó; si no, lo encola y devuelve ""."""
+        clave = clave_miniatura(ruta, tam)
+        if clave is None:
+            return ""
+        destino = ruta_cache(clave, self.cache_dir)
+        if os.path.exists(destino):
+            return destino
+        self.solicitar(ruta, tam)
+        return ""
+
+    def _al_generar(self, clave, ruta, tam, img):
+        self._pendientes.pop(clave, None)
+        if img.isNull():
+            return
+        self._memoria[clave] = img
+        self._memoria.move_to_end(clave)
+        while len(self._memoria) > self.max_memoria:
+            self._memoria.popitem(last=False)
+        self.miniatura_lista.emit(ruta, tam, img)
+
+
+_servicio = None
+
+
+def obtener_miniaturas():
+    """Devuelve el servicio de miniaturas único para todo el proceso."""
+    global _servicio
+    if _servicio is None:
+        _servicio = ServicioMiniaturas()
+    return _servicio
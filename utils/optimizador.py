@@ -0,0 +1,366 @@
+import os
+import json
+import shutil
+import hashlib
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+
+EXTENSIONES_IMAGEN = ('.png', '.jpg', '.jpeg', '.webp', '.bmp', '.gif')
+FORMATOS_PIL = {"jpg": "JPEG", "jpeg": "JPEG", "png": "PNG", "webp": "WEBP"}
+METADATOS_FILE = "imagenes.json"
+IMAGENES_CONFIG_FILE = os.path.join("datos", "imagenes_config.json")
+DEFAULT_IMAGES_ROOT = os.path.abspath("imagenes_productos")
+# Subcarpeta de cada SKU con los originales sin recomprimir, nombrados por su hash
+DIR_ORIGINALES = "originales"
+
+
+def ruta_imagenes_raiz():
+    """Carpeta raíz con una subcarpeta de imágenes por SKU (datos/imagenes_config.json)."""
+    if os.path.exists(IMAGENES_CONFIG_FILE):
+        with open(IMAGENES_CONFIG_FILE, "r", encoding="utf-8") as f:
+            return json.load(f).get("imagenes_raiz", DEFAULT_IMAGES_ROOT)
+    return DEFAULT_IMAGES_ROOT
+
+
+def listar_imagenes(carpeta):
+    """Imágenes de una carpeta de SKU: primero la principal y luego por nombre."""
+    if not os.path.isdir(carpeta):
+        return []
+    files = sorted(f for f in os.listdir(carpeta) if f.lower().endswith(EXTENSIONES_IMAGEN))
+    files.sort(key=lambda f: "_main" not in f)
+    return [os.path.join(carpeta, f) for f in files]
+
+
+def nombre_destino(sku, indice, formato):
+    ext = "." + formato.lower()
+    if indice == 0:
+        return f"{sku}_main{ext}"
+    return f"{sku}_{indice:02d}{ext}"
+
+
+def ruta_temporal(destino):
+    carpeta, nombre = os.path.split(destino)
+    return os.path.join(carpeta, f".{nombre}.tmp")
+
+
+def hash_archivo(ruta):
+    h = hashlib.sha256()
+    with open(ruta, "rb") as f:
+        for bloque in iter(lambda: f.read(1 << 20), b""):
+            h.update(bloque)
+    return h.hexdigest()
+
+
+def parametros_salida(opciones):
+    """Parámetros que determinan el resultado; se comparan con el manifiesto."""
+    formato = opciones["formato"].lower()
+    mantener = bool(opciones.get("mantener_original"))
+    return {
+        "ancho": None if mantener else opciones["ancho"],
+        "alto": None if mantener else opciones["alto"],
+        "formato": formato,
+        "calidad": opciones["calidad"] if formato in ("jpg", "jpeg", "webp") else None,
+        "mantener_original": mantener,
+    }
+
+
+def leer_metadatos(carpeta):
+    ruta = os.path.join(carpeta, METADATOS_FILE)
+    if not os.path.exists(ruta):
+        return {}
+    try:
+        with open(ruta, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except Exception:
+        return {}
+
+
+def optimizar_imagen(origen, destino, ancho, alto, formato, calidad, mantener_original=False):
+    """
+    Abre, convierte, redimensiona y codifica una imagen. Se ejecuta en los
+    procesos del pool, así que solo recibe y devuelve datos simples.
+    """
+    from PIL import Image
+    formato = formato.lower()
+    with Image.open(origen) as img:
+        img = img.convert("RGB")
+        if not mantener_original:
+            img = img.resize((ancho, alto), Image.Resampling.LANCZOS)
+        opciones = {}
+        if formato in ("jpg", "jpeg", "webp"):
+            opciones["quality"] = calidad
+        img.save(destino, format=FORMATOS_PIL.get(formato, formato.upper()), **opciones)
+    return destino
+
+
+def optimizar_tarea(tarea, opciones):
+    """Trabajo del pool: codifica una tarea y devuelve el hash de la salida."""
+    optimizar_imagen(tarea["lectura"], tarea["temporal"], opciones["ancho"], opciones["alto"],
+                     opciones["formato"], opciones["calidad"], opciones.get("mantener_original", False))
+    return hash_archivo(tarea["temporal"])
+
+
+def _resolver_original(carpeta, origen, manifiesto, hashes):
+    """
+    Devuelve (hash del original, ruta del original en originales/). Si
+    `origen` es una salida nuestra sin modificar, el original es el que
+    registró el manifiesto, así nunca se recomprime una imagen ya comprimida.
+    """
+    dir_originales = os.path.join(carpeta, DIR_ORIGINALES)
+    if os.path.dirname(os.path.abspath(origen)) == os.path.abspath(dir_originales):
+        nombre = os.path.basename(origen)
+        return nombre.split(".")[0], origen
+    entrada = manifiesto.get(os.path.basename(origen))
+    if entrada and os.path.dirname(os.path.abspath(origen)) == os.path.abspath(carpeta):
+        original = os.path.join(dir_originales, entrada.get("original", ""))
+        if os.path.isfile(original) and hashes(origen) == entrada.get("hash_salida"):
+            return entrada["hash_origen"], original
+    h = hashes(origen)
+    ext = os.path.splitext(origen)[1].lower()
+    return h, os.path.join(dir_originales, h + ext)
+
+
+def planificar_carpeta(sku, carpeta, origenes, opciones, etiquetas=None):
+    """
+    Tareas para llevar `origenes` (en orden: la primera es la principal) a
+    la carpeta del SKU. Con el manifiesto de imagenes.json cada tarea queda
+    como "omitir" (la salida ya existe con el mismo original y parámetros),
+    "renombrar" (existe con otro nombre, p. ej. al cambiar la principal) u
+    "optimizar". Las que se codifican escriben a un temporal que se renombra
+    al final, porque los orígenes pueden ser las imágenes de la carpeta.
+    `etiquetas` (opcional, paralela a `origenes`) marca de dónde viene cada
+    imagen (p. ej. "mockup"); si falta se conserva la del manifiesto.
+    """
+    manifiesto = leer_metadatos(carpeta).get("optimizadas", {})
+    parametros = parametros_salida(opciones)
+    memo = {}
+
+    def hashes(ruta):
+        if ruta not in memo:
+            memo[ruta] = hash_archivo(ruta)
+        return memo[ruta]
+
+    # Salidas actuales reutilizables: (hash_origen, parámetros) -> nombre
+    reutilizables = {}
+    for nombre, entrada in manifiesto.items():
+        ruta = os.path.join(carpeta, nombre)
+        if entrada.get("parametros") != parametros or not os.path.isfile(ruta):
+            continue
+        if hashes(ruta) == entrada.get("hash_salida"):
+            reutilizables.setdefault(entrada["hash_origen"], []).append(nombre)
+
+    tareas = []
+    for i, origen in enumerate(origenes):
+        destino = os.path.join(carpeta, nombre_destino(sku, i, opciones["formato"]))
+        hash_origen, original = _resolver_original(carpeta, origen, manifiesto, hashes)
+        etiqueta = etiquetas[i] if etiquetas else None
+        if etiqueta is None and os.path.dirname(os.path.abspath(origen)) == os.path.abspath(carpeta):
+            etiqueta = manifiesto.get(os.path.basename(origen), {}).get("etiqueta")
+        tareas.append({
+            "sku": sku,
+            "carpeta": carpeta,
+            "origen": origen,
+            "original": original,
+            "hash_origen": hash_origen,
+            "lectura": original if os.path.isfile(original) else origen,
+            "destino": destino,
+            "temporal": ruta_temporal(destino),
+            "accion": "optimizar",
+            "parametros": parametros,
+            "etiqueta": etiqueta,
+        })
+
+    # Primero las que ya están en su sitio, luego las que solo cambian de nombre
+    usadas = set()
+    for tarea in tareas:
+        nombre = os.path.basename(tarea["destino"])
+        if nombre in reutilizables.get(tarea["hash_origen"], []):
+            tarea["accion"] = "omitir"
+            tarea["hash_salida"] = manifiesto[nombre]["hash_salida"]
+            usadas.add(nombre)
+    for tarea in tareas:
+        if tarea["accion"] != "optimizar":
+            continue
+        libres = [n for n in reutilizables.get(tarea["hash_origen"], []) if n not in usadas]
+        if libres:
+            tarea["accion"] = "renombrar"
+            tarea["desde"] = os.path.join(carpeta, libres[0])
+            tarea["hash_salida"] = manifiesto[libres[0]]["hash_salida"]
+            usadas.add(libres[0])
+    return tareas
+
+
+def guardar_metadatos(carpeta, formato, optimizadas=None):
+    """
+    Escribe imagenes.json con la lista de imágenes, la principal y el
+    manifiesto de salidas optimizadas (hash del original, hash de la salida
+    y parámetros), que permite omitir en la siguiente pasada lo que no cambió.
+    """
+    if not carpeta or not os.path.exists(carpeta):
+        return
+    imgs = sorted([f for f in os.listdir(carpeta) if f.lower().endswith(f'.{formato}')])
+    main_img = next((f for f in imgs if "_main" in f), imgs[0] if imgs else "")
+    meta = {
+        "imagenes": imgs,
+        "principal": main_img
+    }
+    if optimizadas is not None:
+        meta["optimizadas"] = optimizadas
+    with open(os.path.join(carpeta, METADATOS_FILE), "w", encoding="utf-8") as f:
+        json.dump(meta, f, ensure_ascii=False, indent=2)
+
+
+def finalizar_carpeta(carpeta, completadas, fallidas, formato):
+    """
+    Sustituye las imágenes de la carpeta por las nuevas: guarda los
+    originales en originales/, borra las imágenes anteriores (salvo los
+    orígenes que fallaron), renombra los temporales a su nombre definitivo,
+    quita los originales que ya nadie usa y actualiza imagenes.json.
+    """
+    dir_originales = os.path.join(carpeta, DIR_ORIGINALES)
+    for tarea in completadas:
+        if not os.path.isfile(tarea["original"]) and os.path.isfile(tarea["origen"]):
+            os.makedirs(dir_originales, exist_ok=True)
+            shutil.copy2(tarea["origen"], tarea["original"])
+    for tarea in completadas:
+        if tarea["accion"] == "renombrar":
+            os.replace(tarea["desde"], tarea["temporal"])
+    finales = {os.path.normpath(t["destino"]) for t in completadas}
+    conservar = {os.path.normpath(t["origen"]) for t in fallidas}
+    for ruta in listar_imagenes(carpeta):
+        ruta = os.path.normpath(ruta)
+        if ruta not in finales and ruta not in conservar:
+            try:
+                os.remove(ruta)
+            except OSError:
+                pass
+    for tarea in completadas:
+        if tarea["accion"] != "omitir":
+            os.replace(tarea["temporal"], tarea["destino"])
+    en_uso = {os.path.normpath(t["original"]) for t in completadas + fallidas}
+    for ruta in listar_imagenes(dir_originales):
+        if os.path.normpath(ruta) not in en_uso:
+            try:
+                os.remove(ruta)
+            except OSError:
+                pass
+    optimizadas = {}
+    for t in completadas:
+        entrada = {
+            "original": os.path.basename(t["original"]),
+            "hash_origen": t["hash_origen"],
+            "hash_salida": t["hash_salida"],
+            "parametros": t["parametros"],
+        }
+        if t.get("etiqueta"):
+            entrada["etiqueta"] = t["etiqueta"]
+        optimizadas[os.path.basename(t["destino"])] = entrada
+    guardar_metadatos(carpeta, formato, optimizadas)
+    return [t["destino"] for t in completadas]
+
+
+def descartar_temporales(tareas):
+    for tarea in tareas:
+        if tarea.get("accion") == "optimizar" and os.path.exists(tarea["temporal"]):
+            try:
+                os.remove(tarea["temporal"])
+            except OSError:
+                pass
+
+
+def crear_pool(max_workers=None):
+    """
+    Pool de procesos para los lotes (optimizar imágenes, QR, etiquetas). Se
+    usa 'spawn' porque el proceso principal tiene hilos de Qt y hacer fork
+    con hilos activos no es seguro.
+    """
+    return ProcessPoolExecutor(max_workers=max_workers or os.cpu_count(),
+                               mp_context=multiprocessing.get_context("spawn"))
+
+
+def lotes_catalogo(productos, imagenes_raiz):
+    """(sku, carpeta, orígenes) de cada SKU del catálogo que tiene imágenes."""
+    lotes = []
+    vistas = set()
+    for prod in productos:
+        sku = prod.get("sku", "")
+        carpeta = os.path.join(imagenes_raiz, sku)
+        if not sku or carpeta in vistas:
+            continue
+        vistas.add(carpeta)
+        origenes = listar_imagenes(carpeta)
+        if origenes:
+            lotes.append((sku, carpeta, origenes))
+    return lotes
+
+
+def optimizar_lotes(lotes, opciones, progreso=None, imagen_lista=None, error_imagen=None,
+                    cancelado=None, max_workers=None):
+    """
+    Optimiza lotes de imágenes (uno por carpeta de SKU) en un pool de
+    procesos. Lo que el manifiesto de imagenes.json da por vigente no se
+    vuelve a codificar. Los callbacks son opcionales: `progreso(hechas,
+    total)`, `imagen_lista(destino)`, `error_imagen(origen, mensaje)` y
+    `cancelado()`. Devuelve {"cancelado", "carpetas": {carpeta: [rutas]},
+    "errores", "omitidas"}.
+    """
+    cancelado = cancelado or (lambda: False)
+    errores = []
+    planes = []
+    for sku, carpeta, origenes in lotes:
+        try:
+            planes.append(planificar_carpeta(sku, carpeta, origenes, opciones))
+        except Exception as e:
+            errores.append((carpeta, str(e)))
+    tareas = [t for plan in planes for t in plan]
+    total = len(tareas)
+    completadas = {}
+    fallidas = {}
+    hechas = 0
+    for tarea in tareas:
+        if tarea["accion"] != "optimizar":
+            completadas.setdefault(tarea["carpeta"], []).append(tarea)
+            hechas += 1
+    if progreso:
+        progreso(hechas, total)
+    a_codificar = [t for t in tareas if t["accion"] == "optimizar"]
+    interrumpido = False
+    if a_codificar:
+        with crear_pool(max_workers) as pool:
+            pendientes = {pool.submit(optimizar_tarea, t, opciones): t for t in a_codificar}
+            while pendientes and not interrumpido:
+                listos, _ = wait(pendientes, timeout=0.2, return_when=FIRST_COMPLETED)
+                for fut in listos:
+                    tarea = pendientes.pop(fut)
+                    try:
+                        tarea["hash_salida"] = fut.result()
+                        completadas.setdefault(tarea["carpeta"], []).append(tarea)
+                        if imagen_lista:
+                            imagen_lista(tarea["destino"])
+                    except Exception as e:
+                        fallidas.setdefault(tarea["carpeta"], []).append(tarea)
+                        errores.append((tarea["origen"], str(e)))
+                        if error_imagen:
+                            error_imagen(tarea["origen"], str(e))
+                    hechas += 1
+                    if progreso:
+                        progreso(hechas, total)
+                interrumpido = cancelado()
+            if interrumpido:
+                pool.shutdown(wait=True, cancel_futures=True)
+    if interrumpido:
+        descartar_temporales(tareas)
+        return {"cancelado": True, "carpetas": {}, "errores": errores, "omitidas": 0}
+    carpetas = {}
+    for plan in planes:
+        if not plan:
+            continue
+        carpeta = plan[0]["carpeta"]
+        hechas_carpeta = sorted(completadas.get(carpeta, []), key=plan.index)
+        try:
+            carpetas[carpeta] = finalizar_carpeta(carpeta, hechas_carpeta, fallidas.get(carpeta, []),
+                                                  opciones["formato"])
+        except Exception as e:
+            errores.append((carpeta, str(e)))
+    omitidas = sum(1 for t in tareas if t["accion"] == "omitir")
+    return {"cancelado": False, "carpetas": carpetas, "errores": errores, "omitidas": omitidas}
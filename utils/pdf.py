@@ -0,0 +1,58 @@
+import zlib
+
+
+def cadena_pdf(texto):
+    """Cadena literal de PDF con ( ) y \\ escapados; se codifica luego en WinAnsi."""
+    return "(" + texto.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)") + ")"
+
+
+def numero_pdf(valor):
+    """Coordenada en puntos sin ceros sobrantes: 12, 12.5, 12.125"""
+    return f"{valor:.3f}".rstrip("0").rstrip(".")
+
+
+def documento_pdf(paginas, fuentes=None, comprimir=False):
+    """
+    PDF mínimo a partir de páginas (ancho, alto, contenido) en puntos, con
+    el contenido ya como bytes. `fuentes` ({"F1": "Helvetica"}) declara
+    fuentes estándar de PDF con codificación WinAnsi: no se incrustan, así
+    que el archivo solo lleva los trazos y el texto. Con `comprimir` los
+    flujos van en FlateDecode.
+    """
+    fuentes = fuentes or {}
+    # 1 catálogo, 2 árbol de páginas, después las fuentes y por cada página
+    # su objeto Page seguido de su flujo de contenido
+    primera_fuente = 3
+    primera_pagina = primera_fuente + len(fuentes)
+    recursos = ""
+    if fuentes:
+        recursos = " /Resources << /Font << " + " ".join(
+            f"/{nombre} {primera_fuente + i} 0 R" for i, nombre in enumerate(fuentes)
+        ) + " >> >>"
+    hijos = " ".join(f"{primera_pagina + 2 * i} 0 R" for i in range(len(paginas)))
+    objetos = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        f"<< /Type /Pages /Kids [{hijos}] /Count {len(paginas)} >>".encode("ascii"),
+    ]
+    for base in fuentes.values():
+        objetos.append(f"<< /Type /Font /Subtype /Type1 /BaseFont /{base} /Encoding /WinAnsiEncoding >>".encode("ascii"))
+    for i, (ancho, alto, contenido) in enumerate(paginas):
+        objetos.append(
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {numero_pdf(ancho)} {numero_pdf(alto)}]{recursos} "
+            f"/Contents {primera_pagina + 2 * i + 1} 0 R >>".encode("ascii")
+        )
+        filtro = b""
+        if comprimir:
+            contenido = zlib.compress(contenido)
+            filtro = b" /Filter /FlateDecode"
+        objetos.append(b"<< /Length %d%s >>\nstream\n" % (len(contenido), filtro) + contenido + b"\nendstream")
+    salida = bytearray(b"%PDF-1.4\n")
+    posiciones = []
+    for i, objeto in enumerate(objetos, 1):
+        posiciones.append(len(salida))
+        salida += b"%d 0 obj\n" % i + objeto + b"\nendobj\n"
+    inicio_xref = len(salida)
+    salida += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objetos) + 1)
+    salida += b"".join(b"%010d 00000 n \n" % pos for pos in posiciones)
+    salida += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objetos) + 1, inicio_xref)
+    return bytes(salida)
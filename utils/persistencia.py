@@ -0,0 +1,181 @@
+import os
+import json
+import copy
+import tempfile
+
+# Entradas de journal a partir de las cuales se reescribe el JSON canónico
+MAX_ENTRADAS_JOURNAL = 200
+
+# {"motor": "json"} (por defecto) o {"motor": "sqlite"}
+MOTOR_CONFIG_FILE = os.path.join("datos", "almacen_config.json")
+
+
+def escribir_json_atomico(ruta, data):
+    """
+    Escribe `data` en `ruta` sin dejar nunca un archivo a medias: se escribe
+    en un temporal del mismo directorio y se renombra encima del original.
+    """
+    directorio = os.path.dirname(ruta) or "."
+    if not os.path.exists(directorio):
+        os.makedirs(directorio)
+    fd, tmp = tempfile.mkstemp(prefix=".tmp_", suffix=".json", dir=directorio)
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, ruta)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+
+def aplicar_entrada(data, entrada):
+    """Aplica una entrada del journal sobre el documento en memoria."""
+    op = entrada.get("op")
+    if op in ("set", "del"):
+        ruta = entrada["ruta"]
+        nodo = data
+        for clave in ruta[:-1]:
+            nodo = nodo.setdefault(clave, {})
+        if op == "set":
+            nodo[ruta[-1]] = entrada["valor"]
+        else:
+            nodo.pop(ruta[-1], None)
+    elif op == "upsert":
+        # Documentos lista (productos.json): reemplaza por id o agrega al final
+        valor = entrada["valor"]
+        for i, item in enumerate(data):
+            if item.get("id") == valor.get("id"):
+                data[i] = valor
+                break
+        else:
+            data.append(valor)
+    elif op == "remove":
+        data[:] = [item for item in data if item.get("id") != entrada["id"]]
+
+
+class DocumentoJson:
+    """
+    Archivo JSON de datos/ con un journal de cambios incremental.
+
+    Cada edición se agrega como una línea JSON a `<ruta>.journal`; al cargar
+    se lee el JSON canónico y se reaplican las líneas del journal. Cuando el
+    journal crece se compacta: el documento completo se reescribe de forma
+    atómica y el journal se borra. Todas las operaciones son idempotentes,
+    así que una caída entre la compactación y el borrado no pierde datos.
+    """
+
+    def __init__(self, ruta, defecto, max_entradas=MAX_ENTRADAS_JOURNAL):
+        self.ruta = ruta
+        self.ruta_journal = ruta + ".journal"
+        self.defecto = defecto
+        self.max_entradas = max_entradas
+        self._entradas = 0
+
+    def firma(self):
+        """Identifica la versión en disco (JSON + journal) para detectar cambios."""
+        firma = []
+        for ruta in (self.ruta, self.ruta_journal):
+            try:
+                st = os.stat(ruta)
+                firma.append((st.st_mtime_ns, st.st_size))
+            except OSError:
+                firma.append(None)
+        return tuple(firma)
+
+    def cargar(self):
+        if os.path.exists(self.ruta):
+            with open(self.ruta, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        else:
+            data = copy.deepcopy(self.defecto)
+        self._entradas = 0
+        if os.path.exists(self.ruta_journal):
+            with open(self.ruta_journal, "r", encoding="utf-8") as f:
+                for linea in f:
+                    try:
+                        entrada = json.loads(linea)
+                    except ValueError:
+                        # Línea truncada por una caída a mitad de escritura
+                        continue
+                    aplicar_entrada(data, entrada)
+                    self._entradas += 1
+        return data
+
+    def _registrar(self, data, entrada):
+        aplicar_entrada(data, entrada)
+        directorio = os.path.dirname(self.ruta_journal)
+        if directorio and not os.path.exists(directorio):
+            os.makedirs(directorio)
+        with open(self.ruta_journal, "a+b") as f:
+            # Si una caída dejó la última línea sin terminar, se cierra antes de agregar
+            if f.tell() > 0:
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b"\n":
+                    f.write(b"\n")
+            f.write((json.dumps(entrada, ensure_ascii=False) + "\n").encode("utf-8"))
+            f.flush()
+            os.fsync(f.fileno())
+        self._entradas += 1
+        if self._entradas >= self.max_entradas:
+            self.compactar()
+
+    def set(self, data, ruta, valor):
+        """Asigna `valor` en la ruta de claves `ruta` (p. ej. ["productos", sku])."""
+        self._registrar(data, {"op": "set", "ruta": list(ruta), "valor": valor})
+
+    def eliminar(self, data, ruta):
+        self._registrar(data, {"op": "del", "ruta": list(ruta)})
+
+    def upsert(self, data, item):
+        """Inserta o reemplaza por `id` un elemento de un documento lista."""
+        self._registrar(data, {"op": "upsert", "valor": item})
+
+    def quitar(self, data, item_id):
+        self._registrar(data, {"op": "remove", "id": item_id})
+
+    def compactar(self):
+        """
+        Reescribe el JSON canónico de forma atómica y vacía el journal. Se
+        parte de lo que hay en disco (no de una copia en memoria) para no
+        perder entradas agregadas por otro panel.
+        """
+        self.guardar(self.cargar())
+
+    def guardar(self, data):
+        """Guarda el documento completo (cambios masivos) y vacía el journal."""
+        escribir_json_atomico(self.ruta, data)
+        if os.path.exists(self.ruta_journal):
+            os.remove(self.ruta_journal)
+        self._entradas = 0
+
+
+def motor_configurado():
+    """Motor de almacenamiento elegido en datos/almacen_config.json."""
+    if os.path.exists(MOTOR_CONFIG_FILE):
+        try:
+            with open(MOTOR_CONFIG_FILE, "r", encoding="utf-8") as f:
+                return json.load(f).get("motor", "json")
+        except Exception:
+            return "json"
+    return "json"
+
+
+_documentos = {}
+
+
+def obtener_documento(ruta, defecto):
+    """
+    Devuelve el documento único para `ruta` dentro del proceso: un
+    DocumentoJson, o su equivalente SQLite si así está configurado.
+    """
+    if ruta not in _documentos:
+        if motor_configurado() == "sqlite":
+            from utils.almacen_sqlite import DocumentoSQLite, obtener_almacen, admite_documento
+            if admite_documento(ruta):
+                _documentos[ruta] = DocumentoSQLite(obtener_almacen(), os.path.basename(ruta), defecto)
+        if ruta not in _documentos:
+            _documentos[ruta] = DocumentoJson(ruta, defecto)
+    return _documentos[ruta]
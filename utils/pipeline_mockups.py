@@ -0,0 +1,166 @@
+import os
+import shutil
+import tempfile
+from concurrent.futures import wait, FIRST_COMPLETED
+from utils.optimizador import (
+    listar_imagenes, leer_metadatos, planificar_carpeta, optimizar_tarea,
+    finalizar_carpeta, descartar_temporales
+)
+from utils.render_mockup import crear_pool_render, enviar_diseno
+
+ETIQUETA_MOCKUP = "mockup"
+# Valores de `diseno` que indican que el producto no lleva diseño
+SIN_DISENO = {"", "sin diseño", "sin diseno", "ninguno"}
+# Los mockups intermedios se guardan sin pérdida y rápido: se recodifican después
+SALIDA_INTERMEDIA = {"formato": "png", "calidad": 100, "compresion": 1}
+
+
+def normalizar_diseno(texto):
+    return (texto or "").strip().lower()
+
+
+def emparejar_disenos(productos, rutas_diseno):
+    """
+    Relaciona cada archivo de diseño con los productos cuyo campo `diseno`
+    coincide con el nombre del archivo sin extensión (sin distinguir
+    mayúsculas). Devuelve ({ruta: [sku, ...]}, [diseños sin producto]).
+    """
+    por_diseno = {}
+    for prod in productos:
+        clave = normalizar_diseno(prod.get("diseno"))
+        sku = prod.get("sku", "")
+        if clave in SIN_DISENO or not sku:
+            continue
+        skus = por_diseno.setdefault(clave, [])
+        if sku not in skus:
+            skus.append(sku)
+    emparejados, sin_producto = {}, []
+    for ruta in rutas_diseno:
+        clave = normalizar_diseno(os.path.splitext(os.path.basename(ruta))[0])
+        if clave in por_diseno:
+            emparejados[ruta] = por_diseno[clave]
+        else:
+            sin_producto.append(ruta)
+    return emparejados, sin_producto
+
+
+def origenes_producto(carpeta, mockups):
+    """
+    Orígenes de la carpeta del SKU: primero los mockups nuevos (el primero
+    queda como principal) y después las fotos que ya había y que no salieron
+    de un mockup anterior, que se sustituyen.
+    """
+    manifiesto = leer_metadatos(carpeta).get("optimizadas", {})
+    propias = [
+        ruta for ruta in listar_imagenes(carpeta)
+        if manifiesto.get(os.path.basename(ruta), {}).get("etiqueta") != ETIQUETA_MOCKUP
+    ]
+    origenes = list(mockups) + propias
+    etiquetas = [ETIQUETA_MOCKUP] * len(mockups) + [None] * len(propias)
+    return origenes, etiquetas
+
+
+def ejecutar_pipeline(base, rutas_diseno, productos, colocaciones, imagenes_raiz, opciones,
+                      progreso=None, cancelado=None, max_workers=None):
+    """
+    Genera los mockups de cada diseño una sola vez y los deja optimizados en
+    la carpeta de cada SKU que lo usa (<SKU>_main, <SKU>_01...), con
+    imagenes.json actualizado. Render y optimización comparten el mismo pool
+    de procesos. `progreso(hechos, total)` y `cancelado()` son opcionales.
+    Devuelve {"skus": {sku: [rutas]}, "errores": [(ruta, mensaje)],
+    "sin_producto": [diseños], "cancelado": bool}.
+    """
+    emparejados, sin_producto = emparejar_disenos(productos, rutas_diseno)
+    resumen = {"skus": {}, "errores": [], "sin_producto": sin_producto, "cancelado": False}
+    if not emparejados:
+        return resumen
+    cancelado = cancelado or (lambda: False)
+    total = len(emparejados) + len({sku for skus in emparejados.values() for sku in skus})
+    hechos = 0
+
+    def avanzar():
+        nonlocal hechos
+        hechos += 1
+        if progreso:
+            progreso(hechos, total)
+
+    staging = tempfile.mkdtemp(prefix="mockups_")
+    pool = crear_pool_render(base, max_workers)
+    planes = {}
+    try:
+        # 1. Un render por diseño, aunque lo usen varios productos
+        renders = {}
+        for i, ruta in enumerate(emparejados):
+            carpeta = os.path.join(staging, str(i))
+            os.makedirs(carpeta)
+            renders[enviar_diseno(pool, ruta, colocaciones, carpeta, SALIDA_INTERMEDIA)] = ruta
+        mockups = {}
+        pendientes = set(renders)
+        while pendientes:
+            if cancelado():
+                resumen["cancelado"] = True
+                return resumen
+            listos, pendientes = wait(pendientes, timeout=0.2, return_when=FIRST_COMPLETED)
+            for fut in listos:
+                try:
+                    mockups[renders[fut]] = [r for r, _ in fut.result()]
+                except Exception as e:
+                    resumen["errores"].append((renders[fut], str(e)))
+                avanzar()
+
+        # 2. Planificar y optimizar cada carpeta de producto
+        tareas = {}
+        for ruta, skus in emparejados.items():
+            if ruta not in mockups:
+                continue
+            for sku in skus:
+                if sku in planes:
+                    continue
+                carpeta = os.path.join(imagenes_raiz, sku)
+                os.makedirs(carpeta, exist_ok=True)
+                origenes, etiquetas = origenes_producto(carpeta, mockups[ruta])
+                plan = planificar_carpeta(sku, carpeta, origenes, opciones, etiquetas)
+                planes[sku] = {"carpeta": carpeta, "tareas": plan, "fallidas": [], "faltan": 0}
+                for tarea in plan:
+                    if tarea["accion"] == "optimizar":
+                        tareas[pool.submit(optimizar_tarea, tarea, opciones)] = (sku, tarea)
+                        planes[sku]["faltan"] += 1
+
+        def cerrar(sku):
+            plan = planes[sku]
+            fallidas = plan["fallidas"]
+            completadas = [t for t in plan["tareas"] if t not in fallidas]
+            resumen["skus"][sku] = finalizar_carpeta(plan["carpeta"], completadas, fallidas,
+                                                     opciones["formato"])
+            avanzar()
+
+        for sku, plan in planes.items():
+            if not plan["faltan"]:
+                cerrar(sku)
+        pendientes = set(tareas)
+        while pendientes:
+            if cancelado():
+                resumen["cancelado"] = True
+                return resumen
+            listos, pendientes = wait(pendientes, timeout=0.2, return_when=FIRST_COMPLETED)
+            for fut in listos:
+                sku, tarea = tareas[fut]
+                try:
+                    tarea["hash_salida"] = fut.result()
+                except Exception as e:
+                    planes[sku]["fallidas"].append(tarea)
+                    resumen["errores"].append((tarea["origen"], str(e)))
+                planes[sku]["faltan"] -= 1
+                if not planes[sku]["faltan"]:
+                    cerrar(sku)
+        if progreso:
+            progreso(total, total)
+        return resumen
+    finally:
+        pool.shutdown(wait=True, cancel_futures=True)
+        if resumen["cancelado"]:
+            # Después de cerrar el pool: ningún proceso sigue escribiendo temporales
+            for plan in planes.values():
+                if plan["faltan"]:
+                    descartar_temporales(plan["tareas"])
+        shutil.rmtree(staging, ignore_errors=True)
@@ -0,0 +1,37 @@
+import os
+from utils.persistencia import obtener_documento
+
+DATA_DIR = "datos"
+PLANTILLAS_FILE = os.path.join(DATA_DIR, "plantillas_mockup.json")
+
+# {nombre: {"base": ruta, "areas": [{"nombre", "x", "y", "ancho", "alto", "efectos"}]}}
+
+
+def documento_plantillas():
+    return obtener_documento(PLANTILLAS_FILE, {})
+
+
+def cargar_plantillas():
+    return documento_plantillas().cargar()
+
+
+def guardar_plantilla(plantillas, nombre, base, areas):
+    """Guarda (o reemplaza) una plantilla vía journal."""
+    documento_plantillas().set(plantillas, [nombre], {"base": base, "areas": areas})
+
+
+def eliminar_plantilla(plantillas, nombre):
+    documento_plantillas().eliminar(plantillas, [nombre])
+
+
+def area_plantilla(nombre, x, y, ancho, alto, efectos=True):
+    return {"nombre": nombre, "x": x, "y": y, "ancho": ancho, "alto": alto, "efectos": efectos}
+
+
+def colocaciones(areas):
+    """Áreas de una plantilla en el formato que usa utils.render_mockup."""
+    return [
+        {"nombre": a["nombre"], "area": (a["x"], a["y"], a["ancho"], a["alto"]),
+         "efectos": a.get("efectos", True)}
+        for a in areas
+    ]
@@ -0,0 +1,429 @@
+import os
+from decimal import Decimal, ROUND_HALF_UP
+from functools import lru_cache
+import numpy as np
+from utils.persistencia import obtener_documento
+from utils.promociones import IndicePromociones, leer_momento
+
+DATA_DIR = "datos"
+PRECIOS_FILE = os.path.join(DATA_DIR, "precios.json")
+
+PRECIOS_DEFECTO = {"global": {"iva": 16, "envio": 0, "descuento": 0, "precio_base": 0, "sumar_envio": False, "otros": 0, "sumar_otros": True},
+                   "categorias": {}, "productos": {}}
+
+CAMPOS_PRECIO = ("precio_base", "descuento", "iva", "envio", "otros")
+CAMPOS_SUMAR = ("sumar_envio", "sumar_otros")
+CAMPOS_DESGLOSE = ("monto_desc", "precio_desc", "monto_iva", "precio_iva", "monto_envio", "monto_otros",
+                   "ajuste_redondeo", "precio_final")
+# "linea": cada importe del desglose se redondea a centavos al calcularlo.
+# "total": los intermedios se muestran redondeados pero el total sale del
+# valor exacto y se redondea una sola vez.
+MODOS_REDONDEO = ("linea", "total")
+# Terminación opcional del precio final en centavos (90 -> $xx.90)
+REDONDEO_DEFECTO = {"modo": "linea", "terminacion": None}
+# 100 % en centésimas de punto porcentual
+CIEN_POR_CIENTO = 10000
+# Código numérico de la fuente en MotorPrecios (índice) -> clave de FUENTES
+NIVELES = ("", "global", "categoria", "producto")
+
+# Nivel de la cascada del que salen los parámetros -> texto para la interfaz
+FUENTES = {
+    "producto": "Parámetros propios del producto.",
+    "categoria": "Parámetros heredados de la CATEGORÍA.",
+    "global": "Parámetros globales.",
+    "": "Sin parámetros asignados todavía.",
+}
+
+
+def documento_precios():
+    return obtener_documento(PRECIOS_FILE, PRECIOS_DEFECTO)
+
+
+def cargar_precios():
+    return documento_precios().cargar()
+
+
+def guardar_precios(precios):
+    documento_precios().guardar(precios)
+
+
+def guardar_parametros_precio(precios, ruta, parametros):
+    """Guarda un solo nivel de la cascada (p. ej. ["productos", sku]) vía journal."""
+    documento_precios().set(precios, ruta, parametros)
+
+
+def eliminar_parametros_precio(precios, ruta):
+    """Borra un nivel de la cascada o una promoción (["promociones", id]) vía journal."""
+    documento_precios().eliminar(precios, ruta)
+
+
+def valores_nivel(nivel, iva, envio):
+    """Parámetros de un nivel de la cascada; IVA y envío, si faltan, son los heredados."""
+    return {
+        "precio_base": nivel.get("precio_base", 0),
+        "descuento": nivel.get("descuento", 0),
+        "iva": nivel.get("iva", iva),
+        "envio": nivel.get("envio", envio),
+        "sumar_envio": nivel.get("sumar_envio", False),
+        "otros": nivel.get("otros", 0),
+        "sumar_otros": nivel.get("sumar_otros", True),
+    }
+
+
+def resolver_parametros(precios, sku, categoria):
+    """
+    Parámetros de precio de un producto según la prioridad producto >
+    categoría > global. Precio base, descuento y otros son del nivel que
+    aplica; IVA y envío, si ese nivel no los define, se heredan del
+    siguiente. Devuelve (parámetros, fuente) con fuente en FUENTES.
+    """
+    pprod = precios.get("productos", {}).get(sku)
+    pcat = precios.get("categorias", {}).get(categoria)
+    pglob = precios.get("global", {})
+    glob = valores_nivel(pglob, 0, 0)
+    heredado = valores_nivel(pcat, glob["iva"], glob["envio"]) if pcat else glob
+    if pprod:
+        return valores_nivel(pprod, heredado["iva"], heredado["envio"]), "producto"
+    if pcat:
+        return heredado, "categoria"
+    return glob, "global" if pglob else ""
+
+
+@lru_cache(maxsize=65536)
+def a_centesimas(valor):
+    """
+    Número de precios.json a entero exacto en centésimas: un importe en
+    centavos o un porcentaje en centésimas de punto (16.5 -> 1650). Pasa
+    por el texto del número para que 1.005 sea 1.005 y no 1.00499...; la
+    mitad se redondea alejándose de cero, como round() de WooCommerce.
+    """
+    if valor in (None, ""):
+        return 0
+    return int((Decimal(str(valor)) * 100).quantize(Decimal(1), ROUND_HALF_UP))
+
+
+def de_centesimas(valor):
+    """Entero en centésimas -> Decimal con dos decimales exactos."""
+    return Decimal(int(valor)).scaleb(-2)
+
+
+def dividir_redondeando(numerador, denominador):
+    """numerador / denominador (> 0) en enteros, redondeando la mitad alejándose de cero."""
+    cociente = (abs(numerador) * 2 + denominador) // (2 * denominador)
+    return -cociente if numerador < 0 else cociente
+
+
+def aplicar_terminacion(centavos, terminacion):
+    """Sube el precio al siguiente importe que termina en `terminacion` centavos (.90)."""
+    if terminacion is None or centavos <= 0:
+        return centavos
+    candidato = centavos // 100 * 100 + terminacion
+    return candidato if candidato >= centavos else candidato + 100
+
+
+def politica_redondeo(precios):
+    """(modo, terminación en centavos o None) según la clave "redondeo" de precios.json."""
+    regla = {**REDONDEO_DEFECTO, **(precios.get("redondeo") or {})}
+    modo = regla["modo"] if regla["modo"] in MODOS_REDONDEO else "linea"
+    terminacion = regla["terminacion"]
+    if terminacion not in (None, ""):
+        terminacion = a_centesimas(terminacion) % 100
+    else:
+        terminacion = None
+    return modo, terminacion
+
+
+def centesimas_nivel(nivel, iva, envio):
+    """valores_nivel en enteros (centavos y centésimas de punto); `iva` y `envio` heredados ya vienen así."""
+    valores = {campo: a_centesimas(nivel.get(campo, 0)) for campo in CAMPOS_PRECIO}
+    if "iva" not in nivel:
+        valores["iva"] = iva
+    if "envio" not in nivel:
+        valores["envio"] = envio
+    valores["sumar_envio"] = bool(nivel.get("sumar_envio", False))
+    valores["sumar_otros"] = bool(nivel.get("sumar_otros", True))
+    return valores
+
+
+@lru_cache(maxsize=4096)
+def desglose_centavos(base, descuento, iva, envio, otros, sumar_envio, sumar_otros, modo="linea", terminacion=None):
+    """
+    Desglose exacto en enteros: importes en centavos, descuento e IVA en
+    centésimas de punto. Devuelve los valores de CAMPOS_DESGLOSE en orden.
+    Muchos productos comparten parámetros, así que se guarda en caché.
+    """
+    bruto_desc = base * (CIEN_POR_CIENTO - descuento)
+    precio_desc = dividir_redondeando(bruto_desc, CIEN_POR_CIENTO)
+    if modo == "total":
+        precio_iva = dividir_redondeando(bruto_desc * (CIEN_POR_CIENTO + iva), CIEN_POR_CIENTO ** 2)
+        monto_iva = precio_iva - precio_desc
+    else:
+        monto_iva = dividir_redondeando(precio_desc * iva, CIEN_POR_CIENTO)
+        precio_iva = precio_desc + monto_iva
+    monto_envio = envio if sumar_envio else 0
+    monto_otros = otros if sumar_otros else 0
+    total = precio_iva + monto_envio + monto_otros
+    final = aplicar_terminacion(total, terminacion)
+    return (base - precio_desc, precio_desc, monto_iva, precio_iva, monto_envio, monto_otros,
+            final - total, final)
+
+
+def calcular_desglose(parametros, politica=("linea", None)):
+    """
+    Desglose tipo factura con importes Decimal exactos a centavos:
+    montos intermedios, ajuste de redondeo y precio final.
+    `politica` es (modo, terminación) de politica_redondeo.
+    """
+    centavos = desglose_centavos(
+        *(a_centesimas(parametros[campo]) for campo in CAMPOS_PRECIO),
+        bool(parametros["sumar_envio"]), bool(parametros["sumar_otros"]), *politica
+    )
+    return {**parametros, **{campo: de_centesimas(c) for campo, c in zip(CAMPOS_DESGLOSE, centavos)}}
+
+
+class MotorPrecios:
+    """
+    Cascada de precios y desglose de todo el catálogo en arreglos NumPy, una
+    fila por producto (en el orden de `productos`). Las columnas son enteros
+    int64: importes en centavos y porcentajes en centésimas de punto, con el
+    mismo redondeo que desglose_centavos, así que da exactamente lo mismo que
+    resolver_parametros + calcular_desglose producto a producto. (Exacto
+    mientras base x 2·10^8 quepa en int64: precios hasta ~460 millones.)
+
+    `precios` se guarda por referencia: tras modificar una regla en ese dict
+    (p. ej. con guardar_parametros_precio), aplicar_cambio(ruta) recalcula
+    solo las filas a las que puede afectar.
+
+    Con `momento` se aplican además las promociones vigentes en esa fecha
+    (ver utils.promociones); sin él, los precios regulares de la cascada.
+    """
+
+    def __init__(self, productos, precios, momento=None):
+        self.precios = precios
+        self.momento = leer_momento(momento)
+        self._indice = None
+        self.skus = [p.get("sku", "") for p in productos]
+        self.categorias = [p.get("categoria", "") for p in productos]
+        self.n = len(productos)
+        self._filas_sku = {}
+        for fila, sku in enumerate(self.skus):
+            self._filas_sku.setdefault(sku, []).append(fila)
+        # Cada categoría distinta se resuelve una vez y se reparte por código
+        self._nombres_categoria = sorted(set(self.categorias))
+        self._codigos = {nombre: i for i, nombre in enumerate(self._nombres_categoria)}
+        self._codigo_categoria = np.array([self._codigos[c] for c in self.categorias], dtype=np.intp)
+        self.columnas = {campo: np.zeros(self.n, dtype=np.int64) for campo in CAMPOS_PRECIO + CAMPOS_DESGLOSE}
+        self.columnas.update({campo: np.zeros(self.n, dtype=bool) for campo in CAMPOS_SUMAR})
+        self.fuente = np.zeros(self.n, dtype=np.int8)
+        # Índice en indice_promociones() de la promoción aplicada, -1 si ninguna
+        self.promocion = np.full(self.n, -1, dtype=np.int32)
+        # Filas cuyo resultado cambia si cambia la regla global
+        self._usa_global = np.ones(self.n, dtype=bool)
+        self.recalcular()
+
+    def __len__(self):
+        return self.n
+
+    def recalcular(self, filas=None):
+        """Resuelve y calcula las filas indicadas (todas si no se indican)."""
+        filas = np.arange(self.n) if filas is None else np.asarray(filas, dtype=np.intp)
+        if len(filas) == 0:
+            return filas
+        valores, sumar, fuente, hereda_global = self._resolver(filas)
+        promocion = np.full(len(filas), -1, dtype=np.int32)
+        if self.momento is not None:
+            indice = self.indice_promociones()
+            promocion = self.promociones_por_fila(indice.vigentes(self.momento), filas)
+            aplica = promocion >= 0
+            descuentos = np.array([a_centesimas(p["descuento"]) for p in indice.promociones], dtype=np.int64)
+            valores["descuento"][aplica] = descuentos[promocion[aplica]]
+        for campo, columna in {**valores, **sumar}.items():
+            self.columnas[campo][filas] = columna
+        for campo, columna in self.desglose(filas).items():
+            self.columnas[campo][filas] = columna
+        self.fuente[filas] = fuente
+        self.promocion[filas] = promocion
+        self._usa_global[filas] = hereda_global
+        return filas
+
+    def desglose(self, filas=None, descuento=None):
+        """
+        Columnas del desglose (centavos) de las filas indicadas (todas si no
+        se indican) a partir de sus parámetros resueltos. Con `descuento`
+        (centésimas de punto, uno por fila) se calcula con ese descuento en
+        vez del resuelto, p. ej. el de una oferta, sin tocar las columnas.
+        """
+        filas = np.arange(self.n) if filas is None else np.asarray(filas, dtype=np.intp)
+        valores = {campo: self.columnas[campo][filas] for campo in CAMPOS_PRECIO}
+        if descuento is not None:
+            valores["descuento"] = np.asarray(descuento, dtype=np.int64)
+        sumar = {campo: self.columnas[campo][filas] for campo in CAMPOS_SUMAR}
+        return self._desglose(valores, sumar, *politica_redondeo(self.precios))
+
+    def filas_afectadas(self, ruta):
+        """Filas que dependen de la regla en `ruta`: ["productos", sku], ["categorias", cat] o ["global"]."""
+        if len(ruta) >= 2 and ruta[0] == "productos":
+            return np.array(self._filas_sku.get(ruta[1], []), dtype=np.intp)
+        if len(ruta) >= 2 and ruta[0] == "categorias":
+            if ruta[1] not in self._codigos:
+                return np.array([], dtype=np.intp)
+            return np.flatnonzero(self._codigo_categoria == self._codigos[ruta[1]])
+        if ruta and ruta[0] == "global":
+            return np.flatnonzero(self._usa_global)
+        return np.arange(self.n)
+
+    def aplicar_cambio(self, ruta):
+        """Recalcula tras cambiar la regla en `ruta`; devuelve las filas recalculadas."""
+        if ruta and ruta[0] == "promociones":
+            self._indice = None
+            if self.momento is None:
+                return np.array([], dtype=np.intp)
+        return self.recalcular(self.filas_afectadas(ruta))
+
+    def en_momento(self, momento):
+        """Recalcula todo con las promociones vigentes en `momento` (None: precios regulares)."""
+        self.momento = leer_momento(momento)
+        return self.recalcular()
+
+    def indice_promociones(self):
+        if self._indice is None:
+            self._indice = IndicePromociones(self.precios.get("promociones"))
+        return self._indice
+
+    def promociones_por_fila(self, vigentes, filas=None):
+        """
+        Promoción ganadora (índice del índice de promociones, -1 si ninguna)
+        de cada fila entre las `vigentes`, que vienen de menor a mayor
+        precedencia: se asignan en ese orden y la última que cubre una fila
+        se queda.
+        """
+        filas = np.arange(self.n) if filas is None else np.asarray(filas, dtype=np.intp)
+        ganadora = np.full(len(filas), -1, dtype=np.int32)
+        if not vigentes:
+            return ganadora
+        promociones = self.indice_promociones().promociones
+        codigos = self._codigo_categoria[filas]
+        local = None
+        for i in vigentes:
+            p = promociones[i]
+            if p["alcance"] == "global":
+                ganadora[:] = i
+            elif p["alcance"] == "categoria":
+                if p["objetivo"] in self._codigos:
+                    ganadora[codigos == self._codigos[p["objetivo"]]] = i
+            else:
+                if local is None:
+                    local = np.full(self.n, -1, dtype=np.intp)
+                    local[filas] = np.arange(len(filas))
+                posiciones = local[self._filas_sku.get(p["objetivo"], [])]
+                ganadora[posiciones[posiciones >= 0]] = i
+        return ganadora
+
+    def valor(self, campo, i):
+        """Valor de una celda como Decimal (importes en pesos, porcentajes en %)."""
+        return de_centesimas(self.columnas[campo][i])
+
+    def fila(self, i):
+        """Parámetros, desglose y fuente de una fila, como calcular_desglose (en Decimal)."""
+        datos = {campo: self.valor(campo, i) for campo in CAMPOS_PRECIO + CAMPOS_DESGLOSE}
+        datos.update({campo: bool(self.columnas[campo][i]) for campo in CAMPOS_SUMAR})
+        datos["fuente"] = NIVELES[self.fuente[i]]
+        datos["promocion"] = self.indice_promociones().ids[self.promocion[i]] if self.promocion[i] >= 0 else None
+        return datos
+
+    def _resolver(self, filas):
+        precios = self.precios
+        pglob = precios.get("global", {})
+        categorias = precios.get("categorias", {})
+        k = len(filas)
+
+        # Global (o parámetros vacíos) como punto de partida de todas las filas
+        glob = centesimas_nivel(pglob, 0, 0)
+        valores = {campo: np.full(k, glob[campo], dtype=np.int64) for campo in CAMPOS_PRECIO}
+        sumar = {campo: np.full(k, glob[campo], dtype=bool) for campo in CAMPOS_SUMAR}
+        fuente = np.full(k, NIVELES.index("global") if pglob else 0, dtype=np.int8)
+        hereda = {"iva": np.ones(k, dtype=bool), "envio": np.ones(k, dtype=bool)}
+
+        # Categoría: tabla por categoría distinta y reparto por código
+        tabla = [categorias.get(nombre) or None for nombre in self._nombres_categoria]
+        if any(tabla):
+            codigos = self._codigo_categoria[filas]
+            en_categoria = np.array([p is not None for p in tabla], dtype=bool)[codigos]
+            resueltas = [centesimas_nivel(p, glob["iva"], glob["envio"]) if p else glob for p in tabla]
+            for campo, destino in list(valores.items()) + list(sumar.items()):
+                columna = np.array([r[campo] for r in resueltas], dtype=destino.dtype)
+                destino[en_categoria] = columna[codigos[en_categoria]]
+            for campo, destino in hereda.items():
+                columna = np.array([p is None or campo not in p for p in tabla], dtype=bool)
+                destino[en_categoria] = columna[codigos[en_categoria]]
+            fuente[en_categoria] = NIVELES.index("categoria")
+
+        # Producto: reglas sueltas; se recorre lo más corto entre las filas
+        # pedidas y las reglas, y se escribe de una vez
+        reglas = precios.get("productos", {})
+        posiciones, propios = [], []
+        if k <= len(reglas):
+            for i, fila in enumerate(filas.tolist()):
+                pprod = reglas.get(self.skus[fila])
+                if pprod:
+                    posiciones.append(i)
+                    propios.append(pprod)
+        else:
+            local = np.full(self.n, -1, dtype=np.intp)
+            local[filas] = np.arange(k)
+            for sku, pprod in reglas.items():
+                if not pprod:
+                    continue
+                for fila in self._filas_sku.get(sku, ()):
+                    if local[fila] >= 0:
+                        posiciones.append(local[fila])
+                        propios.append(pprod)
+        if posiciones:
+            posiciones = np.array(posiciones, dtype=np.intp)
+            resueltos = [
+                centesimas_nivel(pprod, iva, envio) for pprod, iva, envio in
+                zip(propios, valores["iva"][posiciones].tolist(), valores["envio"][posiciones].tolist())
+            ]
+            for campo, destino in list(valores.items()) + list(sumar.items()):
+                destino[posiciones] = np.array([r[campo] for r in resueltos], dtype=destino.dtype)
+            for campo, destino in hereda.items():
+                destino[posiciones] &= np.array([campo not in pprod for pprod in propios], dtype=bool)
+            fuente[posiciones] = NIVELES.index("producto")
+
+        hereda_global = (fuente <= NIVELES.index("global")) | hereda["iva"] | hereda["envio"]
+        return valores, sumar, fuente, hereda_global
+
+    @staticmethod
+    def _desglose(valores, sumar, modo, terminacion):
+        """desglose_centavos sobre columnas int64, con el mismo redondeo entero."""
+        def dividir(numerador, denominador):
+            cociente = (np.abs(numerador) * 2 + denominador) // (2 * denominador)
+            return np.where(numerador < 0, -cociente, cociente)
+
+        base = valores["precio_base"]
+        bruto_desc = base * (CIEN_POR_CIENTO - valores["descuento"])
+        precio_desc = dividir(bruto_desc, CIEN_POR_CIENTO)
+        if modo == "total":
+            precio_iva = dividir(bruto_desc * (CIEN_POR_CIENTO + valores["iva"]), CIEN_POR_CIENTO ** 2)
+            monto_iva = precio_iva - precio_desc
+        else:
+            monto_iva = dividir(precio_desc * valores["iva"], CIEN_POR_CIENTO)
+            precio_iva = precio_desc + monto_iva
+        monto_envio = np.where(sumar["sumar_envio"], valores["envio"], 0)
+        monto_otros = np.where(sumar["sumar_otros"], valores["otros"], 0)
+        total = precio_iva + monto_envio + monto_otros
+        final = total
+        if terminacion is not None:
+            candidato = total // 100 * 100 + terminacion
+            candidato = np.where(candidato >= total, candidato, candidato + 100)
+            final = np.where(total > 0, candidato, total)
+        return {
+            "monto_desc": base - precio_desc,
+            "precio_desc": precio_desc,
+            "monto_iva": monto_iva,
+            "precio_iva": precio_iva,
+            "monto_envio": monto_envio,
+            "monto_otros": monto_otros,
+            "ajuste_redondeo": final - total,
+            "precio_final": final,
+        }
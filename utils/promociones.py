@@ -0,0 +1,114 @@
+from bisect import bisect_right
+from datetime import datetime
+
+# Promociones programadas en precios.json, bajo "promociones" por id:
+#   {"buen-fin": {"nombre": "Buen Fin", "alcance": "categoria", "objetivo": "Tazas",
+#                 "descuento": 25, "inicio": "2026-11-13T00:00", "fin": "2026-11-17T00:00",
+#                 "prioridad": 10}}
+# Mientras está vigente (inicio <= T < fin) su descuento sustituye al que da
+# la cascada; el resto de parámetros sigue saliendo de la cascada. Sin
+# inicio o sin fin queda abierta por ese lado.
+ALCANCES = ("global", "categoria", "producto")
+NOMBRES_ALCANCE = {"global": "Todo el catálogo", "categoria": "Categoría", "producto": "Producto"}
+
+
+def leer_momento(valor):
+    """Fecha ISO ("2026-11-13", "2026-11-13T10:00") a datetime local sin zona; None si está vacía."""
+    if valor in (None, ""):
+        return None
+    if isinstance(valor, datetime):
+        momento = valor
+    else:
+        try:
+            momento = datetime.fromisoformat(str(valor).strip())
+        except ValueError:
+            raise ValueError(f"Fecha inválida: {valor}")
+    if momento.tzinfo is not None:
+        momento = momento.astimezone().replace(tzinfo=None)
+    return momento
+
+
+def validar_promocion(promo):
+    """Promoción normalizada (fechas como datetime) o ValueError con el motivo."""
+    alcance = promo.get("alcance", "global")
+    if alcance not in ALCANCES:
+        raise ValueError(f"Alcance desconocido: {alcance}")
+    objetivo = promo.get("objetivo", "")
+    if alcance != "global" and not objetivo:
+        raise ValueError("Falta " + ("la categoría" if alcance == "categoria" else "el SKU") + " a la que aplica")
+    try:
+        descuento = float(promo.get("descuento"))
+        prioridad = int(promo.get("prioridad", 0) or 0)
+    except (TypeError, ValueError):
+        raise ValueError("Descuento y prioridad deben ser números")
+    if not 0 <= descuento <= 100:
+        raise ValueError("El descuento debe estar entre 0 y 100")
+    inicio, fin = leer_momento(promo.get("inicio")), leer_momento(promo.get("fin"))
+    if inicio and fin and fin <= inicio:
+        raise ValueError("La promoción termina antes de empezar")
+    return {
+        "nombre": promo.get("nombre", ""),
+        "alcance": alcance,
+        "objetivo": "" if alcance == "global" else objetivo,
+        "descuento": descuento,
+        "prioridad": prioridad,
+        "inicio": inicio,
+        "fin": fin,
+    }
+
+
+class IndicePromociones:
+    """
+    Índice de intervalos de las promociones. Los inicios y fines ordenados
+    parten la línea de tiempo en tramos en los que el conjunto de
+    promociones vigentes no cambia; cada tramo guarda ese conjunto ya
+    ordenado por precedencia, así que "¿qué hay vigente en T?" es un
+    bisect sobre los bordes, sin recorrer las promociones.
+
+    Las promociones inválidas no entran al índice; quedan en `invalidas`
+    como (id, motivo).
+    """
+
+    def __init__(self, promociones):
+        self.ids, self.promociones, self.invalidas = [], [], []
+        for promo_id, promo in (promociones or {}).items():
+            try:
+                normal = validar_promocion(promo)
+            except ValueError as e:
+                self.invalidas.append((promo_id, str(e)))
+                continue
+            self.ids.append(promo_id)
+            self.promociones.append(normal)
+        bordes = set()
+        for p in self.promociones:
+            bordes.update(m for m in (p["inicio"], p["fin"]) if m is not None)
+        self.bordes = sorted(bordes)
+        # Tramo s = [bordes[s-1], bordes[s]); el 0 y el último quedan abiertos
+        tramos = [[] for _ in range(len(self.bordes) + 1)]
+        for i, p in enumerate(self.promociones):
+            desde = bisect_right(self.bordes, p["inicio"]) if p["inicio"] else 0
+            hasta = bisect_right(self.bordes, p["fin"]) if p["fin"] else len(tramos)
+            # bisect_right(fin) es el tramo que empieza en fin: ya no está vigente
+            for s in range(desde, hasta):
+                tramos[s].append(i)
+        self.tramos = [tuple(sorted(t, key=self.precedencia)) for t in tramos]
+
+    def __len__(self):
+        return len(self.promociones)
+
+    def precedencia(self, i):
+        # Entre promociones vigentes del mismo producto gana la de mayor
+        # prioridad; a igual prioridad la más específica y luego la que
+        # empieza más tarde
+        p = self.promociones[i]
+        return p["prioridad"], ALCANCES.index(p["alcance"]), p["inicio"] or datetime.min, i
+
+    def tramo(self, momento):
+        return bisect_right(self.bordes, leer_momento(momento))
+
+    def vigentes(self, momento):
+        """Índices de las promociones vigentes en `momento`, de menor a mayor precedencia."""
+        return self.tramos[self.tramo(momento)]
+
+    def inicio_tramo(self, s):
+        return self.bordes[s - 1] if s > 0 else None
@@ -0,0 +1,272 @@
+import os
+import json
+from functools import lru_cache
+from concurrent.futures import wait, FIRST_COMPLETED
+from utils.persistencia import escribir_json_atomico
+from utils.optimizador import crear_pool
+from utils.pdf import documento_pdf
+
+ESTILOS_QR = ["Cuadrado", "Redondeado", "Circular"]
+# Formatos de archivo: los vectoriales solo admiten módulos cuadrados
+FORMATOS_QR = ["png", "svg", "pdf"]
+FORMATOS_VECTORIALES = ("svg", "pdf")
+QR_DIR = os.path.abspath("qr_productos")
+MANIFIESTO_QR = "manifiesto.json"
+CAMPOS_MANIFIESTO_QR = ("texto", "estilo", "color", "fondo", "formato")
+# Matrices de QR ya codificadas que se conservan por proceso
+MAX_MATRICES_QR = 1024
+
+
+def color_rgb(color):
+    """'#RRGGBB' -> (r, g, b)"""
+    return tuple(int(color.lstrip('#')[i:i+2], 16) for i in (0, 2, 4))
+
+
+def texto_producto(producto):
+    """Contenido del QR de un producto: su URL o, si no tiene, nombre e id."""
+    if 'url' in producto:
+        return producto['url']
+    return f"Producto: {producto['nombre']} (ID: {producto['id']})"
+
+
+@lru_cache(maxsize=MAX_MATRICES_QR)
+def matriz_qr(texto, nivel):
+    """
+    (versión, módulos) del QR de `texto` con el nivel de corrección `nivel`.
+    Elegir la versión y calcular Reed-Solomon es lo caro; el estilo, los
+    colores y el borde solo afectan al dibujo, así que no forman parte de la
+    clave y cambiarlos reutiliza la matriz.
+    """
+    import qrcode
+    qr = qrcode.QRCode(version=1, error_correction=nivel)
+    qr.add_data(texto)
+    qr.make(fit=True)
+    return qr.version, tuple(tuple(fila) for fila in qr.modules)
+
+
+def qr_codificado(texto, box_size=10, border=4):
+    """QRCode listo para make_image con la matriz tomada de la caché."""
+    import qrcode
+    nivel = qrcode.constants.ERROR_CORRECT_H
+    version, modulos = matriz_qr(texto, nivel)
+    qr = qrcode.QRCode(version=version, error_correction=nivel, box_size=box_size, border=border)
+    qr.modules = [list(fila) for fila in modulos]
+    qr.modules_count = len(modulos)
+    # make_image solo vuelve a codificar si data_cache está vacío
+    qr.data_cache = modulos
+    return qr
+
+
+def modulos_qr(texto):
+    """Matriz de módulos (tupla de filas de bool) del QR de `texto`, sin borde."""
+    import qrcode
+    return matriz_qr(texto, qrcode.constants.ERROR_CORRECT_H)[1]
+
+
+def rasterizar_qr(modulos, box_size=10, border=4, color_qr="#000000", color_fondo="#FFFFFF"):
+    """
+    Imagen RGB de una matriz de módulos cuadrados en una sola pasada con
+    NumPy: se añade el borde, se repite cada módulo box_size veces en ambos
+    ejes y los índices 0/1 se traducen a colores con una paleta.
+    """
+    import numpy as np
+    from PIL import Image
+    matriz = np.pad(np.asarray(modulos, dtype=np.uint8), border)
+    pixeles = matriz.repeat(box_size, axis=0).repeat(box_size, axis=1)
+    img = Image.fromarray(pixeles, "P")
+    img.putpalette(color_rgb(color_fondo) + color_rgb(color_qr))
+    return img.convert("RGB")
+
+
+def tramos_qr(modulos):
+    """(fila, columna, largo) de cada tramo horizontal de módulos oscuros."""
+    for y, fila in enumerate(modulos):
+        x = 0
+        n = len(fila)
+        while x < n:
+            if fila[x]:
+                inicio = x
+                while x < n and fila[x]:
+                    x += 1
+                yield y, inicio, x - inicio
+            else:
+                x += 1
+
+
+def qr_svg(modulos, box_size=10, border=4, color_qr="#000000", color_fondo="#FFFFFF"):
+    """SVG con un solo <path>: cada tramo horizontal de módulos es un rectángulo."""
+    lado = (len(modulos) + 2 * border) * box_size
+    trazo = "".join(
+        f"M{(x + border) * box_size},{(y + border) * box_size}h{largo * box_size}v{box_size}h-{largo * box_size}z"
+        for y, x, largo in tramos_qr(modulos)
+    )
+    return (
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{lado}" height="{lado}" '
+        f'viewBox="0 0 {lado} {lado}" shape-rendering="crispEdges">'
+        f'<rect width="{lado}" height="{lado}" fill="{color_fondo}"/>'
+        f'<path fill="{color_qr}" d="{trazo}"/></svg>\n'
+    )
+
+
+def qr_pdf(modulos, box_size=10, border=4, color_qr="#000000", color_fondo="#FFFFFF"):
+    """PDF de una página (1 unidad = 1 punto) con los módulos como rectángulos."""
+    lado = (len(modulos) + 2 * border) * box_size
+    rgb = lambda c: " ".join(f"{v / 255:.3f}" for v in color_rgb(c))
+    ops = [f"{rgb(color_fondo)} rg 0 0 {lado} {lado} re f", f"{rgb(color_qr)} rg"]
+    for y, x, largo in tramos_qr(modulos):
+        # PDF tiene el origen abajo a la izquierda
+        ops.append(f"{(x + border) * box_size} {lado - (y + border + 1) * box_size} "
+                   f"{largo * box_size} {box_size} re")
+    ops.append("f")
+    contenido = "\n".join(ops).encode("ascii")
+    return documento_pdf([(lado, lado, contenido)])
+
+
+def generar_qr(texto, estilo="Cuadrado", color_qr="#000000", color_fondo="#FFFFFF"):
+    """Imagen PIL del código QR de `texto` con el estilo de módulos elegido."""
+    if estilo not in ("Redondeado", "Circular"):
+        return rasterizar_qr(modulos_qr(texto), color_qr=color_qr, color_fondo=color_fondo)
+    # Importación diferida: qrcode y PIL solo se cargan al generar
+    from qrcode.image.styledpil import StyledPilImage
+    from qrcode.image.styles.moduledrawers import RoundedModuleDrawer, CircleModuleDrawer
+    module_drawer = RoundedModuleDrawer() if estilo == "Redondeado" else CircleModuleDrawer()
+    return qr_codificado(texto).make_image(
+        image_factory=StyledPilImage,
+        module_drawer=module_drawer,
+        color=color_rgb(color_qr),
+        background=color_rgb(color_fondo)
+    ).get_image()
+
+
+def guardar_qr(texto, ruta, estilo="Cuadrado", color_qr="#000000", color_fondo="#FFFFFF"):
+    """Guarda el QR en el formato que indica la extensión (.svg y .pdf son vectoriales)."""
+    formato = os.path.splitext(ruta)[1].lower().lstrip(".")
+    if formato in FORMATOS_VECTORIALES:
+        if estilo in ("Redondeado", "Circular"):
+            raise ValueError("Los formatos vectoriales solo admiten el estilo Cuadrado")
+        modulos = modulos_qr(texto)
+        if formato == "svg":
+            with open(ruta, "w", encoding="utf-8") as f:
+                f.write(qr_svg(modulos, color_qr=color_qr, color_fondo=color_fondo))
+        else:
+            with open(ruta, "wb") as f:
+                f.write(qr_pdf(modulos, color_qr=color_qr, color_fondo=color_fondo))
+    else:
+        generar_qr(texto, estilo, color_qr, color_fondo).save(ruta)
+    return ruta
+
+
+def filtrar_productos(productos, filtro):
+    """Productos cuyo SKU, nombre o categoría contienen `filtro` (sin distinguir mayúsculas)."""
+    filtro = (filtro or "").strip().upper()
+    if not filtro:
+        return list(productos)
+    return [
+        p for p in productos
+        if filtro in " ".join(str(p.get(c, "")) for c in ("sku", "nombre", "categoria")).upper()
+    ]
+
+
+def ruta_qr(carpeta, sku, formato="png"):
+    return os.path.join(carpeta, sku, f"{sku}_qr.{formato}")
+
+
+def leer_manifiesto_qr(carpeta=QR_DIR):
+    ruta = os.path.join(carpeta, MANIFIESTO_QR)
+    if not os.path.exists(ruta):
+        return {}
+    try:
+        with open(ruta, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except Exception:
+        return {}
+
+
+def generar_qr_tarea(tarea):
+    """Trabajo del pool: genera el QR de un producto y lo guarda vía temporal."""
+    destino = tarea["destino"]
+    os.makedirs(os.path.dirname(destino), exist_ok=True)
+    base, ext = os.path.splitext(destino)
+    # El temporal conserva la extensión: guardar_qr elige el formato por ella
+    temporal = base + ".tmp" + ext
+    guardar_qr(tarea["texto"], temporal, tarea["estilo"], tarea["color"], tarea["fondo"])
+    os.replace(temporal, destino)
+    return destino
+
+
+def planificar_qr(productos, carpeta, estilo, color, fondo, formato="png"):
+    """
+    Tareas de QR por SKU. Las que el manifiesto ya registra con el mismo
+    texto, estilo, colores y formato (y cuyo archivo existe) no se vuelven a
+    generar.
+    """
+    manifiesto = leer_manifiesto_qr(carpeta)
+    tareas, omitidas, vistos = [], [], set()
+    for prod in productos:
+        sku = prod.get("sku", "")
+        if not sku or sku in vistos:
+            continue
+        vistos.add(sku)
+        tarea = {
+            "sku": sku,
+            "texto": texto_producto(prod),
+            "estilo": estilo,
+            "color": color,
+            "fondo": fondo,
+            "formato": formato,
+            "destino": ruta_qr(carpeta, sku, formato),
+        }
+        entrada = manifiesto.get(sku, {})
+        vigente = all(entrada.get(k, "png" if k == "formato" else None) == tarea[k] for k in CAMPOS_MANIFIESTO_QR)
+        if vigente and os.path.isfile(tarea["destino"]):
+            omitidas.append(tarea)
+        else:
+            tareas.append(tarea)
+    return tareas, omitidas
+
+
+def generar_qr_lote(productos, carpeta=QR_DIR, estilo="Cuadrado", color="#000000", fondo="#FFFFFF",
+                    progreso=None, cancelado=None, max_workers=None, formato="png"):
+    """
+    Genera en paralelo el QR de cada producto en <carpeta>/<SKU>/<SKU>_qr.<formato>
+    y actualiza <carpeta>/manifiesto.json. Devuelve {"generados": [rutas],
+    "omitidos", "errores": [(sku, mensaje)], "cancelado"}.
+    """
+    cancelado = cancelado or (lambda: False)
+    if formato in FORMATOS_VECTORIALES and estilo in ("Redondeado", "Circular"):
+        raise ValueError("Los formatos vectoriales solo admiten el estilo Cuadrado")
+    tareas, omitidas = planificar_qr(productos, carpeta, estilo, color, fondo, formato)
+    total = len(tareas) + len(omitidas)
+    hechas = len(omitidas)
+    if progreso:
+        progreso(hechas, total)
+    manifiesto = leer_manifiesto_qr(carpeta)
+    resultado = {"generados": [], "omitidos": len(omitidas), "errores": [], "cancelado": False}
+    if tareas:
+        pool = crear_pool(max_workers)
+        try:
+            pendientes = {pool.submit(generar_qr_tarea, t): t for t in tareas}
+            while pendientes:
+                if cancelado():
+                    resultado["cancelado"] = True
+                    break
+                listos, _ = wait(pendientes, timeout=0.2, return_when=FIRST_COMPLETED)
+                for fut in listos:
+                    tarea = pendientes.pop(fut)
+                    try:
+                        resultado["generados"].append(fut.result())
+                        manifiesto[tarea["sku"]] = {
+                            "archivo": os.path.relpath(tarea["destino"], carpeta),
+                            **{k: tarea[k] for k in CAMPOS_MANIFIESTO_QR},
+                        }
+                    except Exception as e:
+                        resultado["errores"].append((tarea["sku"], str(e)))
+                    hechas += 1
+                    if progreso:
+                        progreso(hechas, total)
+        finally:
+            pool.shutdown(wait=True, cancel_futures=True)
+    # Lo que sí se generó queda registrado aunque se cancele
+    if resultado["generados"]:
+        escribir_json_atomico(os.path.join(carpeta, MANIFIESTO_QR), manifiesto)
+    return resultado
@@ -0,0 +1,328 @@
+import io
+import os
+import re
+import hashlib
+import multiprocessing
+from collections import OrderedDict
+from functools import lru_cache
+import xml.etree.ElementTree as ET
+from concurrent.futures import ProcessPoolExecutor
+from PIL import Image, ImageEnhance, ImageFilter
+
+# Núcleo de render de mockups, sin dependencias de Qt para poder
+# ejecutarlo en procesos del pool.
+
+SVG_CACHE_DIR = os.path.join("datos", "cache", "svg")
+EXTENSIONES_DISENO = ('.png', '.jpg', '.jpeg', '.svg')
+
+# formato -> (formato PIL, extensión)
+FORMATOS_SALIDA = {"png": ("PNG", ".png"), "jpg": ("JPEG", ".jpg"), "webp": ("WEBP", ".webp")}
+# PNG con compresión 6 es lo que hacía siempre PIL por defecto
+SALIDA_DEFECTO = {"formato": "png", "calidad": 90, "compresion": 6}
+# Lado de las miniaturas que acompañan a cada resultado
+TAM_MINIATURA = 160
+# Recortes de la base que se guardan por lote: diseños con proporciones
+# distintas dan áreas ajustadas distintas, así que se descartan los más viejos
+MAX_RECORTES = 8
+
+# Unidades CSS a píxeles (96 dpi, como cairosvg)
+UNIDADES_SVG = {"": 1.0, "px": 1.0, "pt": 96 / 72, "pc": 16.0, "in": 96.0,
+                "cm": 96 / 2.54, "mm": 96 / 25.4}
+
+
+def listar_disenos(carpeta):
+    """Archivos de diseño dentro de `carpeta` (incluye subcarpetas)."""
+    disenos = []
+    for raiz, _, archivos in os.walk(carpeta):
+        for archivo in archivos:
+            if os.path.splitext(archivo)[1].lower() in EXTENSIONES_DISENO:
+                disenos.append(os.path.join(raiz, archivo))
+    return disenos
+
+
+def _longitud_svg(valor):
+    m = re.fullmatch(r"\s*([0-9.]+(?:e[-+]?[0-9]+)?)\s*([a-z]*)\s*", valor or "", re.IGNORECASE)
+    if not m or m.group(2).lower() not in UNIDADES_SVG:
+        return None
+    return float(m.group(1)) * UNIDADES_SVG[m.group(2).lower()]
+
+
+def tamano_svg(ruta):
+    """Tamaño intrínseco (ancho, alto) en px de un SVG, o None si no se puede saber."""
+    try:
+        modificado = os.stat(ruta).st_mtime_ns
+    except OSError:
+        return None
+    return _tamano_svg(ruta, modificado)
+
+
+@lru_cache(maxsize=256)
+def _tamano_svg(ruta, modificado):
+    # Cargar un diseño lo consulta al rasterizar y al marcarlo como ajustado:
+    # el XML se analiza una sola vez mientras el archivo no cambie
+    try:
+        raiz = ET.parse(ruta).getroot()
+    except (ET.ParseError, OSError):
+        return None
+    ancho = _longitud_svg(raiz.get("width"))
+    alto = _longitud_svg(raiz.get("height"))
+    caja = (raiz.get("viewBox") or "").replace(",", " ").split()
+    if len(caja) == 4:
+        vb_ancho, vb_alto = float(caja[2]), float(caja[3])
+        if ancho is None and alto is None:
+            ancho, alto = vb_ancho, vb_alto
+        elif ancho is None and vb_alto:
+            ancho = alto * vb_ancho / vb_alto
+        elif alto is None and vb_ancho:
+            alto = ancho * vb_alto / vb_ancho
+    if not ancho or not alto:
+        return None
+    return ancho, alto
+
+
+def tamano_ajustado(tamano, ancho, alto):
+    """Mismo cálculo que ajustar_a_area, sin tocar píxeles."""
+    ratio = min(ancho / tamano[0], alto / tamano[1])
+    return int(tamano[0] * ratio), int(tamano[1] * ratio)
+
+
+def rasterizar_svg(ruta, ancho=None, alto=None, cache_dir=SVG_CACHE_DIR):
+    """
+    Rasteriza un SVG. Con ancho/alto se dibuja directamente al tamaño que
+    tendrá dentro del área (sin mapa de bits intermedio a tamaño
+    intrínseco) y el PNG se guarda en caché por hash del archivo y tamaño.
+    """
+    destino = None
+    opciones = {}
+    tamano = tamano_svg(ruta) if ancho and alto else None
+    if tamano:
+        opciones["output_width"], opciones["output_height"] = tamano_ajustado(tamano, ancho, alto)
+        with open(ruta, "rb") as f:
+            clave = hashlib.sha256(f.read()).hexdigest()
+        destino = os.path.join(cache_dir, f"{clave}_{opciones['output_width']}x{opciones['output_height']}.png")
+        if os.path.exists(destino):
+            return Image.open(destino)
+    import cairosvg  # diferido: solo hace falta para diseños SVG
+    png_data = cairosvg.svg2png(url=ruta, **opciones)
+    if destino:
+        os.makedirs(cache_dir, exist_ok=True)
+        temporal = f"{destino}.{os.getpid()}.tmp"
+        with open(temporal, "wb") as f:
+            f.write(png_data)
+        os.replace(temporal, destino)
+    return Image.open(io.BytesIO(png_data))
+
+
+def cargar_diseno(ruta, area_tamano=None):
+    """
+    Carga un diseño (PNG/JPG o SVG) como imagen RGBA. Con `area_tamano`
+    (ancho, alto) los SVG se rasterizan ya al tamaño final.
+    """
+    ext = os.path.splitext(ruta)[1].lower()
+    if ext == '.svg':
+        img = rasterizar_svg(ruta, *(area_tamano or (None, None)))
+    else:
+        img = Image.open(ruta)
+    if img.mode != 'RGBA':
+        img = img.convert('RGBA')
+    if ext == '.svg' and area_tamano and tamano_svg(ruta):
+        # Ya viene al tamaño final: componer no debe volver a redimensionarlo
+        img.info["ajustado_a"] = tuple(area_tamano)
+    return img
+
+
+def ajustar_a_area(imagen, ancho, alto):
+    """Redimensiona manteniendo la proporción para que quepa en el área."""
+    nuevo = tamano_ajustado(imagen.size, ancho, alto)
+    if nuevo == imagen.size:
+        return imagen
+    return imagen.resize(nuevo, Image.Resampling.LANCZOS)
+
+
+def preparar_base(base):
+    """
+    Partes de la base que no dependen del diseño, calculadas una vez por
+    lote: la base en RGBA y, por cada área usada, su recorte.
+    """
+    if isinstance(base, dict):
+        return base
+    return {
+        "base": base if base.mode == 'RGBA' else base.convert('RGBA'),
+        "recortes": OrderedDict(),
+    }
+
+
+def recorte_area(preparada, area):
+    """
+    Recorte RGBA de la base bajo el área (x, y, ancho, alto), limitado a la
+    imagen; None si el área queda por completo fuera de la base.
+    """
+    recortes = preparada["recortes"]
+    if area in recortes:
+        recortes.move_to_end(area)
+        return recortes[area]
+    base = preparada["base"]
+    x, y, ancho, alto = area
+    caja = (max(x, 0), max(y, 0), min(x + ancho, base.width), min(y + alto, base.height))
+    recortes[area] = base.crop(caja) if caja[0] < caja[2] and caja[1] < caja[3] else None
+    if len(recortes) > MAX_RECORTES:
+        recortes.popitem(last=False)
+    return recortes[area]
+
+
+def aplicar_efectos_realistas(base, diseno, x, y):
+    """
+    Integra el diseño con la base: contraste, brillo y desenfoque suaves.
+    Todo el trabajo se hace en el rectángulo del diseño; solo el pegado
+    final toca la imagen completa.
+    """
+    preparada = preparar_base(base)
+    diseno = ImageEnhance.Contrast(diseno).enhance(0.95)
+    diseno = ImageEnhance.Brightness(diseno).enhance(0.9)
+    # Desenfoque ligero para suavizar bordes
+    diseno = diseno.filter(ImageFilter.GaussianBlur(radius=0.5))
+    zona = recorte_area(preparada, (x, y) + diseno.size)
+    if zona is None:
+        # Nada del diseño cae sobre la base
+        return preparada["base"].copy()
+    x0, y0 = max(x, 0), max(y, 0)
+    if zona.size != diseno.size:
+        # Área que se sale de la base: solo se usa la parte visible del diseño
+        diseno = diseno.crop((x0 - x, y0 - y, x0 - x + zona.width, y0 - y + zona.height))
+    capa = Image.new('RGBA', zona.size, (0, 0, 0, 0))
+    capa.paste(diseno, (0, 0), diseno)
+    zona = Image.alpha_composite(zona, capa)
+    # Desenfoque final de la zona para simular integración
+    zona = zona.filter(ImageFilter.GaussianBlur(radius=0.3))
+    resultado = preparada["base"].copy()
+    resultado.paste(zona, (x0, y0))
+    return resultado
+
+
+def parte_nombre_archivo(texto):
+    """`texto` usable dentro de un nombre de archivo: sin separadores de ruta ni caracteres reservados."""
+    return re.sub(r'[\\/:*?"<>|\x00-\x1f]+', "_", texto).strip(". ") or "_"
+
+
+def nombre_salida(ruta_diseno, carpeta_salida, formato="png", colocacion=""):
+    nombre = os.path.splitext(os.path.basename(ruta_diseno))[0]
+    if colocacion:
+        # El nombre de la colocación viene de la plantilla: no debe poder salirse de la carpeta
+        nombre += f"_{parte_nombre_archivo(colocacion)}"
+    return os.path.join(carpeta_salida, f"mockup_{nombre}{FORMATOS_SALIDA[formato][1]}")
+
+
+def guardar_mockup(imagen, ruta, salida=None):
+    """
+    Codifica un mockup según `salida` ({"formato", "calidad", "compresion"}).
+    JPEG no admite transparencia, así que se aplana a RGB. Devuelve la ruta.
+    """
+    salida = {**SALIDA_DEFECTO, **(salida or {})}
+    formato_pil = FORMATOS_SALIDA[salida["formato"]][0]
+    if formato_pil == "PNG":
+        imagen.save(ruta, format="PNG", compress_level=salida["compresion"])
+    elif formato_pil == "JPEG":
+        imagen.convert("RGB").save(ruta, format="JPEG", quality=salida["calidad"], optimize=True)
+    else:
+        imagen.save(ruta, format="WEBP", quality=salida["calidad"], method=4)
+    return ruta
+
+
+def componer(base, diseno, area, efectos):
+    """
+    Coloca un diseño ya cargado sobre la base (imagen o resultado de
+    preparar_base). Devuelve una imagen nueva.
+    """
+    preparada = preparar_base(base)
+    x, y, ancho, alto = area
+    if diseno.info.get("ajustado_a") != (ancho, alto):
+        diseno = ajustar_a_area(diseno, ancho, alto)
+    if efectos:
+        return aplicar_efectos_realistas(preparada, diseno, x, y)
+    resultado = preparada["base"].copy()
+    resultado.paste(diseno, (x, y), diseno)
+    return resultado
+
+
+def miniatura_mockup(imagen, tam=TAM_MINIATURA):
+    """
+    Miniatura RGBA de un mockup como (modo, tamaño, bytes): es lo único que
+    viaja de vuelta desde los procesos y lo único que se guarda en memoria.
+    """
+    ratio = min(tam / imagen.width, tam / imagen.height, 1)
+    tamano = (max(1, int(imagen.width * ratio)), max(1, int(imagen.height * ratio)))
+    mini = imagen.resize(tamano, Image.Resampling.BILINEAR, reducing_gap=2.0)
+    if mini.mode != 'RGBA':
+        mini = mini.convert('RGBA')
+    return mini.mode, mini.size, mini.tobytes()
+
+
+def renderizar_diseno(base, ruta_diseno, area, efectos, carpeta_salida, salida=None):
+    """Renderiza y guarda un mockup. Devuelve (ruta de salida, imagen)."""
+    resultado = componer(base, cargar_diseno(ruta_diseno, area[2:]), area, efectos)
+    formato = (salida or SALIDA_DEFECTO)["formato"]
+    ruta = guardar_mockup(resultado, nombre_salida(ruta_diseno, carpeta_salida, formato), salida)
+    return ruta, resultado
+
+
+def componer_colocaciones(base, ruta_diseno, colocaciones):
+    """
+    Compone un diseño en cada colocación ({"nombre", "area", "efectos"}) de
+    una pasada: la base preparada y el diseño decodificado se reutilizan
+    (los SVG se rasterizan una vez por tamaño de área). Genera
+    (colocación, imagen) de una en una para no tenerlas todas en memoria.
+    """
+    preparada = preparar_base(base)
+    es_svg = ruta_diseno.lower().endswith('.svg')
+    disenos = {}
+    for colocacion in colocaciones:
+        area = tuple(colocacion["area"])
+        clave = area[2:] if es_svg else None
+        if clave not in disenos:
+            disenos[clave] = cargar_diseno(ruta_diseno, area[2:])
+        yield colocacion, componer(preparada, disenos[clave], area, colocacion.get("efectos", True))
+
+
+def renderizar_colocaciones(base, ruta_diseno, colocaciones, carpeta_salida, salida=None):
+    """Renderiza y guarda todas las colocaciones de un diseño. Devuelve [(ruta, miniatura)]."""
+    formato = (salida or SALIDA_DEFECTO)["formato"]
+    hechos = []
+    for colocacion, resultado in componer_colocaciones(base, ruta_diseno, colocaciones):
+        ruta = nombre_salida(ruta_diseno, carpeta_salida, formato, colocacion.get("nombre", ""))
+        guardar_mockup(resultado, ruta, salida)
+        hechos.append((ruta, miniatura_mockup(resultado)))
+    return hechos
+
+
+# --- Modo paralelo ---
+
+_base_worker = None
+
+
+def _iniciar_worker(modo, tamano, datos):
+    """Inicializador del pool: decodifica la base una sola vez por proceso."""
+    global _base_worker
+    _base_worker = preparar_base(Image.frombytes(modo, tamano, datos))
+
+
+def _renderizar_en_worker(ruta_diseno, colocaciones, carpeta_salida, salida):
+    return renderizar_colocaciones(_base_worker, ruta_diseno, colocaciones, carpeta_salida, salida)
+
+
+def crear_pool_render(base, max_workers=None):
+    """
+    Pool de procesos con la base RGBA ya cargada en cada worker: se envía
+    una vez por proceso (como bytes sin comprimir) y no en cada tarea.
+    """
+    base = base if base.mode == 'RGBA' else base.convert('RGBA')
+    return ProcessPoolExecutor(
+        max_workers=max_workers or os.cpu_count(),
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_iniciar_worker,
+        initargs=(base.mode, base.size, base.tobytes()),
+    )
+
+
+def enviar_diseno(pool, ruta_diseno, colocaciones, carpeta_salida, salida=None):
+    """Encola todas las colocaciones de un diseño como una sola tarea del pool."""
+    return pool.submit(_renderizar_en_worker, ruta_diseno, colocaciones, carpeta_salida, salida)
@@ -0,0 +1,158 @@
+import copy
+import csv
+from decimal import Decimal
+import numpy as np
+from utils.precios import MotorPrecios, resolver_parametros, a_centesimas, de_centesimas
+
+# Un escenario describe cambios hipotéticos sobre precios.json:
+#   {"global": {"iva": 8},
+#    "categorias": {"Tazas": {"descuento": 20}},
+#    "productos": {"SKU": {"precio_base": 250}},
+#    "forzar": {"sumar_envio": True},           # se impone en todas las reglas
+#    "redondeo": {"terminacion": 0.90}}
+CLAVES_ESCENARIO = ("global", "categorias", "productos", "forzar", "redondeo")
+COLUMNAS_CSV = ["sku", "nombre", "categoria", "precio_antes", "precio_despues", "diferencia",
+                "diferencia_pct", "margen_antes", "margen_despues"]
+
+
+def aplicar_escenario(precios, escenario, productos=()):
+    """
+    Copia de `precios` con el escenario aplicado; `precios` no se toca. Los
+    cambios de cada nivel se mezclan sobre la regla vigente. Si el nivel aún
+    no tiene regla, se parte de lo que hoy resuelve (sin IVA ni envío, que
+    siguen heredándose) para que cambiar un campo no deje el resto en cero.
+    """
+    desconocidas = set(escenario) - set(CLAVES_ESCENARIO)
+    if desconocidas:
+        raise ValueError(f"Claves de escenario desconocidas: {', '.join(sorted(desconocidas))}")
+    simulado = copy.deepcopy(precios)
+    if escenario.get("global"):
+        simulado.setdefault("global", {}).update(escenario["global"])
+
+    def base_nivel(sku, categoria):
+        parametros, _ = resolver_parametros(simulado, sku, categoria)
+        return {k: v for k, v in parametros.items() if k not in ("iva", "envio")}
+
+    categorias = simulado.setdefault("categorias", {})
+    for nombre, cambios in (escenario.get("categorias") or {}).items():
+        regla = categorias.get(nombre) or base_nivel(None, nombre)
+        categorias[nombre] = {**regla, **cambios}
+    categoria_de = {p.get("sku", ""): p.get("categoria", "") for p in productos}
+    reglas = simulado.setdefault("productos", {})
+    for sku, cambios in (escenario.get("productos") or {}).items():
+        regla = reglas.get(sku) or base_nivel(sku, categoria_de.get(sku, ""))
+        reglas[sku] = {**regla, **cambios}
+
+    forzar = escenario.get("forzar") or {}
+    if forzar:
+        simulado.setdefault("global", {}).update(forzar)
+        for regla in list(categorias.values()) + list(reglas.values()):
+            if regla:
+                regla.update(forzar)
+    if escenario.get("redondeo"):
+        simulado["redondeo"] = {**(simulado.get("redondeo") or {}), **escenario["redondeo"]}
+    return simulado
+
+
+def margenes(motor, costos):
+    """
+    Margen por producto en centavos: lo que queda del precio final sin el
+    IVA (se entera al fisco) ni el envío (se paga a la paquetería), menos el
+    costo del producto si está capturado.
+    """
+    c = motor.columnas
+    return c["precio_final"] - c["monto_iva"] - c["monto_envio"] - costos
+
+
+def porcentaje(parte, total):
+    if not total:
+        return None
+    return (Decimal(int(parte)) * 100 / Decimal(int(total))).quantize(Decimal("0.01"))
+
+
+def resumir(antes, despues, margen_antes, margen_despues):
+    """Totales y conteos de un conjunto de filas (arreglos de centavos)."""
+    diferencia = despues - antes
+    n = len(antes)
+    return {
+        "productos": n,
+        "cambian": int(np.count_nonzero(diferencia)),
+        "suben": int((diferencia > 0).sum()),
+        "bajan": int((diferencia < 0).sum()),
+        "total_antes": de_centesimas(antes.sum()),
+        "total_despues": de_centesimas(despues.sum()),
+        "diferencia_total": de_centesimas(diferencia.sum()),
+        "diferencia_promedio": (de_centesimas(diferencia.sum()) / n).quantize(Decimal("0.01")) if n else Decimal("0.00"),
+        "diferencia_pct": porcentaje(diferencia.sum(), antes.sum()),
+        "mayor_subida": de_centesimas(max(int(diferencia.max()), 0)) if n else Decimal("0.00"),
+        "mayor_bajada": de_centesimas(min(int(diferencia.min()), 0)) if n else Decimal("0.00"),
+        "margen_antes": de_centesimas(margen_antes.sum()),
+        "margen_despues": de_centesimas(margen_despues.sum()),
+        "diferencia_margen": de_centesimas((margen_despues - margen_antes).sum()),
+    }
+
+
+def simular(productos, precios, escenario):
+    """
+    Precios finales actuales y con el escenario de todo el catálogo, en dos
+    pasadas de MotorPrecios sobre una copia: no se guarda nada. Devuelve
+    los arreglos por producto (centavos), el resumen global y uno por
+    categoría.
+    """
+    productos = list(productos)
+    simulado = aplicar_escenario(precios, escenario, productos)
+    actual = MotorPrecios(productos, precios)
+    hipotetico = MotorPrecios(productos, simulado)
+    costos = np.array([a_centesimas(p.get("costo", 0)) for p in productos], dtype=np.int64)
+    antes = actual.columnas["precio_final"]
+    despues = hipotetico.columnas["precio_final"]
+    margen_antes = margenes(actual, costos)
+    margen_despues = margenes(hipotetico, costos)
+
+    por_categoria = {}
+    categorias = np.array([p.get("categoria", "") for p in productos], dtype=object)
+    for nombre in sorted(set(categorias.tolist())):
+        filas = categorias == nombre
+        por_categoria[nombre] = resumir(antes[filas], despues[filas], margen_antes[filas], margen_despues[filas])
+    return {
+        "productos": productos,
+        "precios_simulados": simulado,
+        "antes": antes,
+        "despues": despues,
+        "margen_antes": margen_antes,
+        "margen_despues": margen_despues,
+        "resumen": resumir(antes, despues, margen_antes, margen_despues),
+        "por_categoria": por_categoria,
+    }
+
+
+def filas_simulacion(resultado, solo_cambios=False):
+    """Una fila por producto con los importes en Decimal, para reportes."""
+    antes, despues = resultado["antes"].tolist(), resultado["despues"].tolist()
+    margen_antes, margen_despues = resultado["margen_antes"].tolist(), resultado["margen_despues"].tolist()
+    for i, prod in enumerate(resultado["productos"]):
+        if solo_cambios and antes[i] == despues[i]:
+            continue
+        yield {
+            "sku": prod.get("sku", ""),
+            "nombre": prod.get("nombre", ""),
+            "categoria": prod.get("categoria", ""),
+            "precio_antes": de_centesimas(antes[i]),
+            "precio_despues": de_centesimas(despues[i]),
+            "diferencia": de_centesimas(despues[i] - antes[i]),
+            "diferencia_pct": porcentaje(despues[i] - antes[i], antes[i]),
+            "margen_antes": de_centesimas(margen_antes[i]),
+            "margen_despues": de_centesimas(margen_despues[i]),
+        }
+
+
+def exportar_csv(resultado, ruta, solo_cambios=True):
+    """CSV por producto (UTF-8 con BOM para que Excel respete los acentos). Devuelve las filas escritas."""
+    escritas = 0
+    with open(ruta, "w", newline="", encoding="utf-8-sig") as f:
+        escritor = csv.DictWriter(f, fieldnames=COLUMNAS_CSV)
+        escritor.writeheader()
+        for fila in filas_simulacion(resultado, solo_cambios):
+            escritor.writerow({k: "" if v is None else v for k, v in fila.items()})
+            escritas += 1
+    return escritas
@@ -0,0 +1,77 @@
+import os
+import json
+import re
+
+DATA_DIR = "datos"
+MARCAS_FILE = os.path.join(DATA_DIR, "marcas.json")
+NOMBRES_PRODUCTO_FILE = os.path.join(DATA_DIR, "nombres_producto.json")
+TECNICAS_FILE = os.path.join(DATA_DIR, "tecnicas.json")
+TAMANOS_FILE = os.path.join(DATA_DIR, "tamanos.json")
+COLORES_FILE = os.path.join(DATA_DIR, "colores.json")
+FORMAS_FILE = os.path.join(DATA_DIR, "formas.json")
+
+# Listas usadas para codificar cada campo del SKU: (archivo, valores por defecto)
+CATALOGOS_SKU = {
+    "marcas": (MARCAS_FILE, ["Sin marca"]),
+    "nombres_producto": (NOMBRES_PRODUCTO_FILE, ["Playera", "Taza", "Poster", "Sudadera"]),
+    "tecnicas": (TECNICAS_FILE, ["Sublimación", "DTF", "Vinil"]),
+    "tamanos": (TAMANOS_FILE, ["Chico", "Mediano", "Grande"]),
+    "colores": (COLORES_FILE, ["Blanco", "Negro", "Rojo"]),
+    "formas": (FORMAS_FILE, ["Redondo", "Rectangular", "Cuadrado"]),
+}
+
+
+def cargar_json(ruta, defecto):
+    if os.path.exists(ruta):
+        with open(ruta, "r", encoding="utf-8") as f:
+            return json.load(f)
+    return defecto
+
+
+def cargar_catalogos_sku():
+    return {clave: cargar_json(ruta, defecto) for clave, (ruta, defecto) in CATALOGOS_SKU.items()}
+
+
+def codigo_indice(valor, catalogo, letra):
+    """Posición (base 1) de `valor` en `catalogo` con su letra: '03T'. Si no está, '01'."""
+    try:
+        idx = catalogo.index(valor)
+    except ValueError:
+        idx = 0
+    return f"{idx+1:02d}{letra}"
+
+
+def codigo_diseno(valor):
+    if not valor:
+        return "DSN"
+    d = valor.replace(" ", "").upper()
+    # Quita acentos básicos
+    d = re.sub(r'[ÁÀÂÄ]', 'A', d)
+    d = re.sub(r'[ÉÈÊË]', 'E', d)
+    d = re.sub(r'[ÍÌÎÏ]', 'I', d)
+    d = re.sub(r'[ÓÒÔÖ]', 'O', d)
+    d = re.sub(r'[ÚÙÛÜ]', 'U', d)
+    d = re.sub(r'[^A-Z0-9]', '', d)  # Solo letras y números
+    return d[:3]
+
+
+def calcular_sku(producto, catalogos):
+    cod_marca = codigo_indice(producto.get("marca", ""), catalogos["marcas"], "M")
+    cod_producto = codigo_indice(producto.get("nombre", ""), catalogos["nombres_producto"], "P")
+    cod_tecnica = codigo_indice(producto.get("tecnica", ""), catalogos["tecnicas"], "T")
+    cod_color = codigo_indice(producto.get("color", ""), catalogos["colores"], "C")
+    cod_tamano = codigo_indice(producto.get("tamano", ""), catalogos["tamanos"], "S")
+    cod_forma = codigo_indice(producto.get("forma", ""), catalogos["formas"], "F")
+    cod_diseno = codigo_diseno(producto.get("diseno", ""))
+    return f"{cod_marca}-{cod_producto}-{cod_tecnica}-{cod_color}-{cod_tamano}-{cod_forma}-{cod_diseno}"
+
+
+def actualizar_skus(productos, catalogos):
+    """Recalcula el SKU de cada producto en su lugar. Devuelve cuántos cambiaron."""
+    cambiados = 0
+    for prod in productos:
+        sku = calcular_sku(prod, catalogos)
+        if prod.get("sku") != sku:
+            prod["sku"] = sku
+            cambiados += 1
+    return cambiados